@@ -5,27 +5,79 @@ from supabase import create_client, Client
 import os
 from datetime import datetime, timedelta
 import tempfile
-import re
-import subprocess
-from PIL import Image
-from pdf2image import convert_from_path
-import pytesseract
 from dateutil import parser
+from ocr_cache import OcrCache, DEFAULT_CACHE_DIR as DEFAULT_OCR_CACHE_DIR
+from calculations import YIELDS
+from mrp import BUCKET_DAYS, REQUIREMENT_COLUMNS, MrpProjection
+from page_data import (
+    board_columns, fetch_board_orders, fetch_planning_rows, inventory_overview, inventory_position,
+    material_costs, order_purchases, order_summary, production_overview, recent_production,
+    recent_purchases, scaled_requirements
+)
+import formatting as fmt
+from db import read_cache, call_rpc, check_connection, insert_rows
+from csv_import import DEFAULT_BATCH_SIZE, import_csv
+from order_board_data import STATUSES
+from order_store import OrderStore, SupabaseOrderFeed
+
+# One Supabase client per process. Its HTTP session keeps connections alive,
+# so reruns and sessions reuse them instead of reconnecting on every click.
+@st.cache_resource
+def get_supabase():
+    return create_client(
+        st.secrets["SUPABASE_URL"],
+        st.secrets["SUPABASE_KEY"]
+    )
+
+supabase: Client = get_supabase()
 
-# Initialize Supabase client
-supabase: Client = create_client(
-    st.secrets["SUPABASE_URL"],
-    st.secrets["SUPABASE_KEY"]
+# Share Supabase reads across reruns and sessions; writes below invalidate them
+read_cache.configure(
+    ttl=st.secrets.get("CACHE_TTL_SECONDS", 30),
+    maxsize=st.secrets.get("CACHE_MAX_ENTRIES", 128)
 )
 
-# Verify database connection
+# Invoice OCR results keyed by PDF content, shared across reruns and restarts
+ocr_cache = OcrCache(
+    st.secrets.get("OCR_CACHE_DIR", DEFAULT_OCR_CACHE_DIR),
+    int(st.secrets.get("OCR_CACHE_MAX_MB", 200)) * 1024 * 1024
+)
+
+# Rows per page for history tables on the dashboard
+HISTORY_PAGE_SIZE = 10
+
+# Cards rendered per Order Board column before "Show more"
+BOARD_PAGE_SIZE = 10
+
+# How often an open Order Board redraws from the order store to show changes
+# pushed by other sessions; redraws don't query Supabase while Realtime is up
+BOARD_REFRESH_SECONDS = int(st.secrets.get("BOARD_REFRESH_SECONDS", 5))
+
+# One order store per process, kept current by Supabase Realtime. On every
+# (re)subscribe the store is emptied so the next board run reloads it and
+# nothing missed while disconnected is lost.
+@st.cache_resource
+def get_order_store():
+    store = OrderStore(
+        fetch_order=lambda order_id: supabase.table('order_board_orders').select('*').eq('id', order_id).execute().data
+    )
+    feed = SupabaseOrderFeed(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"])
+    feed.subscribe(store.apply)
+    feed.on_subscribed(store.reset)
+    feed.on_subscribed(lambda: read_cache.invalidate('orders'))
+    return store, feed.start()
+
+# Verify database connection once per process, then again every
+# HEALTH_CHECK_SECONDS. Failures aren't cached, so the next rerun retries.
+@st.cache_resource(ttl=int(st.secrets.get("HEALTH_CHECK_SECONDS", 300)), show_spinner=False)
+def check_database():
+    return check_connection(supabase), datetime.now()
+
 def init_db():
     try:
-        # Test connection by trying to select from tables
-        supabase.table('inventory').select("*").limit(1).execute()
-        supabase.table('orders').select("*").limit(1).execute()
-        supabase.table('production').select("*").limit(1).execute()
-        st.sidebar.success('Connected to Supabase')
+        latency_ms, checked_at = check_database()
+        st.sidebar.success(f'Connected to Supabase ({latency_ms:,.0f} ms)')
+        st.sidebar.caption(f'Connection checked at {checked_at:%H:%M:%S}')
     except Exception as e:
         st.sidebar.error('Error connecting to database. Please ensure tables are created.')
         st.sidebar.error(str(e))
@@ -33,148 +85,6 @@ def init_db():
 # Initialize database connection
 init_db()
 
-# Product details and yields
-products = {
-    'WF Kosher Boneless Beef Ribeye Steak': {
-        'avg_case_weight': 10,
-        'raw_material': 'RIBEYE',
-        'yield': 0.75,
-        'production_cost': 1.58
-    },
-    'WF Kosher Boneless Beef Brisket Flat Cut': {
-        'avg_case_weight': 22,
-        'raw_material': 'BRISKET',
-        'yield': 0.4551971326,  # Brisket Flat yield
-        'production_cost': 1.38,
-        'related_yields': {
-            'Stew': 0.1935483871,  # Will generate this much stew from the same input
-            'Grind': 0.1775822744  # Will generate this much grind from the same input
-        }
-    },
-    'WF Kosher Boneless Beef Chuck Roast': {
-        'avg_case_weight': 11,
-        'raw_material': '2PC CHUCK',
-        'yield': 0.2734375,
-        'production_cost': 1.19,
-        'related_yields': {
-            'Short Rib': 0.1789,
-            'Grind': 0.489375
-        }
-    },
-    'WF Kosher Ground Beef Blend of Chuck & Brisket (80/20)': {
-        'avg_case_weight': 12,
-        'raw_material': '2PC CHUCK',
-        'yield': 0.489375,  # Using the Trim yield
-        'production_cost': 1.11
-    },
-    'WF Kosher Beef Outside Skirt Steak': {
-        'avg_case_weight': 19,
-        'raw_material': 'OUTSIDE SKIRT',
-        'yield': 0.85,
-        'production_cost': 1.52
-    },
-    'WF Kosher Boneless Beef Short Ribs': {
-        'avg_case_weight': 13,
-        'raw_material': '2PC CHUCK',
-        'yield': 0.1789,
-        'production_cost': 1.51,
-        'related_yields': {
-            'Chuck Roast': 0.2734375,
-            'Grind': 0.489375
-        }
-    },
-    'WF Kosher Beef Stew': {
-        'avg_case_weight': 8,
-        'raw_material': '2PC CHUCK',
-        'yield': 0.489375,  # Trim portion for ground beef
-        'production_cost': 1.83
-    }
-}
-
-def calculate_ribeye(quantity_cases):
-    info = products['WF Kosher Boneless Beef Ribeye Steak']
-    # Convert cases to pounds using average case weight
-    quantity_lbs = quantity_cases * info['avg_case_weight']
-    raw_material = quantity_lbs / info['yield']
-    cost = raw_material * info['production_cost']
-    return {
-        'product': 'RIBEYE',
-        'order_quantity_cases': quantity_cases,
-        'order_quantity_lbs': quantity_lbs,
-        'raw_material': raw_material,
-        'cost': cost
-    }
-
-def calculate_brisket(quantity_cases):
-    info = products['WF Kosher Boneless Beef Brisket Flat Cut']
-    # Convert cases to pounds using average case weight
-    quantity_lbs = quantity_cases * info['avg_case_weight']
-    raw_material = quantity_lbs / info['yield']
-    cost = raw_material * info['production_cost']
-    return {
-        'product': 'BRISKET',
-        'order_quantity_cases': quantity_cases,
-        'order_quantity_lbs': quantity_lbs,
-        'raw_material': raw_material,
-        'cost': cost
-    }
-
-def calculate_chuck_roast(quantity_cases):
-    info = products['WF Kosher Boneless Beef Chuck Roast']
-    # Convert cases to pounds using average case weight
-    quantity_lbs = quantity_cases * info['avg_case_weight']
-    raw_material = quantity_lbs / info['yield']
-    cost = raw_material * info['production_cost']
-    return {
-        'product': 'CHUCK ROAST',
-        'order_quantity_cases': quantity_cases,
-        'order_quantity_lbs': quantity_lbs,
-        'raw_material': raw_material,
-        'cost': cost
-    }
-
-def calculate_outside_skirt(quantity_cases):
-    info = products['WF Kosher Beef Outside Skirt Steak']
-    # Convert cases to pounds using average case weight
-    quantity_lbs = quantity_cases * info['avg_case_weight']
-    raw_material = quantity_lbs / info['yield']
-    cost = raw_material * info['production_cost']
-    return {
-        'product': 'OUTSIDE SKIRT',
-        'order_quantity_cases': quantity_cases,
-        'order_quantity_lbs': quantity_lbs,
-        'raw_material': raw_material,
-        'cost': cost
-    }
-
-def calculate_stew(quantity_cases):
-    info = products['WF Kosher Beef Stew']
-    # Convert cases to pounds using average case weight
-    quantity_lbs = quantity_cases * info['avg_case_weight']
-    raw_material = quantity_lbs / info['yield']
-    cost = raw_material * info['production_cost']
-    return {
-        'product': 'STEW',
-        'order_quantity_cases': quantity_cases,
-        'order_quantity_lbs': quantity_lbs,
-        'raw_material': raw_material,
-        'cost': cost
-    }
-
-def calculate_short_rib(quantity_cases):
-    info = products['WF Kosher Boneless Beef Short Ribs']
-    # Convert cases to pounds using average case weight
-    quantity_lbs = quantity_cases * info['avg_case_weight']
-    raw_material = quantity_lbs / info['yield']
-    cost = raw_material * info['production_cost']
-    return {
-        'product': 'SHORT RIB',
-        'order_quantity_cases': quantity_cases,
-        'order_quantity_lbs': quantity_lbs,
-        'raw_material': raw_material,
-        'cost': cost
-    }
-
 def order_planning():
     st.title('Order Planning')
     st.markdown('Create and manage purchase orders')
@@ -268,8 +178,7 @@ def order_planning():
         
         with col2:
             # Get the product info to display avg case weight as help text
-            product_info = products.get(product, {})
-            avg_case_weight = product_info.get('avg_case_weight', 0)
+            avg_case_weight = YIELDS[product].avg_case_weight if product in YIELDS.product_ids else 0
             
             quantity = st.number_input(
                 f'Quantity (cases) {i+1}',
@@ -284,7 +193,7 @@ def order_planning():
             line_items.append({
                 'product': product,
                 'quantity_cases': quantity,
-                'quantity_lbs': quantity * products[product]['avg_case_weight']
+                'quantity_lbs': quantity * YIELDS[product].avg_case_weight
             })
     
     # Add/Remove item buttons
@@ -314,68 +223,19 @@ def order_planning():
             st.error('Please add at least one line item')
             return
         
-        results = []
-        total_cost = 0
-        raw_materials_needed = {}
-        
-        # Track grind yields for each raw material
-        grind_yields = {
-            'BRISKET': 0.15,        # 15% of raw material becomes grind
-            '2PC CHUCK': 0.20,      # 20% of raw material becomes grind
-            'SHORT RIB': 0.25,      # 25% of raw material becomes grind
-        }
-        
-        # Calculate each line item
-        for item in line_items:
-            if item['product'] == 'WF Kosher Boneless Beef Ribeye Steak' and item['quantity_cases'] > 0:
-                result = calculate_ribeye(item['quantity_cases'])
-                results.append(result)
-                total_cost += result['cost']
-                raw_materials_needed[result['product']] = raw_materials_needed.get(result['product'], 0) + result['raw_material']
-            elif item['product'] == 'WF Kosher Boneless Beef Brisket Flat Cut' and item['quantity_cases'] > 0:
-                result = calculate_brisket(item['quantity_cases'])
-                results.append(result)
-                total_cost += result['cost']
-                raw_materials_needed[result['product']] = raw_materials_needed.get(result['product'], 0) + result['raw_material']
-            elif item['product'] == 'WF Kosher Boneless Beef Chuck Roast' and item['quantity_cases'] > 0:
-                result = calculate_chuck_roast(item['quantity_cases'])
-                results.append(result)
-                total_cost += result['cost']
-                raw_materials_needed[result['product']] = raw_materials_needed.get(result['product'], 0) + result['raw_material']
-            elif item['product'] == 'WF Kosher Beef Outside Skirt Steak' and item['quantity_cases'] > 0:
-                result = calculate_outside_skirt(item['quantity_cases'])
-                results.append(result)
-                total_cost += result['cost']
-                raw_materials_needed[result['product']] = raw_materials_needed.get(result['product'], 0) + result['raw_material']
-            elif item['product'] == 'WF Kosher Beef Stew' and item['quantity_cases'] > 0:
-                result = calculate_stew(item['quantity_cases'])
-                results.append(result)
-                total_cost += result['cost']
-                raw_materials_needed[result['product']] = raw_materials_needed.get(result['product'], 0) + result['raw_material']
-            elif item['product'] == 'WF Kosher Boneless Beef Short Ribs' and item['quantity_cases'] > 0:
-                result = calculate_short_rib(item['quantity_cases'])
-                results.append(result)
-                total_cost += result['cost']
-                raw_materials_needed[result['product']] = raw_materials_needed.get(result['product'], 0) + result['raw_material']
-        
-        # Calculate total grind produced based on the highest amount of raw material
-        total_grind_produced = 0
-        highest_raw_material = None
-        highest_amount = 0
-        
-        # Find the highest amount of raw material that produces grind
-        for material, amount in raw_materials_needed.items():
-            if material in grind_yields and amount > highest_amount:
-                highest_amount = amount
-                highest_raw_material = material
-        
-        # Calculate grind based only on the highest amount
-        if highest_raw_material:
-            total_grind_produced = highest_amount * grind_yields[highest_raw_material]
-            st.write(f"Debug - Highest raw material: {highest_raw_material}, Amount: {highest_amount:.1f} lbs, Grind yield: {grind_yields[highest_raw_material]}, Total grind: {total_grind_produced:.1f} lbs")
-        else:
-            st.write("Debug - No raw materials found that produce grind")
-            st.write(f"Raw materials: {raw_materials_needed}")
+        # Calculate all line items in one pass and plan raw material for them
+        # jointly, crediting co-products (e.g. short rib and grind cut from
+        # the same 2PC CHUCK as the roast); the order costs what the plan buys
+        summary = order_summary(
+            [item['product'] for item in line_items],
+            [item['quantity_cases'] for item in line_items]
+        )
+        results_df, plan = summary.results, summary.plan
+        results = results_df.to_dict('records')
+        raw_materials_needed = summary.raw_materials
+        raw_material_costs = summary.raw_material_costs
+        total_cost = summary.total_cost
+        total_grind_produced = summary.total_grind
         
         # Display results
         st.markdown("---")
@@ -386,7 +246,7 @@ def order_planning():
         for result in results:
             summary_data.append({
                 'Product': result['product'],
-                'Cases': f"{result['order_quantity_cases']}",
+                'Cases': f"{result['order_quantity_cases']:g}",
                 'Order Quantity (lbs)': f"{result['order_quantity_lbs']:.1f}",
                 'Raw Material (lbs)': f"{result['raw_material']:.1f}",
                 'Cost': f"${result['cost']:.2f}"
@@ -403,10 +263,31 @@ def order_planning():
         # Display raw materials needed
         st.markdown("### Raw Materials Needed")
         raw_materials_df = pd.DataFrame([
-            {"Raw Material": material, "Quantity (lbs)": f"{quantity:.1f}"}
+            {
+                "Raw Material": material,
+                "Quantity (lbs)": f"{quantity:.1f}",
+                "Cost": f"${raw_material_costs[material]:.2f}"
+            }
             for material, quantity in raw_materials_needed.items()
         ])
         st.table(raw_materials_df)
+        if plan.raw_material_saved > 0.05:
+            st.caption(
+                f"Co-product credit saves {plan.raw_material_saved:,.1f} lbs versus buying "
+                f"for each line item separately ({plan.independent_raw_material:,.1f} lbs, "
+                f"${float(results_df['cost'].sum()):,.2f} as costed per line above)"
+            )
+        
+        # Display co-products produced beyond what was ordered
+        surplus = summary.surplus
+        if not surplus.empty:
+            st.markdown("### Co-products Produced")
+            st.table(pd.DataFrame({
+                'Product': surplus.index,
+                'Ordered (lbs)': surplus['demand_lbs'].map(lambda x: f"{x:.1f}"),
+                'Produced (lbs)': surplus['produced_lbs'].map(lambda x: f"{x:.1f}"),
+                'Surplus (lbs)': surplus['surplus_lbs'].map(lambda x: f"{x:.1f}")
+            }))
         
         # Create CSV for download
         csv = pd.DataFrame(summary_data).to_csv(index=False)
@@ -417,36 +298,20 @@ def order_planning():
             'text/csv'
         )
         
-        # Save order to database
+        # Save the order with its line items and raw material requirements in one call
         try:
-            # Format raw materials as text to include in notes
-            raw_materials_text = "\n\nRaw Materials Needed:\n"
-            for material, quantity in raw_materials_needed.items():
-                raw_materials_text += f"- {material}: {quantity:.1f} lbs\n"
-            
-            # Add grind information to notes
-            if total_grind_produced > 0:
-                raw_materials_text += f"\nTotal Grind Produced: {total_grind_produced:.1f} lbs\n"
-            
-            # Combine user notes with raw materials info
-            combined_notes = notes + raw_materials_text if notes else raw_materials_text
-            
-            # Store raw materials in line_items for display in order cards
-            enhanced_line_items = line_items.copy()
-            
-            # Add raw_materials and grind as metadata to the first line item
-            if enhanced_line_items:
-                enhanced_line_items[0]['_raw_materials'] = raw_materials_needed
-                enhanced_line_items[0]['_total_grind'] = total_grind_produced
-            
-            response = supabase.table('orders').insert({
-                'po_number': po_number,
-                'po_date': po_date.isoformat(),
-                'delivery_date': delivery_date.isoformat(),
-                'line_items': enhanced_line_items,
-                'total_cost': total_cost,
-                'notes': combined_notes
-            }).execute()
+            response = call_rpc(supabase, 'save_order', {
+                'p_order': {
+                    'po_number': po_number,
+                    'po_date': po_date.isoformat(),
+                    'delivery_date': delivery_date.isoformat(),
+                    'total_cost': total_cost,
+                    'notes': notes,
+                    'total_grind_lbs': total_grind_produced
+                },
+                'p_line_items': line_items,
+                'p_raw_materials': raw_materials_needed
+            }, writes=('orders', 'order_line_items', 'order_material_requirements'))
             
             if hasattr(response, 'data'):
                 st.success('Order saved successfully!')
@@ -460,7 +325,7 @@ def inventory_tracking():
     st.title('Inventory Tracking')
     st.markdown('Record raw material orders and production records below.')
     
-    tab1, tab2, tab3 = st.tabs(["Raw Material Purchase", "Upload Invoice", "Production Record"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Raw Material Purchase", "Upload Invoice", "Production Record", "Bulk Import"])
     
     with tab1:
         with st.form('inventory_purchase_form'):
@@ -487,7 +352,7 @@ def inventory_tracking():
                     }
                     
                     try:
-                        response = supabase.table('inventory_purchases').insert(data).execute()
+                        response = insert_rows(supabase, 'inventory_purchases', data)
                         if hasattr(response, 'data'):
                             st.success('Purchase record added successfully')
                         else:
@@ -502,127 +367,114 @@ def inventory_tracking():
         uploaded_file = st.file_uploader("Choose a PDF file", type="pdf", key="invoice_upload")
         
         if uploaded_file is not None:
+            # Imported here so other pages and reruns don't load the PDF/OCR stack
+            from invoice_processing import (
+                extract_text_layer, iter_invoice_pages, join_page_texts, merge_page_results, needs_ocr,
+                ocr_settings, parse_invoice_pages, poppler_diagnostics, poppler_path, tesseract_cmd,
+                tesseract_version
+            )
+            pdf_bytes = uploaded_file.getvalue()
+            cache_key = ocr_cache.key(pdf_bytes, ocr_settings())
+            cached = ocr_cache.get(cache_key)
+            temp_dir = temp_path = None
             try:
-                # Create a temporary file
-                temp_dir = tempfile.mkdtemp()
-                temp_path = os.path.join(temp_dir, "temp.pdf")
-                
-                with open(temp_path, "wb") as f:
-                    f.write(uploaded_file.getvalue())
-                
-                # Store PDF in Supabase storage
-                file_path = f"invoices/{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uploaded_file.name}"
-                with open(temp_path, "rb") as f:
-                    supabase.storage.from_("documents").upload(file_path, f)
-                
-                # Continue with existing PDF processing code
-                # Use absolute path to Poppler
-                poppler_path = "/opt/homebrew/Cellar/poppler/25.02.0/bin"
-                st.success(f"Using Poppler at: {poppler_path}")
+                if cached is None:
+                    # Create a temporary file
+                    temp_dir = tempfile.mkdtemp()
+                    temp_path = os.path.join(temp_dir, "temp.pdf")
+                    
+                    with open(temp_path, "wb") as f:
+                        f.write(pdf_bytes)
+                    
+                    # Use the embedded text layer where pages have one; only
+                    # scanned pages need Tesseract
+                    text_layer = extract_text_layer(temp_path)
+                    page_count = len(text_layer)
+                    if any(needs_ocr(page_text) for page_text in text_layer):
+                        try:
+                            st.success(f"Using Tesseract version: {tesseract_version()}")
+                        except Exception as e:
+                            st.error(f"Error locating Tesseract: {str(e)}")
+                            st.error(f"Tesseract path: {tesseract_cmd()}")
+                            raise e
                 
-                # Convert PDF to images with explicit path
-                try:
-                    images = convert_from_path(
-                        temp_path,
-                        poppler_path=poppler_path,
-                        dpi=300,  # Increase DPI for better quality
-                        fmt='jpeg'  # Use JPEG format for better OCR
-                    )
-                    st.success(f"Successfully converted PDF to {len(images)} images")
-                except Exception as e:
-                    st.error(f"Error converting PDF: {str(e)}")
-                    st.error("Detailed error information:")
-                    st.error(f"Poppler path exists: {os.path.exists(poppler_path)}")
-                    st.error(f"Poppler binaries:")
-                    st.code("\n".join(os.listdir(poppler_path)))
-                    st.error(f"PDF path exists: {os.path.exists(temp_path)}")
-                    st.error(f"PDF size: {os.path.getsize(temp_path)} bytes")
-                    raise e
+                    # OCR pages in parallel, one rendered page per worker, and show
+                    # line items as soon as each page is parsed
+                    page_texts = {}
+                    page_methods = {}
+                    extracted_info = merge_page_results({})
+                    progress = st.progress(0.0, text="Processing pages...")
+                    live_items = st.empty()
+                    try:
+                        pages = iter_invoice_pages(temp_path, text_layer=text_layer)
+                        for page_number, page_text, method, extracted_info in parse_invoice_pages(pages, text_layer):
+                            page_texts[page_number] = page_text
+                            page_methods[page_number] = method
+                            progress.progress(
+                                len(page_texts) / page_count,
+                                text=f"Processed page {page_number} ({len(page_texts)} of {page_count})"
+                            )
+                            found_items = extracted_info['line_items']
+                            if found_items:
+                                live_items.dataframe(pd.DataFrame(found_items), hide_index=True)
+                        ocr_count = sum(method == 'ocr' for method in page_methods.values())
+                        st.success(
+                            f"Extracted {page_count} pages "
+                            f"({page_count - ocr_count} from text layer, {ocr_count} with OCR)"
+                        )
+                    except Exception as e:
+                        st.error(f"Error performing OCR: {str(e)}")
+                        st.error("Detailed error information:")
+                        st.error(f"Poppler path: {poppler_path() or 'PATH'}")
+                        st.error(f"PDF path exists: {os.path.exists(temp_path)}")
+                        st.error(f"PDF size: {os.path.getsize(temp_path)} bytes")
+                        raise e
+                    finally:
+                        progress.empty()
+                        live_items.empty()
                 
-                # Extract text using OCR
-                try:
-                    # Verify Tesseract installation
-                    tesseract_version = subprocess.check_output([pytesseract.pytesseract.tesseract_cmd, '--version']).decode()
-                    st.success(f"Using Tesseract version: {tesseract_version.split()[1]}")
+                    cached = {
+                        'text': join_page_texts(page_texts),
+                        'extracted_info': extracted_info,
+                        'page_methods': [page_methods[page] for page in sorted(page_methods)],
+                        'file_path': None
+                    }
+                    ocr_cache.put(cache_key, cached)
                     
-                    extracted_text = ""
-                    for idx, image in enumerate(images):
-                        st.info(f"Processing page {idx + 1}...")
-                        page_text = pytesseract.image_to_string(image)
-                        extracted_text += f"\n--- Page {idx + 1} ---\n{page_text}"
-                    st.success("OCR completed successfully")
-                except Exception as e:
-                    st.error(f"Error performing OCR: {str(e)}")
-                    st.error("Detailed error information:")
-                    st.error(f"Tesseract path exists: {os.path.exists('/opt/homebrew/bin/tesseract')}")
-                    st.error(f"Tesseract path is executable: {os.access('/opt/homebrew/bin/tesseract', os.X_OK)}")
-                    raise e
+                    # Cleanup temporary files
+                    os.remove(temp_path)
+                    os.rmdir(temp_dir)
+                else:
+                    st.success("Loaded OCR results for this file from cache")
                 
-                # Define patterns for different invoice formats
-                patterns = {
-                    'date': r'(?i)Invoice Date:\s*(\d{2}/\d{2}/\d{4})',
-                    'invoice_number': r'(?i)Invoice\s*\n(\d+)',
-                    'line_items': r'(?im)^\d+\s+\d+\s+(.*?)\s+([0-9,]+\.\d+)\s+LB\s+([0-9.]+)\s+([0-9,]+\.\d+)$'
-                }
-
-                # Product name mapping for standardization
-                product_mapping = {
-                    'chuck 2pc bnls': '2PC CHUCK',
-                    'chuck 2pc': '2PC CHUCK',
-                    'outside skirt': 'OUTSIDE SKIRT',
-                    'brisket': 'BRISKET',
-                    'ribeye': 'RIBEYE'
-                }
-
-                # Extract information
-                extracted_info = {
-                    'date': None,
-                    'invoice_number': None,
-                    'line_items': []
-                }
-
-                # Extract date
-                date_match = re.search(patterns['date'], extracted_text)
-                if date_match:
-                    extracted_info['date'] = date_match.group(1)
-
-                # Extract invoice number
-                invoice_match = re.search(patterns['invoice_number'], extracted_text)
-                if invoice_match:
-                    extracted_info['invoice_number'] = invoice_match.group(1)
-
-                # Extract line items
-                line_items = re.finditer(patterns['line_items'], extracted_text)
-                for match in line_items:
-                    product_desc, quantity, price_per_lb, total = match.groups()
-                    
-                    # Clean up the extracted values
-                    product_desc = product_desc.lower().strip()
-                    quantity = float(quantity.replace(',', ''))
-                    price_per_lb = float(price_per_lb)
-                    total = float(total.replace(',', ''))
-                    
-                    # Find matching standardized product name
-                    standardized_product = None
-                    for key, value in product_mapping.items():
-                        if key in product_desc:
-                            standardized_product = value
-                            break
-                    
-                    if standardized_product:
-                        extracted_info['line_items'].append({
-                            'product': standardized_product,
-                            'quantity': quantity,
-                            'price_per_lb': price_per_lb,
-                            'total': total
-                        })
+                # Store PDF in Supabase storage once per distinct file
+                if not cached.get('file_path'):
+                    file_path = f"invoices/{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uploaded_file.name}"
+                    supabase.storage.from_("documents").upload(file_path, pdf_bytes)
+                    insert_rows(supabase, 'documents', {
+                        'file_name': uploaded_file.name,
+                        'file_path': file_path,
+                        'doc_type': 'invoice',
+                        'upload_date': datetime.now().isoformat()
+                    })
+                    cached['file_path'] = file_path
+                    ocr_cache.put(cache_key, cached)
+                
+                extracted_text = cached['text']
+                extracted_info = cached['extracted_info']
 
                 # Display raw extracted text in expander
                 with st.expander("View Raw Extracted Text"):
+                    st.caption(', '.join(
+                        f"Page {page}: {'text layer' if method == 'text' else 'OCR'}"
+                        for page, method in enumerate(cached.get('page_methods', []), start=1)
+                    ))
                     st.text(extracted_text)
 
                 # Display extracted information for verification
                 st.subheader("Invoice Details")
+                if extracted_info.get('vendor'):
+                    st.caption(f"Invoice format: {extracted_info['vendor']}")
                 col1, col2 = st.columns(2)
                 with col1:
                     if extracted_info['date']:
@@ -689,62 +541,42 @@ def inventory_tracking():
                                 st.warning(f"Calculated total (${calculated_total:.2f}) differs from invoice total (${item['total']:.2f})")
 
                 if st.button("Confirm and Save All Items"):
-                    for item in extracted_info['line_items']:
-                        data = {
-                            'material': item['product'],
-                            'quantity': item['quantity'],
-                            'price_per_lb': item['price_per_lb'],
-                            'cost': item['total'],
-                            'purchase_date': invoice_date.isoformat(),
-                            'invoice_number': invoice_number,
-                            'transaction_type': 'purchase'
-                        }
-                        
-                        response = supabase.table('inventory_purchases').insert(data).execute()
+                    # Save every line item in a single multi-row insert
+                    rows = [{
+                        'material': item['product'],
+                        'quantity': item['quantity'],
+                        'price_per_lb': item['price_per_lb'],
+                        'cost': item['total'],
+                        'purchase_date': invoice_date.isoformat(),
+                        'invoice_number': invoice_number,
+                        'transaction_type': 'purchase'
+                    } for item in extracted_info['line_items']]
+                    
+                    if rows:
+                        response = insert_rows(supabase, 'inventory_purchases', rows)
                         
                         if hasattr(response, 'data'):
-                            st.success(f'Successfully saved {item["product"]} purchase record')
+                            st.success(f'Successfully saved {len(rows)} purchase records')
                         else:
-                            st.error(f'Error saving {item["product"]} purchase record')
+                            st.error('Error saving purchase records')
 
-                # After successful processing, store document metadata in the database
-                doc_data = {
-                    'file_name': uploaded_file.name,
-                    'file_path': file_path,
-                    'doc_type': 'invoice',
-                    'upload_date': datetime.now().isoformat()
-                }
-                supabase.table('documents').insert(doc_data).execute()
-                
-                # Cleanup temporary files
-                os.remove(temp_path)
-                os.rmdir(temp_dir)
-                
             except Exception as e:
                 st.error(f"Error processing PDF: {str(e)}")
-                if os.path.exists(temp_path):
+                if temp_path and os.path.exists(temp_path):
                     os.remove(temp_path)
-                if os.path.exists(temp_dir):
+                if temp_dir and os.path.exists(temp_dir):
                     os.rmdir(temp_dir)
                 
                 # Show detailed system information
                 st.error("System Information:")
                 try:
-                    brew_prefix = subprocess.check_output(['/opt/homebrew/bin/brew', '--prefix']).decode().strip()
-                    st.code(f"""
-                    Homebrew prefix: {brew_prefix}
-                    Poppler installation:
-                    {subprocess.check_output(['ls', '-l', f'{brew_prefix}/bin/pdftoppm']).decode()}
-                    
-                    PATH environment:
-                    {os.environ.get('PATH', 'PATH not set')}
-                    """)
+                    st.code(poppler_diagnostics())
                 except Exception as sys_e:
                     st.error(f"Error getting system information: {str(sys_e)}")
     
     with tab3:
         with st.form('production_record_form'):
-            product = st.selectbox('Product', list(products.keys()))
+            product = st.selectbox('Product', list(YIELDS.product_names))
             input_material = st.selectbox('Input Material', ['RIBEYE', 'BRISKET', '2PC CHUCK', 'OUTSIDE SKIRT'])
             input_quantity = st.number_input('Input Quantity (lbs)', min_value=0.0, step=0.1, value=0.0)
             output_quantity = st.number_input('Output Quantity (lbs)', min_value=0.0, step=0.1, value=0.0)
@@ -775,8 +607,8 @@ def inventory_tracking():
                         'transaction_type': 'production'
                     }
                     
-                    response1 = supabase.table('production').insert(prod_data).execute()
-                    response2 = supabase.table('inventory_purchases').insert(inv_data).execute()
+                    response1 = insert_rows(supabase, 'production', prod_data)
+                    response2 = insert_rows(supabase, 'inventory_purchases', inv_data)
                     
                     if hasattr(response1, 'data') and hasattr(response2, 'data'):
                         st.success('Production record added successfully')
@@ -784,6 +616,35 @@ def inventory_tracking():
                         st.error('Error adding production record')
                 else:
                     st.error('Input and output quantities must be greater than 0')
+    
+    with tab4:
+        st.subheader("Import Purchase or Production History")
+        st.markdown("Upload a CSV in the same layout as the sheet exports. Rows are inserted in batches.")
+        import_kind = st.radio(
+            "Record Type",
+            ['purchases', 'production'],
+            format_func=lambda kind: 'Raw material purchases' if kind == 'purchases' else 'Production records',
+            horizontal=True
+        )
+        csv_file = st.file_uploader("Choose a CSV file", type="csv", key="bulk_import_upload")
+        batch_size = st.number_input('Rows per batch', min_value=1, max_value=5000, value=DEFAULT_BATCH_SIZE, step=100)
+        
+        if csv_file is not None and st.button('Import Records', type='primary'):
+            status = st.empty()
+            
+            def report_batch(result):
+                status.info(f"Batch {result.batches}: {result.rows_inserted} rows inserted")
+            
+            try:
+                result = import_csv(supabase, import_kind, csv_file, batch_size=int(batch_size), on_batch=report_batch)
+            except Exception as e:
+                st.error(f"Error reading CSV: {str(e)}")
+            else:
+                status.empty()
+                if result.rows_inserted:
+                    st.success(f"Imported {result.rows_inserted} of {result.rows_read} rows")
+                for first_row, last_row, message in result.errors:
+                    st.error(f"Rows {first_row}-{last_row} failed: {message}")
 
 def display_dashboard():
     st.title('Order Calculator Dashboard')
@@ -797,20 +658,16 @@ def display_dashboard():
     
     with tab1:
         # Fetch current inventory data with usage
-        inventory_data = supabase.table('inventory_with_usage').select("*").execute()
-        purchases = supabase.table('inventory_purchases').select("*").execute()
+        display_df, chart_data = inventory_overview(supabase)
         
-        if hasattr(inventory_data, 'data') and len(inventory_data.data) > 0:
-            inventory_df = pd.DataFrame(inventory_data.data)
-            purchases_df = pd.DataFrame(purchases.data) if hasattr(purchases, 'data') else pd.DataFrame()
-            
+        if display_df is not None:
             # Display current inventory levels
             st.subheader("Current Inventory Levels")
             
             # Create metrics for total inventory value and movement
-            total_value = (inventory_df['current_quantity'] * inventory_df['last_purchase_price']).sum()
-            total_quantity = inventory_df['current_quantity'].sum()
-            total_used = inventory_df['quantity_used_in_production'].sum()
+            total_value = display_df['current_value'].sum()
+            total_quantity = display_df['current_quantity'].sum()
+            total_used = display_df['quantity_used_in_production'].sum()
             
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -822,47 +679,30 @@ def display_dashboard():
             
             # Display inventory table
             st.markdown("### Inventory Details")
-            display_df = inventory_df.copy()
-            display_df['Current Value'] = display_df['current_quantity'] * display_df['last_purchase_price']
-            display_df['Last Updated'] = pd.to_datetime(display_df['last_updated']).dt.strftime('%Y-%m-%d %H:%M')
-            display_df['Last Purchase'] = pd.to_datetime(display_df['last_purchase_date']).dt.strftime('%Y-%m-%d')
             
-            # Format the display dataframe
-            display_df = display_df[[
-                'material', 'current_quantity', 'quantity_used_in_production', 
-                'total_purchased', 'last_purchase_price', 'Current Value', 
-                'Last Updated', 'Last Purchase'
-            ]].rename(columns={
-                'material': 'Material',
-                'current_quantity': 'Current Quantity (lbs)',
-                'quantity_used_in_production': 'Used in Production (lbs)',
-                'total_purchased': 'Total Purchased (lbs)',
-                'last_purchase_price': 'Price/lb ($)'
-            })
-            
-            # Format numeric columns
-            display_df['Current Quantity (lbs)'] = display_df['Current Quantity (lbs)'].apply(lambda x: f"{x:,.1f}")
-            display_df['Used in Production (lbs)'] = display_df['Used in Production (lbs)'].apply(lambda x: f"{x:,.1f}")
-            display_df['Total Purchased (lbs)'] = display_df['Total Purchased (lbs)'].apply(lambda x: f"{x:,.1f}")
-            display_df['Price/lb ($)'] = display_df['Price/lb ($)'].apply(lambda x: f"${x:,.2f}" if pd.notnull(x) else "N/A")
-            display_df['Current Value'] = display_df['Current Value'].apply(lambda x: f"${x:,.2f}" if pd.notnull(x) else "N/A")
-            
-            st.dataframe(display_df, hide_index=True)
+            # Numbers stay numeric; Streamlit formats them and they sort by value
+            st.dataframe(
+                display_df,
+                hide_index=True,
+                column_order=[
+                    'material', 'current_quantity', 'quantity_used_in_production',
+                    'total_purchased', 'last_purchase_price', 'current_value',
+                    'last_updated', 'last_purchase_date'
+                ],
+                column_config={
+                    'material': 'Material',
+                    'current_quantity': fmt.pounds('Current Quantity (lbs)'),
+                    'quantity_used_in_production': fmt.pounds('Used in Production (lbs)'),
+                    'total_purchased': fmt.pounds('Total Purchased (lbs)'),
+                    'last_purchase_price': fmt.dollars('Price/lb ($)'),
+                    'current_value': fmt.dollars('Current Value'),
+                    'last_updated': fmt.timestamp('Last Updated'),
+                    'last_purchase_date': fmt.day('Last Purchase')
+                }
+            )
             
             # Create a bar chart comparing current inventory vs used in production
             st.markdown("### Inventory Usage Visualization")
-            chart_data = pd.melt(
-                inventory_df[['material', 'current_quantity', 'quantity_used_in_production']], 
-                id_vars=['material'],
-                value_vars=['current_quantity', 'quantity_used_in_production'],
-                var_name='Metric',
-                value_name='Quantity'
-            )
-            
-            chart_data['Metric'] = chart_data['Metric'].map({
-                'current_quantity': 'Current Inventory',
-                'quantity_used_in_production': 'Used in Production'
-            })
             
             inventory_chart = alt.Chart(chart_data).mark_bar().encode(
                 x=alt.X('material:N', title='Material'),
@@ -881,71 +721,62 @@ def display_dashboard():
             
             st.altair_chart(inventory_chart)
             
-            # Display recent purchase history
-            if not purchases_df.empty:
+            # Display recent purchase history, newest first, one page at a time
+            if 'purchase_pages' not in st.session_state:
+                st.session_state.purchase_pages = 1
+            purchases, more_purchases = recent_purchases(
+                supabase, st.session_state.purchase_pages, HISTORY_PAGE_SIZE
+            )
+            
+            if not purchases.empty:
                 st.markdown("### Recent Purchases")
-                recent_purchases = purchases_df.sort_values('purchase_date', ascending=False).head(10)
-                recent_purchases['purchase_date'] = pd.to_datetime(recent_purchases['purchase_date']).dt.strftime('%Y-%m-%d')
-                recent_purchases['price_per_lb'] = recent_purchases['price_per_lb'].apply(lambda x: f"${x:,.2f}")
-                recent_purchases['cost'] = recent_purchases['cost'].apply(lambda x: f"${x:,.2f}")
-                recent_purchases['quantity'] = recent_purchases['quantity'].apply(lambda x: f"{x:,.1f}")
                 
                 st.dataframe(
-                    recent_purchases[[
-                        'purchase_date', 'material', 'quantity', 'price_per_lb', 
-                        'cost', 'invoice_number'
-                    ]].rename(columns={
-                        'purchase_date': 'Date',
+                    purchases,
+                    hide_index=True,
+                    column_order=['purchase_date', 'material', 'quantity', 'price_per_lb', 'cost', 'invoice_number'],
+                    column_config={
+                        'purchase_date': fmt.day('Date'),
                         'material': 'Material',
-                        'quantity': 'Quantity (lbs)',
-                        'price_per_lb': 'Price/lb',
-                        'cost': 'Total Cost',
+                        'quantity': fmt.pounds('Quantity (lbs)'),
+                        'price_per_lb': fmt.dollars('Price/lb'),
+                        'cost': fmt.dollars('Total Cost'),
                         'invoice_number': 'Invoice #'
-                    }),
-                    hide_index=True
+                    }
                 )
+                if more_purchases and st.button('Load more purchases'):
+                    st.session_state.purchase_pages += 1
+                    st.rerun()
         else:
             st.info("No inventory data available")
     
     with tab2:
-        # Fetch production data
-        production = supabase.table('production').select("*").execute()
+        # Running aggregates kept by production_metrics.sql; a few rows instead of every record
+        production = production_overview(supabase)
         
-        if hasattr(production, 'data') and len(production.data) > 0:
-            production_df = pd.DataFrame(production.data)
-            
-            # Sort by PO number
-            def extract_po_number(po):
-                if pd.isna(po):
-                    return float('inf')  # Put NaN values at the end
-                match = re.search(r'(\d+)', str(po))
-                return float('inf') if match is None else int(match.group(1))
-            
-            production_df = production_df.sort_values(by='po_number', key=lambda x: x.map(extract_po_number))
+        if production is not None:
+            overall, trend_df, yield_by = production
             
             # Display metrics
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                avg_yield = production_df['yield'].mean()
-                st.metric("Average Yield", f"{avg_yield:.1%}")
+                st.metric("Average Yield", f"{overall['avg_yield']:.1%}")
             
             with col2:
-                total_input = production_df['input_quantity'].sum()
-                st.metric("Total Input (lbs)", f"{total_input:,.0f}")
+                st.metric("Total Input (lbs)", f"{overall['input_quantity']:,.0f}")
             
             with col3:
-                total_output = production_df['output_quantity'].sum()
-                st.metric("Total Output (lbs)", f"{total_output:,.0f}")
+                st.metric("Total Output (lbs)", f"{overall['output_quantity']:,.0f}")
             
-            # Yield trends
+            # Yield trends, one point per PO and product, in PO order
             st.subheader('Yield Trends')
-            yield_chart = alt.Chart(production_df).mark_line(point=True).encode(
-                x=alt.X('po_number:N', title='PO Number'),
-                y=alt.Y('yield:Q', title='Yield %', scale=alt.Scale(domain=[0, 1])),
+            yield_chart = alt.Chart(trend_df).mark_line(point=True).encode(
+                x=alt.X('po_number:N', title='PO Number', sort=list(trend_df['po_number'].unique())),
+                y=alt.Y('avg_yield:Q', title='Yield %', scale=alt.Scale(domain=[0, 1])),
                 color=alt.Color('product:N', title='Product'),
                 tooltip=['po_number', 'product', 
-                        alt.Tooltip('yield:Q', format='.1%'),
+                        alt.Tooltip('avg_yield:Q', format='.1%', title='yield'),
                         alt.Tooltip('input_quantity:Q', format=',.1f', title='Input (lbs)'),
                         alt.Tooltip('output_quantity:Q', format=',.1f', title='Output (lbs)')]
             ).properties(
@@ -956,35 +787,115 @@ def display_dashboard():
             
             st.altair_chart(yield_chart)
             
-            # Display detailed data table
+            # Yield by product and by input material
+            col1, col2 = st.columns(2)
+            for col, dimension, label in ((col1, 'product', 'Product'), (col2, 'material', 'Material')):
+                with col:
+                    st.markdown(f"### Yield by {label}")
+                    st.dataframe(
+                        yield_by[dimension],
+                        hide_index=True,
+                        column_order=[dimension, 'run_count', 'input_quantity', 'output_quantity', 'avg_yield'],
+                        column_config={
+                            dimension: label,
+                            'run_count': fmt.count('Runs'),
+                            'input_quantity': fmt.pounds('Input (lbs)'),
+                            'output_quantity': fmt.pounds('Output (lbs)'),
+                            'avg_yield': fmt.percent('Avg Yield')
+                        }
+                    )
+            
+            # Material cost of production, priced from the stock on hand at the time
+            st.subheader('Material Cost')
+            cost_method = st.radio(
+                'Costing method', ['FIFO', 'Weighted Average'], horizontal=True, key='cost_method'
+            )
+            try:
+                costs, cost_summary, weekly_costs = material_costs(
+                    supabase, 'fifo' if cost_method == 'FIFO' else 'average'
+                )
+            except Exception as e:
+                costs = None
+                st.error(f"Error loading production costs (has production_costs.sql been run?): {str(e)}")
+            if costs is not None and not costs.empty:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("Total Material Cost", f"${cost_summary['total_cost'].sum():,.2f}")
+                with col2:
+                    uncosted = costs['uncosted_runs'].sum()
+                    st.metric("Runs Without Purchase History", f"{uncosted:,}")
+                st.dataframe(
+                    cost_summary,
+                    hide_index=True,
+                    column_config={
+                        'material': 'Material',
+                        'input_quantity': fmt.pounds('Input (lbs)'),
+                        'total_cost': fmt.dollars('Material Cost'),
+                        'cost_per_lb': fmt.price_per_lb('Cost/lb')
+                    }
+                )
+                
+                cost_chart = alt.Chart(weekly_costs).mark_line(point=True).encode(
+                    x=alt.X('week:T', title='Week'),
+                    y=alt.Y('total_cost:Q', title='Material Cost ($)'),
+                    color=alt.Color('material:N', title='Material'),
+                    tooltip=[
+                        alt.Tooltip('week:T', title='Week of'),
+                        alt.Tooltip('material:N', title='Material'),
+                        alt.Tooltip('total_cost:Q', title='Material Cost', format='$,.2f')
+                    ]
+                ).properties(
+                    title='Weekly Material Cost by Material',
+                    width=800,
+                    height=300
+                ).interactive()
+                st.altair_chart(cost_chart)
+            
+            # Display detailed data table, most recent runs first, one page at a time
             st.subheader('Production Details')
-            display_df = production_df.copy()
-            display_df['yield'] = display_df['yield'].apply(lambda x: f"{x:.1%}")
-            display_df['input_quantity'] = display_df['input_quantity'].apply(lambda x: f"{x:,.1f}")
-            display_df['output_quantity'] = display_df['output_quantity'].apply(lambda x: f"{x:,.1f}")
+            if 'production_pages' not in st.session_state:
+                st.session_state.production_pages = 1
+            production_df, more_production = recent_production(
+                supabase, st.session_state.production_pages, HISTORY_PAGE_SIZE
+            )
             st.dataframe(
-                display_df[['po_number', 'product', 'input_material', 'input_quantity', 'output_quantity', 'yield']],
-                hide_index=True
+                production_df,
+                hide_index=True,
+                column_order=['po_number', 'product', 'input_material', 'input_quantity', 'output_quantity', 'yield'],
+                column_config={
+                    'input_quantity': fmt.pounds('input_quantity'),
+                    'output_quantity': fmt.pounds('output_quantity'),
+                    'yield': fmt.percent('yield')
+                }
             )
+            if more_production and st.button('Load more production records'):
+                st.session_state.production_pages += 1
+                st.rerun()
         else:
             st.info("No production data available")
 
+@st.fragment(run_every=BOARD_REFRESH_SECONDS)
 def order_board():
     st.title('Order Board')
     st.markdown('Track and manage orders in Kanban style')
     
-    # Fetch orders from database, ordered by delivery date
-    response = supabase.table('orders').select('*').order('delivery_date').execute()
+    # Cards come from the in-memory order store; Realtime applies each change
+    # to it, so only the changed order's card is rebuilt
+    store, feed = get_order_store()
+    today = pd.Timestamp.now().date()
+    if not store.loaded or not feed.connected:
+        # Initial load, or polling through the read cache while Realtime is down
+        store.refresh(fetch_board_orders(supabase), today)
+    orders_df = store.snapshot(today)
     
-    if hasattr(response, 'data') and len(response.data) > 0:
-        orders_df = pd.DataFrame(response.data)
+    if len(orders_df) > 0:
         
         # Add filters
         col1, col2, col3 = st.columns(3)
         with col1:
             status_filter = st.multiselect(
                 'Filter by Status',
-                ['pending', 'in_production', 'completed', 'cancelled'],
+                STATUSES,
                 default=['pending', 'in_production']
             )
         
@@ -997,47 +908,8 @@ def order_board():
                 ['All', 'Today', 'This Week', 'This Month', 'Past Due']
             )
         
-        # Apply date filter
-        today = pd.Timestamp.now().date()
-        if date_filter == 'Today':
-            orders_df = orders_df[pd.to_datetime(orders_df['delivery_date']).dt.date == today]
-        elif date_filter == 'This Week':
-            week_end = today + pd.Timedelta(days=7)
-            orders_df = orders_df[
-                (pd.to_datetime(orders_df['delivery_date']).dt.date >= today) &
-                (pd.to_datetime(orders_df['delivery_date']).dt.date <= week_end)
-            ]
-        elif date_filter == 'This Month':
-            month_end = (pd.Timestamp.now() + pd.offsets.MonthEnd(0)).date()
-            orders_df = orders_df[
-                (pd.to_datetime(orders_df['delivery_date']).dt.date >= today) &
-                (pd.to_datetime(orders_df['delivery_date']).dt.date <= month_end)
-            ]
-        elif date_filter == 'Past Due':
-            orders_df = orders_df[
-                (pd.to_datetime(orders_df['delivery_date']).dt.date < today) &
-                (orders_df['status'] != 'completed') &
-                (orders_df['status'] != 'cancelled')
-            ]
-        
-        # Filter dataframe
-        filtered_df = orders_df[
-            (orders_df['status'].isin(status_filter)) &
-            (orders_df['po_number'].str.contains(search, case=False, na=False))
-        ]
-        
-        # Create columns for each status
-        status_columns = {}
-        for status in status_filter:
-            status_columns[status] = []
-        
-        # Group orders by status
-        for _, order in filtered_df.iterrows():
-            try:
-                status_columns[order['status']].append(order)
-            except Exception as e:
-                st.error(f"Error processing order {order.get('po_number', 'Unknown')}: {str(e)}")
-                continue
+        # Apply filters and group orders by status
+        status_columns = board_columns(orders_df, status_filter, search, date_filter, today)
         
         # Define CSS for the Kanban cards
         st.markdown("""
@@ -1070,74 +942,24 @@ def order_board():
         """, unsafe_allow_html=True)
         
         # Display Kanban board
-        cols = st.columns(len(status_columns))
+        cols = st.columns(max(len(status_columns), 1))
         
-        for i, (status, orders) in enumerate(status_columns.items()):
+        for i, (status, column_df) in enumerate(status_columns.items()):
             with cols[i]:
                 st.markdown(f"<h3 style='text-align: center;'>{status.title()}</h3>", unsafe_allow_html=True)
                 st.markdown(f"<div class='kanban-column'>", unsafe_allow_html=True)
                 
-                for order in orders:
-                    delivery_date = pd.to_datetime(order.get('delivery_date')).date() if order.get('delivery_date') else None
-                    is_past_due = delivery_date and delivery_date < today and order['status'] not in ['completed', 'cancelled']
-                    
-                    # Create a unique key for each order
-                    order_key = f"order_{order['id']}"
-                    
-                    # Create the card HTML
-                    card_class = "kanban-card past-due" if is_past_due else "kanban-card"
-                    card_html = f"""
-                    <div class='{card_class}' id='{order_key}'>
-                        <div class='kanban-card-header'>PO #{order['po_number']}</div>
-                        <div class='kanban-card-content'>
-                    """
-                    
-                    # Add delivery date if available
-                    if delivery_date:
-                        card_html += f"Due: {delivery_date}<br>"
-                        if is_past_due:
-                            card_html += f"<span style='color: red;'>PAST DUE</span><br>"
-                    
-                    # Add cost
-                    card_html += f"Cost: ${order['total_cost']:,.2f}<br>"
-                    
-                    # Add line items summary (first 2 items)
-                    if order.get('line_items'):
-                        card_html += "Items:<br>"
-                        for i, item in enumerate(order['line_items'][:2]):
-                            product_name = item['product'].split()[-1]
-                            cases = item.get('quantity_cases', 0)
-                            lbs = item.get('quantity_lbs', item.get('quantity', 0))
-                            card_html += f"- {product_name}: {cases} cases ({lbs:,.1f} lbs)<br>"
-                        if len(order['line_items']) > 2:
-                            card_html += f"- and {len(order['line_items']) - 2} more items<br>"
-                    
-                    # Add raw materials needed if available
-                    raw_materials = None
-                    total_grind = 0
-                    if order.get('line_items') and len(order['line_items']) > 0:
-                        # Check if raw materials are stored in the first line item
-                        if '_raw_materials' in order['line_items'][0]:
-                            raw_materials = order['line_items'][0]['_raw_materials']
-                        # Check if total grind is stored in the first line item
-                        if '_total_grind' in order['line_items'][0]:
-                            total_grind = order['line_items'][0]['_total_grind']
-                    
-                    if raw_materials:
-                        card_html += "<hr style='margin: 5px 0;'>"
-                        card_html += "<b>Raw Materials Needed:</b><br>"
-                        for material, quantity in raw_materials.items():
-                            card_html += f"- {material}: {quantity:,.1f} lbs<br>"
-                    
-                    # Add total grind produced if available
-                    if total_grind > 0:
-                        card_html += "<hr style='margin: 5px 0;'>"
-                        card_html += f"<b>Total Grind Produced:</b> {total_grind:,.1f} lbs<br>"
-                    
-                    card_html += "</div></div>"
+                # Only render the cards on the pages shown so far
+                page_key = f"board_pages_{status}"
+                if page_key not in st.session_state:
+                    st.session_state[page_key] = 1
+                visible_count = st.session_state[page_key] * BOARD_PAGE_SIZE
+                
+                for order in column_df.head(visible_count).to_dict('records'):
+                    delivery_date = order['delivery'] if pd.notna(order['delivery']) else None
                     
                     # Display the card
-                    st.markdown(card_html, unsafe_allow_html=True)
+                    st.markdown(order['card_html'], unsafe_allow_html=True)
                     
                     # Add buttons for actions
                     col1, col2 = st.columns(2)
@@ -1148,42 +970,176 @@ def order_board():
                                 st.markdown(f"**Total Cost:** ${order['total_cost']:,.2f}")
                                 if delivery_date:
                                     st.markdown(f"**Delivery Date:** {delivery_date}")
-                                po_date = pd.to_datetime(order.get('po_date')).date() if order.get('po_date') else None
-                                if po_date:
-                                    st.markdown(f"**PO Date:** {po_date}")
+                                if pd.notna(order['po_day']):
+                                    st.markdown(f"**PO Date:** {order['po_day']}")
                                 
                                 st.markdown("### Line Items")
-                                for item in order['line_items']:
+                                for item in order['line_items'] or []:
                                     st.markdown(f"- {item['product']}: {item['quantity_cases']} cases ({item['quantity_lbs']:,.1f} lbs)")
                                 
-                                if order.get('notes'):
+                                if isinstance(order.get('notes'), str) and order['notes']:
                                     st.markdown("### Notes")
                                     st.markdown(order['notes'])
                     
                     with col2:
                         new_status = st.selectbox(
                             'Update',
-                            ['pending', 'in_production', 'completed', 'cancelled'],
-                            index=['pending', 'in_production', 'completed', 'cancelled'].index(order['status']),
+                            STATUSES,
+                            index=STATUSES.index(order['status']),
                             key=f"status_{order['id']}"
                         )
                         
                         if new_status != order['status']:
                             if st.button('Move', key=f"update_{order['id']}"):
                                 response = supabase.table('orders').update({'status': new_status}).eq('id', order['id']).execute()
+                                read_cache.invalidate('orders')
                                 if hasattr(response, 'data'):
+                                    # Apply the returned row now; the Realtime echo of it changes nothing
+                                    for row in response.data:
+                                        store.apply({'type': 'UPDATE', 'record': row})
                                     st.success('Status updated!')
-                                    st.rerun()
+                                    st.rerun(scope='fragment')
+                
+                hidden_count = len(column_df) - visible_count
+                if hidden_count > 0:
+                    if st.button(f"Show more ({hidden_count} hidden)", key=f"more_{status}"):
+                        st.session_state[page_key] += 1
+                        st.rerun(scope='fragment')
                 
                 st.markdown("</div>", unsafe_allow_html=True)
     else:
         st.info("No orders found")
 
+def material_planning():
+    st.title('Material Planning')
+    st.markdown('Raw material on hand projected forward from open orders and purchases dated after today.')
+    today = pd.Timestamp.now().date()
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        bucket = st.radio('Buckets', list(BUCKET_DAYS), horizontal=True)
+    with col2:
+        horizon_weeks = st.slider('Horizon (weeks)', min_value=2, max_value=26, value=8)
+    
+    try:
+        rows = fetch_planning_rows(supabase, today)
+    except Exception as e:
+        st.error(f"Error loading planning data (has material_demand.sql been run?): {str(e)}")
+        return
+    
+    requirements = pd.DataFrame(rows[1], columns=REQUIREMENT_COLUMNS)
+    
+    # Build the projection once per settings and data; what-if changes below
+    # update it in place instead of rebuilding it. Rows are compared by value,
+    # since the read cache hands back new lists whenever its TTL runs out.
+    # When the data really has changed, the saved changes are applied again
+    # to the orders that are still open.
+    settings = (BUCKET_DAYS[bucket], horizon_weeks * 7, today)
+    saved = st.session_state.get('mrp')
+    if saved is None or saved['settings'] != settings or saved['rows'] != rows:
+        changes = saved['changes'] if saved is not None else {}
+        saved = st.session_state.mrp = {
+            'settings': settings,
+            'rows': rows,
+            'projection': MrpProjection.from_rows(*rows, today, *settings[:2]),
+            'changes': {}
+        }
+        open_order_ids = set(requirements['order_id'])
+        for order_id, (delivery_date, percent, label) in changes.items():
+            if order_id in open_order_ids:
+                saved['projection'].update_order(
+                    order_id, scaled_requirements(requirements, order_id, delivery_date, percent)
+                )
+                saved['changes'][order_id] = (delivery_date, percent, label)
+    projection = saved['projection']
+    
+    st.subheader('First Shortage by Material')
+    st.dataframe(
+        projection.first_shortages(),
+        hide_index=True,
+        column_config={
+            'material': 'Raw Material',
+            'on_hand': fmt.pounds('On Hand'),
+            'receipts': fmt.pounds('Scheduled Receipts'),
+            'demand': fmt.pounds('Open Orders Need'),
+            'first_short': fmt.day('First Short'),
+            'short_by': fmt.pounds('Short By Then'),
+            'lowest': fmt.pounds('Lowest Projected')
+        }
+    )
+    
+    projected = projection.frame()
+    if not projected.empty:
+        projection_chart = alt.Chart(projected).mark_line(point=True).encode(
+            x=alt.X('date:T', title='Week of' if bucket == 'Weekly' else 'Date'),
+            y=alt.Y('projected:Q', title='Projected On Hand (lbs)'),
+            color=alt.Color('material:N', title='Material'),
+            tooltip=[
+                alt.Tooltip('date:T', title='Date'),
+                alt.Tooltip('material:N', title='Material'),
+                alt.Tooltip('receipts:Q', title='Receipts (lbs)', format=',.1f'),
+                alt.Tooltip('demand:Q', title='Demand (lbs)', format=',.1f'),
+                alt.Tooltip('projected:Q', title='Projected (lbs)', format=',.1f')
+            ]
+        ).properties(
+            title='Projected Raw Material On Hand',
+            width=800,
+            height=400
+        )
+        zero_rule = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(color='red').encode(y='y:Q')
+        st.altair_chart(projection_chart + zero_rule)
+        
+        with st.expander('Projection by bucket'):
+            st.dataframe(
+                projected[(projected['receipts'] != 0) | (projected['demand'] != 0)],
+                hide_index=True,
+                column_config={
+                    'material': 'Raw Material',
+                    'date': fmt.day('Date'),
+                    'receipts': fmt.pounds('Receipts'),
+                    'demand': fmt.pounds('Demand'),
+                    'projected': fmt.pounds('Projected')
+                }
+            )
+    
+    # What-if: move or resize one open order and see the projection change
+    if requirements.empty:
+        st.info('No open orders to plan against.')
+        return
+    
+    st.subheader('What If')
+    open_orders = requirements.drop_duplicates('order_id')
+    labels = {
+        row.order_id: f"PO #{row.po_number} (due {row.delivery_date or 'unscheduled'})"
+        for row in open_orders.itertuples()
+    }
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        order_id = st.selectbox('Order', list(labels), format_func=labels.get)
+    due = pd.to_datetime(open_orders.set_index('order_id').at[order_id, 'delivery_date'], errors='coerce')
+    with col2:
+        delivery_date = st.date_input('Delivery Date', value=today if pd.isna(due) else due.date())
+    with col3:
+        percent = st.number_input('Quantity (% of order)', min_value=0, max_value=500, value=100, step=10)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button('Apply Change'):
+            projection.update_order(order_id, scaled_requirements(requirements, order_id, delivery_date, percent))
+            saved['changes'][order_id] = (delivery_date, percent, f'{labels[order_id]}: {percent}% on {delivery_date}')
+            st.rerun()
+    with col2:
+        if st.button('Reset Changes'):
+            del st.session_state.mrp
+            st.rerun()
+    for _, _, label in saved['changes'].values():
+        st.caption(f'Changed {label}')
+
 # Sidebar Navigation
 st.sidebar.title('Order Calculator App')
 page = st.sidebar.radio(
     'Navigation',
-    ['Dashboard', 'Calculator', 'Inventory Tracking', 'Order Planning', 'Order Board'],
+    ['Dashboard', 'Calculator', 'Inventory Tracking', 'Order Planning', 'Order Board', 'Material Planning'],
     index=0  # Make Dashboard the default selected option
 )
 
@@ -1192,7 +1148,7 @@ if page == 'Dashboard':
     display_dashboard()
 elif page == 'Calculator':
     st.title('Order Calculator')
-    st.markdown('Enter purchase order cases and existing raw materials inventory below.')
+    st.markdown('Enter purchase order cases below. Inventory and open order demand are read live.')
     
     # Create three columns for different product categories
     col1, col2, col3 = st.columns(3)
@@ -1227,13 +1183,13 @@ elif page == 'Calculator':
         
         if brisket_cases > 0:
             # Calculate related products
-            brisket_info = products['WF Kosher Boneless Beef Brisket Flat Cut']
-            total_input_needed = (brisket_cases * brisket_info['avg_case_weight']) / brisket_info['yield']
+            brisket_info = YIELDS['WF Kosher Boneless Beef Brisket Flat Cut']
+            total_input_needed = (brisket_cases * brisket_info.avg_case_weight) / brisket_info.yield_
             
             st.info(f"""
             From {total_input_needed:.2f} lbs of Brisket input, you will get:
-            - {(total_input_needed * brisket_info['related_yields']['Stew']):.2f} lbs of Stew
-            - {(total_input_needed * brisket_info['related_yields']['Grind']):.2f} lbs of Grind for blending
+            - {(total_input_needed * brisket_info.related_yields['Stew']):.2f} lbs of Stew
+            - {(total_input_needed * brisket_info.related_yields['Grind']):.2f} lbs of Grind for blending
             """)
     
     with col3:
@@ -1254,93 +1210,87 @@ elif page == 'Calculator':
         if chuck_product == 'Chuck Roast':
             order_inputs['WF Kosher Boneless Beef Chuck Roast'] = chuck_cases
             if chuck_cases > 0:
-                roast_info = products['WF Kosher Boneless Beef Chuck Roast']
-                total_input_needed = (chuck_cases * roast_info['avg_case_weight']) / roast_info['yield']
+                roast_info = YIELDS['WF Kosher Boneless Beef Chuck Roast']
+                total_input_needed = (chuck_cases * roast_info.avg_case_weight) / roast_info.yield_
                 st.info(f"""
                 From {total_input_needed:.2f} lbs of Chuck input, you will get:
-                - {(total_input_needed * roast_info['related_yields']['Short Rib']):.2f} lbs of Short Ribs
-                - {(total_input_needed * roast_info['related_yields']['Grind']):.2f} lbs of Grind
+                - {(total_input_needed * roast_info.related_yields['Short Rib']):.2f} lbs of Short Ribs
+                - {(total_input_needed * roast_info.related_yields['Grind']):.2f} lbs of Grind
                 """)
         
         elif chuck_product == 'Short Ribs':
             order_inputs['WF Kosher Boneless Beef Short Ribs'] = chuck_cases
             if chuck_cases > 0:
-                shortrib_info = products['WF Kosher Boneless Beef Short Ribs']
-                total_input_needed = (chuck_cases * shortrib_info['avg_case_weight']) / shortrib_info['yield']
+                shortrib_info = YIELDS['WF Kosher Boneless Beef Short Ribs']
+                total_input_needed = (chuck_cases * shortrib_info.avg_case_weight) / shortrib_info.yield_
                 st.info(f"""
                 From {total_input_needed:.2f} lbs of Chuck input, you will get:
-                - {(total_input_needed * shortrib_info['related_yields']['Chuck Roast']):.2f} lbs of Chuck Roast
-                - {(total_input_needed * shortrib_info['related_yields']['Grind']):.2f} lbs of Grind
+                - {(total_input_needed * shortrib_info.related_yields['Chuck Roast']):.2f} lbs of Chuck Roast
+                - {(total_input_needed * shortrib_info.related_yields['Grind']):.2f} lbs of Grind
                 """)
         
         else:  # Ground Beef
             order_inputs['WF Kosher Ground Beef Blend of Chuck & Brisket (80/20)'] = chuck_cases
             if chuck_cases > 0:
-                ground_info = products['WF Kosher Ground Beef Blend of Chuck & Brisket (80/20)']
-                total_input_needed = (chuck_cases * ground_info['avg_case_weight']) / ground_info['yield']
+                ground_info = YIELDS['WF Kosher Ground Beef Blend of Chuck & Brisket (80/20)']
+                total_input_needed = (chuck_cases * ground_info.avg_case_weight) / ground_info.yield_
                 # Calculate related products using Chuck Roast's related yields since they share the same source
-                roast_info = products['WF Kosher Boneless Beef Chuck Roast']
+                roast_info = YIELDS['WF Kosher Boneless Beef Chuck Roast']
                 st.info(f"""
                 From {total_input_needed:.2f} lbs of Chuck input, you will get:
-                - {(total_input_needed * roast_info['related_yields']['Short Rib']):.2f} lbs of Short Ribs
-                - {(total_input_needed * 0.2734375):.2f} lbs of Chuck Roast
+                - {(total_input_needed * roast_info.related_yields['Short Rib']):.2f} lbs of Short Ribs
+                - {(total_input_needed * roast_info.yield_):.2f} lbs of Chuck Roast
                 """)
     
-    st.subheader('Existing Raw Material Inventory (lbs)')
-    col4, col5 = st.columns(2)
-    with col4:
-        inventory = {}
-        inventory['RIBEYE'] = st.number_input('Current RIBEYE inventory', min_value=0.0, step=0.1, value=0.0)
-        inventory['BRISKET'] = st.number_input('Current BRISKET inventory', min_value=0.0, step=0.1, value=0.0)
-    with col5:
-        inventory['2PC CHUCK'] = st.number_input('Current 2PC CHUCK inventory', min_value=0.0, step=0.1, value=0.0)
-        inventory['OUTSIDE SKIRT'] = st.number_input('Current OUTSIDE SKIRT inventory', min_value=0.0, step=0.1, value=0.0)
+    # Live inventory net of what pending and in-production orders already need
+    st.subheader('Raw Material Inventory (lbs)')
+    inventory_df, open_demand, shortfall_df, weekly_shortfall_df, demand_error = inventory_position(supabase)
+    if demand_error is not None:
+        st.error(f"Error loading open order demand (has material_demand.sql been run?): {str(demand_error)}")
+    st.dataframe(
+        shortfall_df,
+        hide_index=True,
+        column_order=['material', 'on_hand', 'open_demand', 'order_count', 'available', 'shortfall'],
+        column_config={
+            'material': 'Raw Material',
+            'on_hand': fmt.pounds('On Hand'),
+            'open_demand': fmt.pounds('Open Orders Need'),
+            'order_count': fmt.count('Open Orders'),
+            'available': fmt.pounds('Available'),
+            'shortfall': fmt.pounds('Shortfall')
+        }
+    )
+    if weekly_shortfall_df is not None:
+        with st.expander('Shortfall by delivery week'):
+            st.dataframe(
+                weekly_shortfall_df,
+                hide_index=True,
+                column_order=['material', 'delivery_week', 'quantity_lbs', 'order_count', 'projected', 'new_shortfall'],
+                column_config={
+                    'material': 'Raw Material',
+                    'delivery_week': fmt.day('Week of'),
+                    'quantity_lbs': fmt.pounds('Demand'),
+                    'order_count': fmt.count('Orders'),
+                    'projected': fmt.pounds('Projected Stock'),
+                    'new_shortfall': fmt.pounds('New Shortfall')
+                }
+            )
     
     if st.button('Calculate Order'):
-        results = []
-        total_cost = 0
+        # Buy whatever this order needs beyond the stock open orders leave
+        ordered = {product: cases for product, cases in order_inputs.items() if cases > 0}
+        results = order_purchases(ordered, open_demand, inventory_df)
         
-        # Group raw materials needed
-        raw_materials_needed = {
-            'RIBEYE': 0,
-            'BRISKET': 0,
-            '2PC CHUCK': 0,
-            'OUTSIDE SKIRT': 0
-        }
-        
-        # Define yields for raw materials
-        raw_material_yields = {
-            'RIBEYE': 0.75,  # From Ribeye product
-            'BRISKET': 0.4551971326,  # From Brisket Flat
-            '2PC CHUCK': 0.2734375,  # Using Chuck Roast yield as base
-            'OUTSIDE SKIRT': 0.85  # From Outside Skirt product
-        }
-        
-        for product, cases in order_inputs.items():
-            if cases > 0:
-                info = products[product]
-                finished_lbs = cases * info['avg_case_weight']
-                required_raw = finished_lbs / info['yield']
-                raw_materials_needed[info['raw_material']] += required_raw
-        
-        # Calculate new orders needed
-        for material, required in raw_materials_needed.items():
-            if required > 0:
-                current_inv = inventory.get(material, 0)
-                # Convert existing inventory to raw material equivalent
-                current_inv_raw = current_inv / raw_material_yields[material]
-                order_needed = max(required - current_inv_raw, 0)
-                if order_needed > 0:
-                    results.append({
-                        'Raw Material': material,
-                        'Total Required (lbs)': round(required, 2),
-                        'Current Inventory (finished lbs)': current_inv,
-                        'Current Inventory (raw lbs)': round(current_inv_raw, 2),
-                        'New Order Needed (lbs)': round(order_needed, 2)
-                    })
-        
-        if results:
-            st.write(pd.DataFrame(results))
+        if not results.empty:
+            st.dataframe(
+                results,
+                hide_index=True,
+                column_config={
+                    'Total Required (lbs)': fmt.pounds('Total Required (lbs)'),
+                    'Available (lbs)': fmt.pounds('Available (lbs)'),
+                    'New Order Needed (lbs)': fmt.pounds('New Order Needed (lbs)')
+                }
+            )
         else:
             st.info('Current inventory is sufficient for this order.')
 
@@ -1352,3 +1302,6 @@ elif page == 'Order Planning':
     
 elif page == 'Order Board':
     order_board()
+
+elif page == 'Material Planning':
+    material_planning()
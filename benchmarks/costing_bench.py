@@ -0,0 +1,132 @@
+"""Time costing.production_costs() on synthetic history and check it against
+a row-by-row reference that follows the production_costs() SQL function.
+
+    python benchmarks/costing_bench.py --months 24 --runs-per-day 40
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from costing import METHODS, production_costs  # noqa: E402
+
+MATERIALS = ['2PC CHUCK', 'BRISKET', 'RIBEYE', 'OUTSIDE SKIRT', 'SHORT RIB']
+SPELLINGS = {'2PC CHUCK': '2pc chuck', 'BRISKET': 'Brisket ', 'RIBEYE': 'Ribeye',
+             'OUTSIDE SKIRT': 'OUTSIDE SKIRT', 'SHORT RIB': 'Short Rib'}
+
+
+def synthetic_history(months, runs_per_day, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range('2024-01-01', periods=months * 30, freq='D')
+
+    # A truckload of each material roughly twice a week
+    purchase_days = days[rng.random(len(days)) < 0.3]
+    purchases = pd.DataFrame({
+        'id': np.arange(len(purchase_days) * len(MATERIALS)),
+        'material': np.repeat([MATERIALS], len(purchase_days), axis=0).ravel(),
+        'purchase_date': np.repeat(purchase_days.date, len(MATERIALS)),
+        'quantity': rng.uniform(2000, 12000, len(purchase_days) * len(MATERIALS)).round(1),
+        'price_per_lb': rng.uniform(3, 12, len(purchase_days) * len(MATERIALS)).round(4),
+        'transaction_type': 'purchase'
+    })
+    purchases['created_at'] = pd.to_datetime(purchases['purchase_date']).dt.tz_localize('UTC') + pd.Timedelta(hours=6)
+
+    runs = len(days) * runs_per_day
+    production = pd.DataFrame({
+        'id': np.arange(runs),
+        'input_material': rng.choice([SPELLINGS[m] for m in MATERIALS], runs),
+        'input_quantity': rng.uniform(100, 1500, runs).round(1),
+        'created_at': (
+            np.repeat(days, runs_per_day).tz_localize('UTC')
+            + pd.to_timedelta(rng.integers(8 * 3600, 18 * 3600, runs), unit='s')
+        )
+    })
+    return purchases, production
+
+
+def reference_costs(purchases, production, method):
+    """Row-by-row port of the plpgsql loop in production_costs.sql."""
+    events = []
+    for row in purchases[purchases['transaction_type'] == 'purchase'].itertuples():
+        day = pd.Timestamp(row.purchase_date).normalize()
+        events.append((row.material.strip().upper(), day, 0, row.created_at, row.id, row.quantity, row.price_per_lb))
+    for row in production.itertuples():
+        at = pd.Timestamp(row.created_at)
+        day = at.tz_convert(None).normalize()
+        events.append((row.input_material.strip().upper(), day, 1, at, row.id, row.input_quantity, None))
+    events.sort(key=lambda e: e[:5])
+
+    costs = {}
+    current = None
+    for material, day, kind, at, id_, qty, price in events:
+        if material != current:
+            current = material
+            layers, head, on_hand, average, last_price = [], 0, 0.0, None, None
+        if kind == 0:
+            last_price = price
+            if method == 'fifo':
+                layers.append([qty, price])
+            else:
+                average = (on_hand * (average or 0) + qty * price) / (on_hand + qty) if on_hand + qty > 0 else price
+                on_hand += qty
+            continue
+        if method == 'fifo':
+            remaining, cost = qty, 0.0
+            while remaining > 0 and head < len(layers):
+                take = min(remaining, layers[head][0])
+                cost += take * layers[head][1]
+                layers[head][0] -= take
+                remaining -= take
+                if layers[head][0] <= 0:
+                    head += 1
+            if remaining > 0:
+                cost = None if last_price is None else cost + remaining * last_price
+        else:
+            cost = None if average is None else qty * average
+            on_hand = max(on_hand - qty, 0.0)
+        costs[id_] = np.nan if cost is None else cost
+    return pd.Series(costs)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Benchmark point-in-time production costing.')
+    arg_parser.add_argument('--months', type=int, default=24)
+    arg_parser.add_argument('--runs-per-day', type=int, default=40)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--skip-reference', action='store_true', help='only time the vectorized engine')
+    args = arg_parser.parse_args(argv)
+
+    purchases, production = synthetic_history(args.months, args.runs_per_day)
+    results = []
+    for method in METHODS:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            costs = production_costs(purchases, production, method)
+            timings.append(time.perf_counter() - start)
+        result = {
+            'method': method,
+            'purchases': len(purchases),
+            'production_runs': len(production),
+            'engine_ms': round(min(timings) * 1000, 1)
+        }
+        if not args.skip_reference:
+            start = time.perf_counter()
+            expected = reference_costs(purchases, production, method)
+            result['reference_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            actual = costs.set_index('production_id')['total_cost'].reindex(expected.index)
+            result['max_abs_diff'] = float(np.nanmax(np.abs(actual - expected))) if len(expected) else 0.0
+            result['null_mismatches'] = int((actual.isna() != expected.isna()).sum())
+        results.append(result)
+        print(result, file=sys.stderr)
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""In-memory stand-in for the Supabase client, for offline benchmarks.
+
+Supports the calls the app makes through db.py: table().select() with eq/neq/
+in_/gte/lte filters, order() and range()/limit(), insert(), update().eq(),
+and rpc() through registered handlers. Every execute() counts as one round
+trip and can sleep `latency_ms` to model the network. Inserts and updates are
+published to any feed registered for the table (order_store.LocalOrderFeed),
+the way Supabase Realtime would push them.
+"""
+import copy
+import itertools
+import time
+
+
+class Response:
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, client, table):
+        self._client = client
+        self._table = table
+        self._columns = None
+        self._filters = []
+        self._order = []
+        self._range = None
+        self._action = 'select'
+        self._payload = None
+
+    def select(self, columns='*'):
+        self._columns = None if columns.strip() == '*' else [c.strip() for c in columns.split(',')]
+        return self
+
+    def insert(self, data):
+        self._action = 'insert'
+        self._payload = data
+        return self
+
+    def update(self, data):
+        self._action = 'update'
+        self._payload = data
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self._filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def gt(self, column, value):
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def gte(self, column, value):
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) >= value)
+        return self
+
+    def lte(self, column, value):
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) <= value)
+        return self
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def limit(self, count):
+        self._range = (0, count - 1)
+        return self
+
+    def execute(self):
+        self._client.round_trips += 1
+        if self._client.latency_ms:
+            time.sleep(self._client.latency_ms / 1000)
+        rows = self._client.tables.setdefault(self._table, [])
+        if self._action == 'insert':
+            new_rows = self._payload if isinstance(self._payload, list) else [self._payload]
+            inserted = []
+            for row in new_rows:
+                row = dict(row)
+                row.setdefault('id', next(self._client._ids))
+                rows.append(row)
+                inserted.append(row)
+                self._client._publish(self._table, {'type': 'INSERT', 'record': copy.deepcopy(row), 'old_record': {}})
+            return Response(copy.deepcopy(inserted))
+        matched = [row for row in rows if all(check(row) for check in self._filters)]
+        if self._action == 'update':
+            for row in matched:
+                row.update(self._payload)
+                self._client._publish(self._table, {'type': 'UPDATE', 'record': copy.deepcopy(row), 'old_record': {'id': row['id']}})
+            return Response(copy.deepcopy(matched))
+        # Stable sorts applied last key first give a multi-column order; nulls sort last
+        for column, desc in reversed(self._order):
+            present = [row for row in matched if row.get(column) is not None]
+            missing = [row for row in matched if row.get(column) is None]
+            matched = sorted(present, key=lambda row: row[column], reverse=desc) + missing
+        if self._range is not None:
+            matched = matched[self._range[0]:self._range[1] + 1]
+        if self._columns is not None:
+            matched = [{column: row.get(column) for column in self._columns} for row in matched]
+        return Response(copy.deepcopy(matched))
+
+
+class _Rpc:
+    def __init__(self, client, name, params):
+        self._client = client
+        self._name = name
+        self._params = params
+
+    def execute(self):
+        self._client.round_trips += 1
+        if self._client.latency_ms:
+            time.sleep(self._client.latency_ms / 1000)
+        return Response(self._client.functions[self._name](self._client, **self._params))
+
+
+class FakeSupabase:
+    """tables: {name: [row dicts]}; functions: {name: handler(client, **params) -> rows};
+    feeds: {table: feed with publish(change)}."""
+
+    def __init__(self, tables=None, functions=None, latency_ms=0, feeds=None):
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.functions = dict(functions or {})
+        self.feeds = dict(feeds or {})
+        self.latency_ms = latency_ms
+        self.round_trips = 0
+        self._ids = itertools.count(1_000_000)
+
+    def _publish(self, table, change):
+        if table in self.feeds:
+            self.feeds[table].publish(dict(change, table=table))
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def rpc(self, name, params=None):
+        return _Rpc(self, name, params or {})
@@ -0,0 +1,98 @@
+"""Import-time check for app.py's top-level imports (python -X importtime).
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 2500 --json import_time.json
+
+Runs every top-level import statement of app.py in a fresh interpreter (the
+app itself can't be imported without Streamlit secrets), reports the slowest
+modules and fails if the OCR/imaging stack is loaded at startup or the total
+goes over --budget-ms.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only the invoice upload path may load these
+LAZY_MODULES = ('pytesseract', 'pdf2image', 'PIL.Image', 'invoice_processing')
+
+
+def startup_imports(path):
+    """Source of each module-level import statement in `path`."""
+    with open(path) as f:
+        source = f.read()
+    tree = ast.parse(source)
+    return [
+        ast.get_source_segment(source, node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+
+def measure(statements):
+    """Run `statements` under -X importtime; returns {module: (self_us, cumulative_us, depth)}."""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', '\n'.join(statements)],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Measure app.py startup import time.')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='runs; the fastest is reported')
+    arg_parser.add_argument('--budget-ms', type=float, help='fail if total import time exceeds this')
+    arg_parser.add_argument('--top', type=int, default=10)
+    arg_parser.add_argument('--json', help='also write results to this file')
+    args = arg_parser.parse_args(argv)
+
+    statements = startup_imports(os.path.join(REPO_ROOT, 'app.py'))
+    runs = [measure(statements) for _ in range(args.repeat)]
+    totals = [sum(cumulative for _, cumulative, depth in run.values() if depth == 0) for run in runs]
+    fastest = runs[totals.index(min(totals))]
+
+    top_level = sorted(
+        ((name, cumulative) for name, (_, cumulative, depth) in fastest.items() if depth == 0),
+        key=lambda item: item[1], reverse=True
+    )
+    eager = [name for name in LAZY_MODULES if name in fastest]
+    result = {
+        'total_ms': round(min(totals) / 1000, 1),
+        'modules_loaded': len(fastest),
+        'slowest': [{'module': name, 'cumulative_ms': round(us / 1000, 1)} for name, us in top_level[:args.top]],
+        'eager_lazy_modules': eager
+    }
+
+    print(f"app.py startup imports: {result['total_ms']:,.1f} ms, {result['modules_loaded']} modules", file=sys.stderr)
+    for entry in result['slowest']:
+        print(f"  {entry['cumulative_ms']:>8,.1f} ms  {entry['module']}", file=sys.stderr)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    print(json.dumps(result))
+
+    failed = False
+    if eager:
+        print(f"FAILED: loaded at startup but should be lazy: {', '.join(eager)}", file=sys.stderr)
+        failed = True
+    if args.budget_ms is not None and result['total_ms'] > args.budget_ms:
+        print(f"FAILED: {result['total_ms']:,.1f} ms is over the {args.budget_ms:,.0f} ms budget", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Concurrency checks for the inventory triggers in upload_production_data.sql.
+
+Runs against a local Postgres (not Supabase) in a throwaway schema:
+
+    python benchmarks/inventory_concurrency_pg.py --dsn postgresql://localhost/postgres --workers 16
+
+Loads the repo's SQL scripts (upload_production_data.sql, material_key_indexes.sql,
+update_views.sql, inventory_summary.sql) and then:
+
+  new_material  - workers receive the same never-seen material at once
+  mixed_imports - workers insert multi-row purchase batches over random materials
+  production    - workers draw production from one material until stock runs out
+  bulk_import   - one 5,000-row insert; counts the inventory rows it wrote
+
+Each check reports errors, deadlocks and whether inventory (and
+inventory_summary) match the purchase and production history. Exits non-zero
+if any check fails.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import psycopg
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA = 'bench_inventory_triggers'
+SCRIPTS = ['upload_production_data.sql', 'material_key_indexes.sql', 'update_views.sql', 'inventory_summary.sql']
+MATERIALS = ['2PC CHUCK', 'OUTSIDE SKIRT', 'RIBEYE', 'SHORT RIB', 'BRISKET', 'TRIM']
+
+PURCHASE_SQL = """
+insert into inventory_purchases
+    (material, quantity, cost, purchase_date, transaction_type, price_per_lb, invoice_number)
+values (%s, %s, %s, current_date, 'purchase', %s, %s)
+"""
+
+# One multi-row insert statement, as the CSV importer sends
+PURCHASES_SQL = """
+insert into inventory_purchases
+    (material, quantity, cost, purchase_date, transaction_type, price_per_lb, invoice_number)
+select m, q, c, current_date, 'purchase', p, n
+from unnest(%s::text[], %s::numeric[], %s::numeric[], %s::numeric[], %s::text[]) as r(m, q, c, p, n)
+"""
+
+INVENTORY_MATCHES_SQL = """
+select count(*)
+from inventory i
+full join (
+    select material, sum(quantity) as quantity
+    from (
+        select material, quantity from inventory_purchases
+        union all
+        select material_key, -input_quantity from production
+    ) m
+    group by material
+) h on h.material = i.material
+where coalesce(i.quantity, 0) <> coalesce(h.quantity, 0)
+"""
+
+
+def read_repo_sql(name):
+    with open(os.path.join(REPO_ROOT, name)) as f:
+        return f.read()
+
+
+def connect(dsn):
+    conn = psycopg.connect(dsn, autocommit=True)
+    conn.execute(f'set search_path to {SCHEMA}, public')
+    return conn
+
+
+def setup(dsn):
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute('create extension if not exists "uuid-ossp"')
+        conn.execute(f'drop schema if exists {SCHEMA} cascade')
+        conn.execute(f'create schema {SCHEMA}')
+        conn.execute(f'set search_path to {SCHEMA}, public')
+        for script in SCRIPTS:
+            conn.execute(read_repo_sql(script))
+
+
+def teardown(dsn):
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(f'drop schema if exists {SCHEMA} cascade')
+
+
+def insert_purchases(conn, rows):
+    """Insert (material, quantity, cost, price_per_lb, invoice_number) rows in one statement."""
+    conn.execute(PURCHASES_SQL, [list(column) for column in zip(*rows)])
+
+
+def run_workers(dsn, workers, work):
+    """Run `work(conn, worker)` on `workers` threads released together.
+
+    Returns (errors, deadlocks, seconds); errors is a list of messages.
+    """
+    barrier = threading.Barrier(workers)
+    errors = []
+    deadlocks = [0]
+    lock = threading.Lock()
+
+    def target(worker):
+        with connect(dsn) as conn:
+            barrier.wait()
+            try:
+                work(conn, worker)
+            except psycopg.errors.DeadlockDetected as e:
+                with lock:
+                    deadlocks[0] += 1
+                    errors.append(str(e).splitlines()[0])
+            except psycopg.Error as e:
+                with lock:
+                    errors.append(str(e).splitlines()[0])
+
+    threads = [threading.Thread(target=target, args=(worker,)) for worker in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors, deadlocks[0], time.perf_counter() - start
+
+
+def consistency(conn):
+    mismatched = conn.execute(INVENTORY_MATCHES_SQL).fetchone()[0]
+    drifted = conn.execute('select count(*) from verify_inventory_summary()').fetchone()[0]
+    return {'inventory_mismatches': mismatched, 'summary_drift': drifted}
+
+
+def check_new_material(dsn, conn, workers):
+    material = f'NEW MATERIAL {int(time.time() * 1000)}'
+
+    def work(worker_conn, worker):
+        worker_conn.execute(PURCHASE_SQL, (material, 10, 50, 5, f'race-{worker}'))
+
+    errors, deadlocks, seconds = run_workers(dsn, workers, work)
+    quantity = conn.execute('select quantity from inventory where material = %s', (material,)).fetchone()
+    ok = not errors and quantity is not None and quantity[0] == 10 * workers
+    return {'ok': ok, 'errors': errors[:5], 'deadlocks': deadlocks, 'seconds': round(seconds, 3),
+            'quantity': float(quantity[0]) if quantity else None, 'expected': 10 * workers}
+
+
+def check_mixed_imports(dsn, conn, workers, statements, rows_per_statement):
+    def work(worker_conn, worker):
+        rng = random.Random(worker)
+        for statement in range(statements):
+            rows = []
+            for row in range(rows_per_statement):
+                rows.append((rng.choice(MATERIALS), 1 + rng.random() * 100, 100, 4.5, f'{worker}-{statement}-{row}'))
+            insert_purchases(worker_conn, rows)
+
+    errors, deadlocks, seconds = run_workers(dsn, workers, work)
+    result = consistency(conn)
+    ok = not errors and result['inventory_mismatches'] == 0 and result['summary_drift'] == 0
+    return dict({'ok': ok, 'errors': errors[:5], 'deadlocks': deadlocks, 'seconds': round(seconds, 3),
+                 'rows': workers * statements * rows_per_statement}, **result)
+
+
+def check_production(dsn, conn, workers, draw):
+    material = 'RIBEYE'
+    stock = float(conn.execute('select quantity from inventory where material = %s', (material,)).fetchone()[0])
+    # Enough demand that about half the draws must be refused
+    draws_per_worker = max(int(stock / draw / workers * 2), 1)
+
+    def work(worker_conn, worker):
+        for _ in range(draws_per_worker):
+            try:
+                worker_conn.execute(
+                    'insert into production (input_material, input_quantity) values (%s, %s)', (material, draw)
+                )
+            except psycopg.errors.RaiseException as e:
+                if 'Insufficient inventory' not in str(e):
+                    raise
+
+    errors, deadlocks, seconds = run_workers(dsn, workers, work)
+    remaining = float(conn.execute('select quantity from inventory where material = %s', (material,)).fetchone()[0])
+    result = consistency(conn)
+    ok = not errors and remaining >= 0 and result['inventory_mismatches'] == 0 and result['summary_drift'] == 0
+    return dict({'ok': ok, 'errors': errors[:5], 'deadlocks': deadlocks, 'seconds': round(seconds, 3),
+                 'starting_stock': stock, 'remaining': remaining}, **result)
+
+
+def check_bulk_import(conn, rows):
+    rng = random.Random(0)
+    data = [(rng.choice(MATERIALS), 1 + rng.random() * 100, 100, 4.5, f'bulk-{row}') for row in range(rows)]
+    with conn.transaction():
+        start = time.perf_counter()
+        insert_purchases(conn, data)
+        seconds = time.perf_counter() - start
+        # Row writes to inventory made by this transaction
+        writes = conn.execute(
+            "select n_tup_ins + n_tup_upd from pg_stat_xact_user_tables "
+            "where schemaname = %s and relname = 'inventory'", (SCHEMA,)
+        ).fetchone()[0]
+    result = consistency(conn)
+    materials = len({row[0] for row in data})
+    ok = writes <= materials and result['inventory_mismatches'] == 0 and result['summary_drift'] == 0
+    return dict({'ok': ok, 'rows': rows, 'seconds': round(seconds, 3),
+                 'inventory_row_writes': writes, 'materials': materials}, **result)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Concurrency checks for the inventory triggers.')
+    arg_parser.add_argument('--dsn', default=os.environ.get('BENCH_DATABASE_URL', 'postgresql://localhost/postgres'))
+    arg_parser.add_argument('--workers', type=int, default=16)
+    arg_parser.add_argument('--statements', type=int, default=20, help='insert statements per worker')
+    arg_parser.add_argument('--rows-per-statement', type=int, default=50)
+    arg_parser.add_argument('--bulk-rows', type=int, default=5000)
+    arg_parser.add_argument('--keep', action='store_true', help='leave the scratch schema in place')
+    args = arg_parser.parse_args(argv)
+
+    setup(args.dsn)
+    try:
+        with connect(args.dsn) as conn:
+            results = {
+                'new_material': check_new_material(args.dsn, conn, args.workers),
+                'mixed_imports': check_mixed_imports(
+                    args.dsn, conn, args.workers, args.statements, args.rows_per_statement
+                ),
+                'production': check_production(args.dsn, conn, args.workers, draw=100),
+                'bulk_import': check_bulk_import(conn, args.bulk_rows),
+            }
+    finally:
+        if not args.keep:
+            teardown(args.dsn)
+
+    for name, result in results.items():
+        print(f"{name:<14} {'ok' if result['ok'] else 'FAILED'}  {result}", file=sys.stderr)
+    print(json.dumps(results))
+    return 0 if all(result['ok'] for result in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
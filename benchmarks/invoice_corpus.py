@@ -0,0 +1,160 @@
+"""Corpus check and timing for the registered invoice formats.
+
+    python benchmarks/invoice_corpus.py
+    python benchmarks/invoice_corpus.py --pages 1 50 500 --corpus invoices/ --json corpus.json
+
+Every document in the corpus is parsed the way the invoice upload does it
+(vendor detected once, then each page parsed) and compared with a reference
+parse of the same format that runs its pattern strings through re and scans
+its product_mapping fragment by fragment for every line, the way parsing
+worked before formats were precompiled. The built-in corpus is synthetic
+multi-page invoices for each --pages count plus the sample PO, which no
+format should detect or pull items from. --corpus adds a directory of
+<name>.pdf or <name>.txt files (pages split on form feeds), each with an
+optional <name>.json of expectations: {"vendor": "lb_invoice", "line_items": 12}.
+
+Exits non-zero if any document's vendor, line items or expectations differ.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic  # noqa: E402
+from invoice_processing import (  # noqa: E402
+    DEFAULT_FORMAT, detect_format, extract_text_layer, invoice_formats, merge_page_results, parse_invoice_text
+)
+from run import best_ms  # noqa: E402
+
+DEFAULT_PAGES = [1, 10, 100]
+
+
+def reference_parse(text, invoice_format):
+    """`text` parsed with uncompiled patterns and a linear scan of the mapping."""
+    extracted_info = {'vendor': invoice_format.name, 'date': None, 'invoice_number': None, 'line_items': []}
+    date_match = re.search(invoice_format.patterns['date'], text)
+    if date_match:
+        extracted_info['date'] = date_match.group(1)
+    invoice_match = re.search(invoice_format.patterns['invoice_number'], text)
+    if invoice_match:
+        extracted_info['invoice_number'] = invoice_match.group(1)
+    for match in re.finditer(invoice_format.patterns['line_items'], text):
+        product_desc, quantity, price_per_lb, total = match.groups()
+        product_desc = product_desc.lower().strip()
+        product = next(
+            (material for fragment, material in invoice_format.product_mapping.items() if fragment in product_desc),
+            None
+        )
+        if product:
+            extracted_info['line_items'].append({
+                'product': product,
+                'quantity': float(quantity.replace(',', '')),
+                'price_per_lb': float(price_per_lb),
+                'total': float(total.replace(',', ''))
+            })
+    return extracted_info
+
+
+def reference_document(pages, invoice_format):
+    return merge_page_results({
+        page_number: reference_parse(text, invoice_format) for page_number, text in enumerate(pages, start=1)
+    })
+
+
+def parse_document(pages):
+    """Parse a document's page texts as the invoice upload does."""
+    invoice_format = detect_format('\n'.join(pages))
+    return merge_page_results({
+        page_number: parse_invoice_text(text, invoice_format) for page_number, text in enumerate(pages, start=1)
+    })
+
+
+def builtin_corpus(page_counts):
+    corpus = [
+        (f'synthetic_{pages}p', synthetic.invoice_pages(pages), {'vendor': 'lb_invoice'})
+        for pages in page_counts
+    ]
+    corpus.append(('sample_po', extract_text_layer(synthetic.SAMPLE_PDF), {'vendor': None, 'line_items': 0}))
+    return corpus
+
+
+def directory_corpus(directory):
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.pdf')) + glob.glob(os.path.join(directory, '*.txt'))):
+        name, extension = os.path.splitext(os.path.basename(path))
+        if extension == '.pdf':
+            pages = extract_text_layer(path)
+        else:
+            with open(path) as f:
+                pages = f.read().split('\f')
+        expected = {}
+        expected_path = os.path.join(directory, f'{name}.json')
+        if os.path.exists(expected_path):
+            with open(expected_path) as f:
+                expected = json.load(f)
+        corpus.append((name, pages, expected))
+    return corpus
+
+
+def check(pages, result, expected):
+    """Problems with one document's parse, as strings."""
+    problems = []
+    detected = detect_format('\n'.join(pages))
+    if 'vendor' in expected and (detected.name if detected else None) != expected['vendor']:
+        problems.append(f"detected {detected.name if detected else None}, expected {expected['vendor']}")
+    if 'line_items' in expected and len(result['line_items']) != expected['line_items']:
+        problems.append(f"{len(result['line_items'])} line items, expected {expected['line_items']}")
+    reference = reference_document(pages, detected or DEFAULT_FORMAT)
+    for field in ('date', 'invoice_number', 'line_items'):
+        if result[field] != reference[field]:
+            problems.append(f'{field} differs from the reference parse')
+    return problems
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--pages', type=int, nargs='+', default=DEFAULT_PAGES)
+    arg_parser.add_argument('--corpus', help='directory of extra invoices (.pdf/.txt) with .json expectations')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--json', help='write results to this file')
+    args = arg_parser.parse_args(argv)
+
+    corpus = builtin_corpus(args.pages)
+    if args.corpus:
+        corpus += directory_corpus(args.corpus)
+
+    print(f"Formats: {', '.join(invoice_format.name for invoice_format in invoice_formats)}")
+    results = {}
+    failed = False
+    for name, pages, expected in corpus:
+        result = parse_document(pages)
+        problems = check(pages, result, expected)
+        failed = failed or bool(problems)
+        detected = detect_format('\n'.join(pages))
+        results[name] = {
+            'pages': len(pages),
+            'vendor': result['vendor'] if detected else None,
+            'line_items': len(result['line_items']),
+            'parse_ms': best_ms(lambda: parse_document(pages), args.repeat),
+            'reference_ms': best_ms(lambda: reference_document(pages, detected or DEFAULT_FORMAT), args.repeat),
+            'problems': problems
+        }
+        row = results[name]
+        print(
+            f"{name:>20} {row['pages']:>5} pages {str(row['vendor']):>12} {row['line_items']:>6} items "
+            f"{row['parse_ms']:>10.2f} ms (reference {row['reference_ms']:.2f} ms)"
+            + ''.join(f'\n{"":>22}FAIL: {problem}' for problem in problems)
+        )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
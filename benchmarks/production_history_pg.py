@@ -0,0 +1,164 @@
+"""Time the production_history view before and after material_key_indexes.sql.
+
+Runs against a local Postgres (not Supabase) in a throwaway schema:
+
+    python benchmarks/production_history_pg.py --dsn postgresql://localhost/postgres
+    python benchmarks/production_history_pg.py --sizes 10000 100000 --json results.json
+
+For each size it loads synthetic production rows (and one purchase per ten
+production rows) with the mixed-case material spellings seen in the sheets,
+then times a full scan of production_history with the original schema (join
+on upper(input_material), single-column indexes) and again after applying
+material_key_indexes.sql and update_views.sql from the repo root.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import psycopg
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA = 'bench_production_history'
+
+SCHEMA_SQL = """
+create table inventory_purchases (
+    id bigserial primary key,
+    material text not null,
+    quantity numeric not null,
+    cost numeric(10,2) not null,
+    purchase_date date not null,
+    transaction_type text not null,
+    price_per_lb numeric(10,4) not null,
+    invoice_number text not null,
+    created_at timestamp with time zone default now()
+);
+create table production (
+    id bigserial primary key,
+    input_material text not null,
+    input_quantity numeric not null,
+    created_at timestamp with time zone default now()
+);
+create index idx_inventory_purchases_material on inventory_purchases(material);
+create index idx_inventory_purchases_purchase_date on inventory_purchases(purchase_date);
+"""
+
+# psycopg only accepts one statement per query when parameters are passed
+LOAD_PURCHASES_SQL = """
+insert into inventory_purchases
+    (material, quantity, cost, purchase_date, transaction_type, price_per_lb, invoice_number, created_at)
+select
+    (array['2PC CHUCK', 'BRISKET', 'RIBEYE', 'OUTSIDE SKIRT', 'SHORT RIB', 'TRIM'])[1 + g % 6],
+    1000 + random() * 9000,
+    4000 + random() * 30000,
+    date '2023-01-01' + (g % 730),
+    'purchase',
+    3 + random() * 10,
+    g::text,
+    timestamp '2023-01-01' + g * interval '1 minute'
+from generate_series(1, %(purchases)s) g
+"""
+
+LOAD_PRODUCTION_SQL = """
+insert into production (input_material, input_quantity, created_at)
+select
+    (array['2pc chuck', 'Brisket ', 'Ribeye', 'OUTSIDE SKIRT', 'Short Rib', 'trim'])[1 + g % 6],
+    random() * 5000,
+    timestamp '2023-01-01' + (g % 730) * interval '1 day'
+from generate_series(1, %(production)s) g
+"""
+
+# production_history as defined before material_key_indexes.sql
+BEFORE_VIEW_SQL = """
+create view production_history as
+select
+    p.*,
+    i.price_per_lb as material_cost_per_lb,
+    (p.input_quantity * i.price_per_lb) as total_material_cost,
+    i.purchase_date as material_purchase_date
+from production p
+left join lateral (
+    select price_per_lb, purchase_date
+    from inventory_purchases
+    where material = upper(p.input_material)
+    order by purchase_date desc
+    limit 1
+) i on true;
+"""
+
+QUERY = 'select count(*), sum(total_material_cost) from production_history'
+
+
+def read_repo_sql(name):
+    with open(os.path.join(REPO_ROOT, name)) as f:
+        return f.read()
+
+
+def time_query(conn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            conn.execute(QUERY).fetchall()
+        except psycopg.errors.QueryCanceled:
+            conn.rollback()
+            return None
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 1)
+
+
+def run_size(conn, rows, repeat, timeout_s):
+    conn.execute(f'drop schema if exists {SCHEMA} cascade')
+    conn.execute(f'create schema {SCHEMA}')
+    conn.execute(f'set search_path to {SCHEMA}')
+    conn.execute(SCHEMA_SQL)
+    conn.execute(LOAD_PURCHASES_SQL, {'purchases': max(rows // 10, 1)})
+    conn.execute(LOAD_PRODUCTION_SQL, {'production': rows})
+    conn.execute('analyze inventory_purchases; analyze production')
+    conn.execute(BEFORE_VIEW_SQL)
+    conn.commit()
+
+    conn.execute(f"set statement_timeout = '{int(timeout_s)}s'")
+    before = time_query(conn, repeat)
+
+    conn.execute('set statement_timeout = 0')
+    conn.execute(read_repo_sql('material_key_indexes.sql'))
+    conn.execute(read_repo_sql('update_views.sql'))
+    conn.commit()
+
+    conn.execute(f"set statement_timeout = '{int(timeout_s)}s'")
+    after = time_query(conn, repeat)
+    conn.execute('set statement_timeout = 0')
+    conn.execute(f'drop schema {SCHEMA} cascade')
+    conn.commit()
+    return {'rows': rows, 'before_ms': before, 'after_ms': after}
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--dsn', default=os.environ.get('BENCH_DATABASE_URL', 'postgresql://localhost/postgres'))
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    arg_parser.add_argument('--repeat', type=int, default=3, help='runs per measurement; the best is reported')
+    arg_parser.add_argument('--timeout', type=float, default=300, help='per-query timeout in seconds')
+    arg_parser.add_argument('--json', help='also write results to this file')
+    args = arg_parser.parse_args(argv)
+
+    results = []
+    with psycopg.connect(args.dsn) as conn:
+        for rows in args.sizes:
+            result = run_size(conn, rows, args.repeat, args.timeout)
+            results.append(result)
+            before = 'timeout' if result['before_ms'] is None else f"{result['before_ms']:,.1f} ms"
+            after = 'timeout' if result['after_ms'] is None else f"{result['after_ms']:,.1f} ms"
+            print(f'{rows:>10,} rows   before {before:>14}   after {after:>14}', file=sys.stderr)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
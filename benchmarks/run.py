@@ -0,0 +1,351 @@
+"""Offline benchmarks for the app's calculation, dashboard, board and invoice paths.
+
+Each suite replays the data work a page does on a rerun by calling the same
+functions app.py does (mostly page_data.py), against an in-memory stand-in
+for Supabase (fake_supabase.py) filled with synthetic data scaled up from the
+sample CSVs and PDF (synthetic.py). Nothing touches the network.
+
+    python benchmarks/run.py --sizes 100 1000 10000 --json results.json
+    python benchmarks/run.py --compare results.json --threshold 1.5
+
+Sizes are line items per order (order_planning; calculator, which also rolls
+up demand of that many open orders), production runs (dashboard), orders on
+the board (order_board) or planned against (material_planning) and invoice
+line items (invoice). OCR of one sample page is timed once, and skipped when Tesseract
+or Poppler isn't installed. With --compare, exits non-zero if any case is
+slower than the baseline by more than --threshold times.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic  # noqa: E402
+from costing import METHODS, production_costs, weekly_costs  # noqa: E402
+from db import read_cache  # noqa: E402
+from fake_supabase import FakeSupabase  # noqa: E402
+from mrp import REQUIREMENT_COLUMNS, MrpProjection  # noqa: E402
+from order_store import LocalOrderFeed, OrderStore  # noqa: E402
+from page_data import (  # noqa: E402
+    board_columns, fetch_board_orders, fetch_planning_rows, inventory_overview, inventory_position,
+    material_costs, order_purchases, order_summary, production_overview, recent_production,
+    recent_purchases, scaled_requirements
+)
+from production_metrics import summarize_production  # noqa: E402
+
+DEFAULT_SIZES = [100, 1000, 10000]
+
+# Same page size as app.py's history tables
+HISTORY_PAGE_SIZE = 10
+
+# Timings under this many ms are too noisy to flag as regressions
+NOISE_FLOOR_MS = 1.0
+
+
+def best_ms(fn, repeat, setup=None):
+    """Fastest of `repeat` calls to fn(), in ms; setup() runs untimed before each."""
+    best = math.inf
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def bench_order_planning(size, repeat, latency_ms):
+    """order_planning(): per-line requirements, the joint plan and the summary tables."""
+    names, cases = synthetic.line_items(size)
+
+    def run():
+        order_summary(names, cases).results.to_dict('records')
+
+    return {'calculate': best_ms(run, repeat)}
+
+
+def bench_calculator(size, repeat, latency_ms):
+    """Calculator page: open order demand against inventory, then plan one order.
+
+    `size` is both the number of open orders behind the demand rollup and
+    the number of line items folded into the order being calculated.
+    """
+    names, cases = synthetic.line_items(size)
+    today = pd.Timestamp.now().date()
+    purchases = synthetic.purchases(max(size // 4, 20))
+    client = FakeSupabase(tables={
+        'inventory_with_usage': synthetic.inventory_with_usage(purchases, synthetic.production(size)),
+        'open_material_demand': synthetic.open_material_demand(synthetic.orders(size, today))
+    }, latency_ms=latency_ms)
+
+    inventory, open_demand, _, _, _ = inventory_position(client)
+
+    def calculate():
+        ordered = {}
+        for name, count in zip(names, cases):
+            ordered[name] = ordered.get(name, 0) + count
+        order_purchases(ordered, open_demand, inventory)
+
+    results = {
+        'demand_rollup_cold': best_ms(lambda: inventory_position(client), repeat, setup=read_cache.clear),
+        'calculate': best_ms(calculate, repeat)
+    }
+    read_cache.clear()
+    return results
+
+
+def _dashboard_client(size, latency_ms):
+    purchases = synthetic.purchases(max(size // 4, 20))
+    production = synthetic.production(size)
+    metrics = summarize_production(production).drop(columns='avg_yield')
+    weekly = {}
+    for method in METHODS:
+        method_weekly = weekly_costs(production_costs(purchases, production, method))
+        method_weekly['week'] = method_weekly['week'].astype(str)
+        weekly[method] = method_weekly.astype(object).where(method_weekly.notna(), None).to_dict('records')
+
+    def weekly_production_costs_rpc(client, p_method='fifo', p_limit=1000, p_offset=0):
+        return weekly[p_method][p_offset:p_offset + p_limit]
+
+    return FakeSupabase(
+        tables={
+            'inventory_with_usage': synthetic.inventory_with_usage(purchases, production),
+            'inventory_purchases': purchases.to_dict('records'),
+            'production': production.to_dict('records'),
+            'production_metrics': metrics.astype(object).where(metrics.notna(), None).to_dict('records')
+        },
+        functions={'weekly_production_costs': weekly_production_costs_rpc},
+        latency_ms=latency_ms
+    )
+
+
+def bench_dashboard(size, repeat, latency_ms):
+    """display_dashboard(): both tabs' reads and chart/table prep, cold and warm cache."""
+    client = _dashboard_client(size, latency_ms)
+
+    def inventory_tab():
+        inventory_overview(client)
+        recent_purchases(client, 1, HISTORY_PAGE_SIZE)
+
+    def production_tab():
+        production_overview(client)
+        material_costs(client, 'fifo')
+        recent_production(client, 1, HISTORY_PAGE_SIZE)
+
+    results = {}
+    for name, tab in (('inventory_tab', inventory_tab), ('production_tab', production_tab)):
+        results[f'{name}_cold'] = best_ms(tab, repeat, setup=read_cache.clear)
+        results[f'{name}_warm'] = best_ms(tab, repeat)
+    read_cache.clear()
+    return results
+
+
+def bench_order_board(size, repeat, latency_ms):
+    """order_board(): load the order store and build every column, and move one order.
+
+    `move_refetch` is a status move followed by the refetch and reload the
+    board does while Realtime is down; `move_store` applies the pushed change
+    to the order store and redraws from it, as the board does with Realtime
+    connected.
+    """
+    today = pd.Timestamp.now().date()
+    status_filter = ['pending', 'in_production']
+    feed = LocalOrderFeed()
+    orders = synthetic.orders(size, today)
+    # The view shares row dicts with the table, so updates to orders show through it
+    client = FakeSupabase(tables={'orders': orders, 'order_board_orders': orders}, latency_ms=latency_ms,
+                          feeds={'orders': feed})
+    store = OrderStore()
+    feed.subscribe(store.apply)
+
+    def redraw():
+        board_columns(store.snapshot(today), status_filter, '', 'All', today)
+
+    def build():
+        store.refresh(fetch_board_orders(client), today)
+        redraw()
+
+    moves = iter(range(10 ** 9))
+
+    def move():
+        # Alternate one order between two columns
+        status = status_filter[next(moves) % 2]
+        client.table('orders').update({'status': status}).eq('id', size // 2).execute()
+        read_cache.invalidate('orders')
+
+    def cold():
+        read_cache.clear()
+        store.reset()
+
+    results = {
+        'build_cold': best_ms(build, repeat, setup=cold),
+        'move_refetch': best_ms(lambda: (move(), build()), repeat),
+        'move_store': best_ms(lambda: (move(), redraw()), repeat)
+    }
+    read_cache.clear()
+    return results
+
+
+def bench_material_planning(size, repeat, latency_ms):
+    """material_planning(): project stock daily over 26 weeks, and change one order.
+
+    `change_rebuild` rebuilds the projection with one order moved;
+    `change_incremental` applies the same move with update_order(), as the
+    page's what-if does.
+    """
+    today = pd.Timestamp.now().date()
+    orders = synthetic.orders(size, today)
+    purchases = synthetic.purchases(max(size // 4, 20))
+    # A few purchases scheduled to arrive over the horizon
+    receipts = purchases.head(20).assign(
+        purchase_date=[str(today + pd.Timedelta(days=3 * i + 1)) for i in range(min(len(purchases), 20))]
+    )
+    client = FakeSupabase(tables={
+        'inventory_with_usage': synthetic.inventory_with_usage(purchases, synthetic.production(size)),
+        'open_order_requirements': synthetic.open_order_requirements(orders),
+        'inventory_purchases': receipts.to_dict('records')
+    }, latency_ms=latency_ms)
+    horizon_days = 26 * 7
+
+    def build(rows):
+        projection = MrpProjection.from_rows(*rows, today, 1, horizon_days)
+        projection.first_shortages()
+        projection.frame()
+        return projection
+
+    rows = fetch_planning_rows(client, today)
+    requirements = pd.DataFrame(rows[1], columns=REQUIREMENT_COLUMNS)
+    order_id = rows[1][0]['order_id']
+    moved = [
+        dict(row, delivery_date=str(today + pd.Timedelta(days=30))) if row['order_id'] == order_id else row
+        for row in rows[1]
+    ]
+    projection = build(rows)
+    changes = iter(range(10 ** 9))
+
+    def change_incremental():
+        # Alternate the order between two delivery dates
+        days = 30 if next(changes) % 2 else 10
+        projection.update_order(
+            order_id, scaled_requirements(requirements, order_id, today + pd.Timedelta(days=days), 100)
+        )
+        projection.first_shortages()
+        projection.frame()
+
+    results = {
+        'build_cold': best_ms(lambda: build(fetch_planning_rows(client, today)), repeat, setup=read_cache.clear),
+        'change_rebuild': best_ms(lambda: build((rows[0], moved, rows[2])), repeat),
+        'change_incremental': best_ms(change_incremental, repeat)
+    }
+    read_cache.clear()
+    return results
+
+
+def bench_invoice(size, repeat, latency_ms):
+    """Invoice upload: text layer of the sample PDF and parsing of every page as it arrives."""
+    from invoice_processing import extract_text_layer, parse_invoice_pages
+
+    pages = synthetic.invoice_pages(math.ceil(size / 12))
+    sample_pages = extract_text_layer(synthetic.SAMPLE_PDF)
+    # The sample PO repeated to the same page count, for the no-match path
+    sample_text = (sample_pages * len(pages))[:len(pages)]
+
+    def parse(texts):
+        # Pages as iter_invoice_pages() yields them for a PDF with a text layer
+        for _ in parse_invoice_pages(((i, text, 'text') for i, text in enumerate(texts, 1)), texts):
+            pass
+
+    return {
+        'text_layer': best_ms(lambda: extract_text_layer(synthetic.SAMPLE_PDF), repeat),
+        'parse': best_ms(lambda: parse(pages), repeat),
+        'parse_sample_po': best_ms(lambda: parse(sample_text), repeat)
+    }
+
+
+def bench_ocr(repeat):
+    """OCR of one sample PDF page; None when Tesseract or Poppler isn't installed."""
+    from invoice_processing import ocr_page
+
+    if not (shutil.which('tesseract') and shutil.which('pdftoppm')):
+        return None
+    return best_ms(lambda: ocr_page(synthetic.SAMPLE_PDF, 1), min(repeat, 3))
+
+
+suites = {
+    'order_planning': bench_order_planning,
+    'calculator': bench_calculator,
+    'dashboard': bench_dashboard,
+    'order_board': bench_order_board,
+    'material_planning': bench_material_planning,
+    'invoice': bench_invoice
+}
+
+
+def compare(results, baseline, threshold):
+    """Cases slower than `threshold` x their baseline timing."""
+    previous = {(r['suite'], r['case'], r['size']): r['ms'] for r in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['suite'], result['case'], result['size']))
+        if before is None or result['ms'] is None:
+            continue
+        if result['ms'] > NOISE_FLOOR_MS and result['ms'] > before * threshold:
+            regressions.append(dict(result, baseline_ms=before, ratio=round(result['ms'] / max(before, 1e-9), 2)))
+    return regressions
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    arg_parser.add_argument('--suites', nargs='+', choices=list(suites), default=list(suites))
+    arg_parser.add_argument('--repeat', type=int, default=5, help='timed runs per case; the fastest is reported')
+    arg_parser.add_argument('--latency-ms', type=float, default=0, help='simulated Supabase round trip')
+    arg_parser.add_argument('--json', help='also write results to this file')
+    arg_parser.add_argument('--compare', help='baseline results file to check for regressions')
+    arg_parser.add_argument('--threshold', type=float, default=1.5)
+    args = arg_parser.parse_args(argv)
+
+    results = []
+
+    def record(suite, case, size, ms):
+        results.append({'suite': suite, 'case': case, 'size': size, 'ms': None if ms is None else round(ms, 3)})
+        print(f"{suite:>15} {case:<20} {size:>8}  " + ('skipped' if ms is None else f'{ms:10.2f} ms'),
+              file=sys.stderr)
+
+    for suite in args.suites:
+        for size in sorted(args.sizes):
+            for case, ms in suites[suite](size, args.repeat, args.latency_ms).items():
+                record(suite, case, size, ms)
+    # OCR time depends on the page image, not on the data size
+    if 'invoice' in args.suites:
+        record('invoice', 'ocr_page', 1, bench_ocr(args.repeat))
+
+    output = {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'repeat': args.repeat,
+        'latency_ms': args.latency_ms,
+        'results': results
+    }
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            output['regressions'] = compare(results, json.load(f), args.threshold)
+        status = 1 if output['regressions'] else 0
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(output, f, indent=2)
+    print(json.dumps(output))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
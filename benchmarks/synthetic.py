@@ -0,0 +1,170 @@
+"""Synthetic data for the benchmarks, scaled up from the sample CSVs and PDF.
+
+Rows are drawn from the sample purchase and production sheets, with
+quantities and prices jittered and dates spread over the history window, so
+distributions and material/product spellings match the real data.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from calculations import YIELDS
+from csv_import import prepare_chunk
+from order_board_data import STATUSES
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PURCHASES_CSV = os.path.join(REPO_ROOT, 'Inventory Purchases Upload - Sheet1.csv')
+PRODUCTION_CSV = os.path.join(REPO_ROOT, 'WF Production Upload  - Sheet1.csv')
+SAMPLE_PDF = os.path.join(REPO_ROOT, 'PO 3000008382 REV.pdf')
+
+START = pd.Timestamp('2024-09-01', tz='UTC')
+HISTORY_DAYS = 365
+
+# Invoice description for each material, as the vendor prints it
+invoice_descriptions = {
+    '2PC CHUCK': 'CHUCK 2PC BNLS',
+    'OUTSIDE SKIRT': 'OUTSIDE SKIRT',
+    'BRISKET': 'BRISKET',
+    'RIBEYE': 'RIBEYE',
+    'SHORT RIB': 'PLATE SHORT RIB',
+    'TRIM': 'TRIM 80/20'
+}
+
+
+def _sample_rows(kind, path):
+    return pd.DataFrame(prepare_chunk(kind, pd.read_csv(path, dtype=str)))
+
+
+def _jitter(rng, values, spread=0.15):
+    return values * rng.uniform(1 - spread, 1 + spread, len(values))
+
+
+def purchases(n, seed=0):
+    rng = np.random.default_rng(seed)
+    sample = _sample_rows('purchases', PURCHASES_CSV)
+    rows = sample.iloc[rng.integers(0, len(sample), n)].reset_index(drop=True)
+    rows['quantity'] = _jitter(rng, rows['quantity'].astype(float)).round(1)
+    rows['price_per_lb'] = _jitter(rng, rows['price_per_lb'].astype(float), 0.05).round(4)
+    rows['cost'] = (rows['quantity'] * rows['price_per_lb']).round(2)
+    days = np.sort(rng.integers(0, HISTORY_DAYS, n))
+    rows['purchase_date'] = (START + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d')
+    rows['created_at'] = (START + pd.to_timedelta(days, unit='D') + pd.Timedelta(hours=7)).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+    rows['id'] = np.arange(n)
+    return rows
+
+
+def production(n, seed=0):
+    rng = np.random.default_rng(seed + 1)
+    sample = _sample_rows('production', PRODUCTION_CSV)
+    sample = sample[sample['input_quantity'].notna()]
+    rows = sample.iloc[rng.integers(0, len(sample), n)].reset_index(drop=True)
+    rows['input_quantity'] = _jitter(rng, rows['input_quantity'].astype(float)).round(1)
+    rows['yield'] = _jitter(rng, rows['yield'].astype(float).fillna(0.8), 0.05)
+    rows['output_quantity'] = (rows['input_quantity'] * rows['yield']).round(2)
+    # About ten runs per PO, numbered the way the sheets number them
+    rows['po_number'] = '3-' + (6000 + np.arange(n) // 10).astype(str)
+    seconds = np.sort(rng.integers(0, HISTORY_DAYS * 86400, n))
+    rows['created_at'] = (START + pd.to_timedelta(seconds, unit='s')).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+    rows['id'] = np.arange(n)
+    return rows
+
+
+def inventory_with_usage(purchases, production):
+    """inventory_with_usage view rows for the given purchases and production."""
+    bought = purchases.sort_values('purchase_date', kind='mergesort').groupby('material').agg(
+        total_purchased=('quantity', 'sum'),
+        last_purchase_price=('price_per_lb', 'last'),
+        last_purchase_date=('purchase_date', 'last'),
+        last_updated=('created_at', 'last')
+    )
+    used = production.groupby('input_material')['input_quantity'].sum().rename('quantity_used_in_production')
+    inventory = bought.join(used).fillna({'quantity_used_in_production': 0.0})
+    inventory['current_quantity'] = inventory['total_purchased'] - inventory['quantity_used_in_production']
+    return inventory.rename_axis('material').reset_index().to_dict('records')
+
+
+def line_items(n, seed=0):
+    """(product_names, quantity_cases) for an order with `n` line items."""
+    rng = np.random.default_rng(seed + 2)
+    names = list(YIELDS.product_names)
+    return [names[i] for i in rng.integers(0, len(names), n)], rng.integers(1, 60, n).astype(float).tolist()
+
+
+def orders(n, today, seed=0):
+    """order_board_orders rows."""
+    rng = np.random.default_rng(seed + 3)
+    names = list(YIELDS.product_names)
+    rows = []
+    for i in range(n):
+        items = []
+        for _ in range(rng.integers(1, 6)):
+            record = YIELDS[names[rng.integers(0, len(names))]]
+            cases = float(rng.integers(1, 60))
+            items.append({
+                'product': record.name,
+                'quantity_cases': cases,
+                'quantity_lbs': cases * record.avg_case_weight
+            })
+        rows.append({
+            'id': i,
+            'po_number': f'3000{8000 + i}',
+            'po_date': str(today - pd.Timedelta(days=int(rng.integers(0, 60)))),
+            'delivery_date': str(today + pd.Timedelta(days=int(rng.integers(-10, 45)))),
+            'status': STATUSES[rng.integers(0, len(STATUSES))],
+            'total_cost': float(rng.uniform(5000, 200000)),
+            'line_items': items,
+            'raw_materials': {'2PC CHUCK': float(rng.uniform(1000, 9000)), 'BRISKET': float(rng.uniform(500, 5000))},
+            'total_grind_lbs': float(rng.uniform(0, 800)),
+            'notes': ''
+        })
+    return rows
+
+
+def open_material_demand(orders):
+    """open_material_demand view rows for order_board_orders rows."""
+    frame = pd.DataFrame(orders)
+    frame = frame[frame['status'].isin(['pending', 'in_production'])]
+    requirements = frame[['delivery_date', 'raw_materials']].assign(
+        raw_materials=frame['raw_materials'].map(lambda m: list(m.items()))
+    ).explode('raw_materials').dropna(subset=['raw_materials'])
+    requirements['material'] = requirements['raw_materials'].str[0]
+    requirements['quantity_lbs'] = requirements['raw_materials'].str[1].astype(float)
+    requirements['delivery_week'] = pd.to_datetime(requirements['delivery_date']).dt.to_period('W-SUN').dt.start_time
+    demand = requirements.groupby(['material', 'delivery_week'], as_index=False).agg(
+        quantity_lbs=('quantity_lbs', 'sum'), order_count=('quantity_lbs', 'size')
+    )
+    demand['delivery_week'] = demand['delivery_week'].dt.strftime('%Y-%m-%d')
+    return demand.to_dict('records')
+
+
+def open_order_requirements(orders):
+    """open_order_requirements view rows for order_board_orders rows."""
+    return [
+        {'order_id': order['id'], 'po_number': order['po_number'], 'material': material,
+         'delivery_date': order['delivery_date'], 'quantity_lbs': quantity}
+        for order in orders if order['status'] in ('pending', 'in_production')
+        for material, quantity in order['raw_materials'].items()
+    ]
+
+
+def invoice_pages(pages, items_per_page=12, seed=0):
+    """Invoice text pages in the vendor layout parse_invoice_text() reads."""
+    rng = np.random.default_rng(seed + 4)
+    sample = _sample_rows('purchases', PURCHASES_CSV)
+    texts = []
+    for page in range(pages):
+        lines = []
+        if page == 0:
+            lines += ['Invoice Date: 01/20/2025', 'Invoice', '87485']
+        for item in range(items_per_page):
+            row = sample.iloc[rng.integers(0, len(sample))]
+            quantity = float(row['quantity']) * rng.uniform(0.8, 1.2)
+            price = float(row['price_per_lb'])
+            lines.append(
+                f"{page * items_per_page + item + 1} {rng.integers(1, 9)} "
+                f"{invoice_descriptions.get(row['material'], row['material'])} "
+                f"{quantity:,.2f} LB {price:.4f} {quantity * price:,.2f}"
+            )
+        texts.append('\n'.join(lines))
+    return texts
@@ -0,0 +1,184 @@
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+# Product details and yields
+products = {
+    'WF Kosher Boneless Beef Ribeye Steak': {
+        'short_name': 'RIBEYE',
+        'avg_case_weight': 10,
+        'raw_material': 'RIBEYE',
+        'yield': 0.75,
+        'production_cost': 1.58
+    },
+    'WF Kosher Boneless Beef Brisket Flat Cut': {
+        'short_name': 'BRISKET',
+        'avg_case_weight': 22,
+        'raw_material': 'BRISKET',
+        'yield': 0.4551971326,  # Brisket Flat yield
+        'production_cost': 1.38,
+        'related_yields': {
+            'Stew': 0.1935483871,  # Will generate this much stew from the same input
+            'Grind': 0.1775822744  # Will generate this much grind from the same input
+        }
+    },
+    'WF Kosher Boneless Beef Chuck Roast': {
+        'short_name': 'CHUCK ROAST',
+        'avg_case_weight': 11,
+        'raw_material': '2PC CHUCK',
+        'yield': 0.2734375,
+        'production_cost': 1.19,
+        'related_yields': {
+            'Short Rib': 0.1789,
+            'Grind': 0.489375
+        }
+    },
+    'WF Kosher Ground Beef Blend of Chuck & Brisket (80/20)': {
+        'short_name': 'GROUND BEEF',
+        'avg_case_weight': 12,
+        'raw_material': '2PC CHUCK',
+        'yield': 0.489375,  # Using the Trim yield
+        'production_cost': 1.11
+    },
+    'WF Kosher Beef Outside Skirt Steak': {
+        'short_name': 'OUTSIDE SKIRT',
+        'avg_case_weight': 19,
+        'raw_material': 'OUTSIDE SKIRT',
+        'yield': 0.85,
+        'production_cost': 1.52
+    },
+    'WF Kosher Boneless Beef Short Ribs': {
+        'short_name': 'SHORT RIB',
+        'avg_case_weight': 13,
+        'raw_material': '2PC CHUCK',
+        'yield': 0.1789,
+        'production_cost': 1.51,
+        'related_yields': {
+            'Chuck Roast': 0.2734375,
+            'Grind': 0.489375
+        }
+    },
+    'WF Kosher Beef Stew': {
+        'short_name': 'STEW',
+        'avg_case_weight': 8,
+        'raw_material': '2PC CHUCK',
+        'yield': 0.489375,  # Trim portion for ground beef
+        'production_cost': 1.83
+    }
+}
+
+
+class ProductYield:
+    """Read-only yield/cost record for a single product."""
+
+    __slots__ = ('id', 'name', 'short_name', 'raw_material', 'material_id',
+                 'avg_case_weight', 'yield_', 'production_cost', 'related_yields')
+
+    def __init__(self, id, name, short_name, raw_material, material_id,
+                 avg_case_weight, yield_, production_cost, related_yields):
+        for attr, value in zip(self.__slots__, (id, name, short_name, raw_material, material_id,
+                                                avg_case_weight, yield_, production_cost,
+                                                MappingProxyType(dict(related_yields)))):
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, attr, value):
+        raise AttributeError('ProductYield records are immutable')
+
+    def __repr__(self):
+        return f"ProductYield({self.name!r}, yield={self.yield_}, raw_material={self.raw_material!r})"
+
+
+class YieldTable:
+    """Immutable, array-backed yield and cost table compiled from `products`.
+
+    Products and raw materials get integer ids in `products` order. Per-product
+    columns (`avg_case_weight`, `yields`, `production_cost`, `product_material_ids`)
+    are read-only NumPy arrays indexed by product id.
+    """
+
+    __slots__ = ('records', 'product_names', 'product_ids', 'material_names', 'material_ids',
+                 'short_names', 'avg_case_weight', 'yields', 'production_cost',
+                 'product_material_ids', '_name_index')
+
+    def __init__(self, products):
+        material_names = list(dict.fromkeys(info['raw_material'] for info in products.values()))
+        material_ids = {name: i for i, name in enumerate(material_names)}
+
+        records = tuple(
+            ProductYield(
+                i, name, info['short_name'], info['raw_material'], material_ids[info['raw_material']],
+                float(info['avg_case_weight']), float(info['yield']), float(info['production_cost']),
+                info.get('related_yields', {})
+            )
+            for i, (name, info) in enumerate(products.items())
+        )
+
+        def column(values, dtype=float):
+            array = np.array(values, dtype=dtype)
+            array.flags.writeable = False
+            return array
+
+        set_ = object.__setattr__
+        set_(self, 'records', records)
+        set_(self, 'product_names', tuple(products))
+        set_(self, 'product_ids', MappingProxyType({r.name: r.id for r in records}))
+        set_(self, 'material_names', tuple(material_names))
+        set_(self, 'material_ids', MappingProxyType(material_ids))
+        set_(self, 'short_names', column([r.short_name for r in records], dtype=object))
+        set_(self, 'avg_case_weight', column([r.avg_case_weight for r in records]))
+        set_(self, 'yields', column([r.yield_ for r in records]))
+        set_(self, 'production_cost', column([r.production_cost for r in records]))
+        set_(self, 'product_material_ids', column([r.material_id for r in records], dtype=np.intp))
+        set_(self, '_name_index', pd.Index(self.product_names))
+
+    def __setattr__(self, attr, value):
+        raise AttributeError('YieldTable is immutable')
+
+    def __getitem__(self, product_name):
+        return self.records[self.product_ids[product_name]]
+
+    def lookup_ids(self, product_names):
+        """Vectorized product name -> id lookup; raises KeyError for unknown names."""
+        names = pd.Index(product_names)
+        ids = self._name_index.get_indexer(names)
+        if (ids < 0).any():
+            unknown = sorted(set(names[ids < 0]))
+            raise KeyError(f"Unknown product(s): {', '.join(map(str, unknown))}")
+        return ids
+
+
+# Compiled once at import; all pages read yields and costs from here
+YIELDS = YieldTable(products)
+
+
+def calculate_order_requirements(product_names, quantity_cases):
+    """Compute cases -> lbs -> raw material -> cost for a batch of line items.
+
+    `product_names` and `quantity_cases` are parallel array-likes (one entry per
+    line item). Returns a DataFrame with one row per line item, in input order.
+    """
+    product_ids = YIELDS.lookup_ids(product_names)
+    return calculate_requirements_by_id(product_ids, quantity_cases)
+
+
+def calculate_requirements_by_id(product_ids, quantity_cases):
+    """Same as `calculate_order_requirements` but keyed by `YIELDS` product ids."""
+    product_ids = np.asarray(product_ids, dtype=np.intp)
+    cases = np.asarray(quantity_cases, dtype=float)
+
+    quantity_lbs = cases * YIELDS.avg_case_weight[product_ids]
+    raw_material = quantity_lbs / YIELDS.yields[product_ids]
+    cost = raw_material * YIELDS.production_cost[product_ids]
+    material_ids = YIELDS.product_material_ids[product_ids]
+
+    return pd.DataFrame({
+        'product_name': np.asarray(YIELDS.product_names, dtype=object)[product_ids],
+        'product': YIELDS.short_names[product_ids],
+        'raw_material_name': np.asarray(YIELDS.material_names, dtype=object)[material_ids],
+        'order_quantity_cases': cases,
+        'order_quantity_lbs': quantity_lbs,
+        'raw_material': raw_material,
+        'cost': cost
+    })
+
@@ -0,0 +1,94 @@
+"""Chart feeds for the dashboard's Altair charts.
+
+Altair embeds every row of a chart's data in the page as JSON, so charts are
+given pre-aggregated frames with only the columns they encode, and long series
+are thinned with Largest-Triangle-Three-Buckets (LTTB) to a point budget.
+"""
+import numpy as np
+import pandas as pd
+
+# Most rows any one chart is given; split evenly between its series
+MAX_CHART_ROWS = 1500
+
+# Series shorter than this are never downsampled
+MIN_SERIES_POINTS = 3
+
+
+def lttb_indices(x, y, threshold):
+    """Positions of the `threshold` points LTTB keeps from the series (x, y).
+
+    `x` must be increasing. The first and last points are always kept; every
+    bucket in between keeps the point forming the largest triangle with the
+    previously kept point and the next bucket's average, which preserves
+    peaks and dips that plain striding would drop.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < MIN_SERIES_POINTS:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=int)
+    kept[0] = a = 0
+    for i in range(threshold - 2):
+        avg_start = int(np.floor((i + 1) * every)) + 1
+        avg_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        start = int(np.floor(i * every)) + 1
+        end = int(np.floor((i + 1) * every)) + 1
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        kept[i + 1] = a
+    kept[-1] = n - 1
+    return kept
+
+
+def downsample(df, x, y, max_rows=MAX_CHART_ROWS, group=None):
+    """Rows of `df` thinned with LTTB so the result has at most about `max_rows`.
+
+    With `group`, each series gets an equal share of the budget. Rows without
+    a `y` value are dropped; kept rows are returned unchanged, so tooltips
+    still show real records.
+    """
+    df = df[df[y].notna()]
+    if len(df) <= max_rows:
+        return df
+    groups = [df] if group is None else [rows for _, rows in df.groupby(group, sort=False)]
+    budget = max(max_rows // len(groups), MIN_SERIES_POINTS)
+    sampled = []
+    for rows in groups:
+        rows = rows.sort_values(x, kind='mergesort')
+        sampled.append(rows.iloc[lttb_indices(rows[x].to_numpy(), rows[y].to_numpy(), budget)])
+    return pd.concat(sampled)
+
+
+def yield_trend_data(po_product, max_rows=MAX_CHART_ROWS):
+    """Yield trend chart rows from production_metrics (PO, product) rows in PO order.
+
+    Adds `po_position` (the PO's place in PO order) so each product's series
+    can be downsampled, and keeps only the encoded columns.
+    """
+    columns = ['po_number', 'product', 'avg_yield', 'input_quantity', 'output_quantity']
+    trend = po_product[columns].copy()
+    trend['po_position'] = pd.factorize(trend['po_number'])[0]
+    return downsample(trend, 'po_position', 'avg_yield', max_rows, group='product').sort_values(
+        ['po_position', 'product'], kind='mergesort'
+    )
+
+
+def inventory_usage_data(inventory):
+    """Long-form current quantity vs quantity used per material for the bar chart."""
+    chart_data = inventory[['material', 'current_quantity', 'quantity_used_in_production']].melt(
+        id_vars='material', var_name='Metric', value_name='Quantity'
+    )
+    chart_data['Metric'] = chart_data['Metric'].map({
+        'current_quantity': 'Current Inventory',
+        'quantity_used_in_production': 'Used in Production'
+    })
+    return chart_data
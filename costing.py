@@ -0,0 +1,201 @@
+"""Point-in-time FIFO and moving weighted-average costing of production runs.
+
+Mirrors the production_costs() and weekly_production_costs() SQL functions
+(production_costs.sql): purchases
+and production are merged per material in date order, purchases on a date are
+on hand for production that day, and production beyond the recorded purchases
+is priced at the latest purchase price so far.
+"""
+import numpy as np
+import pandas as pd
+
+from db import MAX_ROWS, read_cache
+
+METHODS = ('fifo', 'average')
+
+COLUMNS = ['production_id', 'material', 'produced_on', 'input_quantity', 'cost_per_lb', 'total_cost']
+
+WEEKLY_COLUMNS = ['material', 'week', 'run_count', 'uncosted_runs', 'input_quantity', 'costed_quantity', 'total_cost']
+
+
+def _material_keys(values):
+    return values.fillna('').astype(str).str.strip().str.upper()
+
+
+def _purchase_events(purchases):
+    purchases = purchases.copy()
+    if 'transaction_type' in purchases:
+        purchases = purchases[purchases['transaction_type'] == 'purchase']
+    purchases['material'] = _material_keys(purchases['material'])
+    purchases['day'] = pd.to_datetime(purchases['purchase_date']).dt.normalize()
+    purchases['at'] = pd.to_datetime(purchases['created_at'], utc=True) if 'created_at' in purchases else pd.NaT
+    sort_by = ['material', 'day', 'at'] + (['id'] if 'id' in purchases else [])
+    return purchases.sort_values(sort_by, kind='mergesort')
+
+
+def _production_events(production):
+    production = production.copy()
+    source = production['material_key'] if 'material_key' in production else production['input_material']
+    production['material'] = _material_keys(source)
+    production['at'] = pd.to_datetime(production['created_at'], utc=True)
+    production['day'] = production['at'].dt.tz_convert(None).dt.normalize()
+    sort_by = ['material', 'day', 'at'] + (['id'] if 'id' in production else [])
+    return production.sort_values(sort_by, kind='mergesort')
+
+
+def _fifo_costs(purchase_qty, purchase_price, purchased_by, consumed):
+    """Cost of each production run under FIFO for a single material.
+
+    `purchased_by[k]` is the quantity purchased on or before run k's date and
+    `consumed[k]` the run's input. The FIFO position after run k is
+    min(position + consumed, purchased_by), which unrolls to a running minimum,
+    and the cost between two positions is read off the cumulative cost curve.
+    """
+    cum_qty = np.concatenate(([0.0], np.cumsum(purchase_qty)))
+    cum_cost = np.concatenate(([0.0], np.cumsum(purchase_qty * purchase_price)))
+    total_consumed = np.cumsum(consumed)
+    position = total_consumed + np.minimum(np.minimum.accumulate(purchased_by - total_consumed), 0)
+    previous = np.concatenate(([0.0], position[:-1]))
+    layered_cost = np.interp(position, cum_qty, cum_cost) - np.interp(previous, cum_qty, cum_cost)
+    return layered_cost, consumed - (position - previous)
+
+
+def _average_costs(purchase_qty, purchase_price, consumed_before):
+    """Moving weighted-average cost after each purchase for a single material.
+
+    `consumed_before[k]` is the production input between purchase k-1 and k.
+    Stock on hand never drops below zero, as in the SQL function.
+    """
+    averages = np.empty(len(purchase_qty))
+    on_hand = 0.0
+    average = 0.0
+    for k, (qty, price, used) in enumerate(zip(purchase_qty, purchase_price, consumed_before)):
+        on_hand = max(on_hand - used, 0.0)
+        average = (on_hand * average + qty * price) / (on_hand + qty) if on_hand + qty > 0 else price
+        on_hand += qty
+        averages[k] = average
+    return averages
+
+
+def production_costs(purchases, production, method='fifo'):
+    """Price each production run from the stock on hand on its date.
+
+    `purchases` needs material, quantity, price_per_lb and purchase_date
+    (transaction_type, created_at and id are used when present); `production`
+    needs input_material or material_key, input_quantity and created_at.
+    Returns one row per production run with the production_costs() columns.
+    """
+    if method not in METHODS:
+        raise ValueError(f'Unknown costing method {method!r}, expected one of {METHODS}')
+    purchases = _purchase_events(purchases)
+    production = _production_events(production)
+
+    results = []
+    purchase_groups = dict(tuple(purchases.groupby('material', sort=False)))
+    for material, runs in production.groupby('material', sort=False):
+        consumed = runs['input_quantity'].to_numpy(dtype=float)
+        run_days = runs['day'].to_numpy()
+        bought = purchase_groups.get(material, purchases.iloc[0:0])
+        qty = bought['quantity'].to_numpy(dtype=float)
+        price = bought['price_per_lb'].to_numpy(dtype=float)
+        purchase_days = bought['day'].to_numpy()
+
+        # Purchases on or before each run's date, and the latest of them
+        available = np.searchsorted(purchase_days, run_days, side='right')
+        last = available - 1
+        last_price = np.where(last >= 0, price[np.maximum(last, 0)] if len(price) else np.nan, np.nan)
+
+        if method == 'fifo':
+            purchased_by = np.concatenate(([0.0], np.cumsum(qty)))[available]
+            layered_cost, shortfall = _fifo_costs(qty, price, purchased_by, consumed)
+            shortfall_cost = np.where(shortfall > 0, shortfall * last_price, 0.0)
+            total_cost = layered_cost + shortfall_cost
+        else:
+            # Production input between consecutive purchases (runs on a purchase's date come after it)
+            runs_before = np.searchsorted(run_days, purchase_days, side='left')
+            consumed_to = np.concatenate(([0.0], np.cumsum(consumed)))[runs_before]
+            averages = _average_costs(qty, price, np.diff(consumed_to, prepend=0.0))
+            average = np.where(last >= 0, averages[np.maximum(last, 0)] if len(averages) else np.nan, np.nan)
+            total_cost = consumed * average
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cost_per_lb = np.where(consumed != 0, total_cost / consumed, np.nan)
+        results.append(pd.DataFrame({
+            'production_id': runs['id'].to_numpy() if 'id' in runs else runs.index.to_numpy(),
+            'material': material,
+            'produced_on': runs['day'].dt.date.to_numpy(),
+            'input_quantity': consumed,
+            'cost_per_lb': cost_per_lb,
+            'total_cost': total_cost
+        }))
+
+    if not results:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(results, ignore_index=True)
+
+
+def weekly_costs(costs):
+    """weekly_production_costs() rows computed from production_costs() rows.
+
+    Weeks start Monday. total_cost is NaN for a week in which no run of the
+    material could be costed.
+    """
+    costed = costs['total_cost'].notna()
+    produced_on = pd.to_datetime(costs['produced_on'])
+    input_quantity = pd.to_numeric(costs['input_quantity']).astype(float)
+    rows = pd.DataFrame({
+        'material': costs['material'],
+        'week': (produced_on - pd.to_timedelta(produced_on.dt.weekday, unit='D')).dt.date,
+        'run_count': 1,
+        'uncosted_runs': (~costed).astype(int),
+        'input_quantity': input_quantity,
+        'costed_quantity': input_quantity.where(costed, 0.0),
+        'total_cost': pd.to_numeric(costs['total_cost']).astype(float)
+    })
+    weekly = rows.groupby(['material', 'week'], as_index=False).sum()
+    weekly['total_cost'] = weekly['total_cost'].where(weekly['uncosted_runs'] < weekly['run_count'])
+    return weekly[WEEKLY_COLUMNS]
+
+
+def fetch_weekly_costs(client, method='fifo', page_size=MAX_ROWS):
+    """weekly_production_costs() rows from Supabase as a DataFrame.
+
+    Read one cached page of `page_size` rows at a time until a page comes
+    back short, so the result isn't cut off at PostgREST's max-rows.
+    """
+    if method not in METHODS:
+        raise ValueError(f'Unknown costing method {method!r}, expected one of {METHODS}')
+
+    def fetch_page(offset):
+        def fetch():
+            params = {'p_method': method, 'p_limit': page_size, 'p_offset': offset}
+            response = client.rpc('weekly_production_costs', params).execute()
+            return response.data if hasattr(response, 'data') else []
+        return read_cache.get_or_fetch('weekly_production_costs', (method, page_size, offset), fetch)
+
+    rows = []
+    offset = 0
+    while True:
+        chunk = fetch_page(offset)
+        rows.extend(chunk)
+        if len(chunk) < page_size:
+            break
+        offset += page_size
+    weekly = pd.DataFrame(rows, columns=WEEKLY_COLUMNS)
+    weekly['week'] = pd.to_datetime(weekly['week'])
+    return weekly
+
+
+def cost_by_material(weekly):
+    """Input pounds, material cost and average cost per lb for each material.
+
+    `weekly` holds weekly_production_costs() rows. Runs that could not be
+    costed count towards input_quantity but not cost_per_lb.
+    """
+    summary = weekly.groupby('material').agg(
+        input_quantity=('input_quantity', 'sum'),
+        costed_quantity=('costed_quantity', 'sum'),
+        total_cost=('total_cost', 'sum')
+    )
+    summary['cost_per_lb'] = summary['total_cost'] / summary['costed_quantity'].replace(0, np.nan)
+    return summary.drop(columns='costed_quantity').reset_index()
@@ -0,0 +1,212 @@
+"""Bulk import of purchase and production history from the sheet CSV exports.
+
+Usage:
+    python csv_import.py purchases "Inventory Purchases Upload - Sheet1.csv"
+    python csv_import.py production "WF Production Upload  - Sheet1.csv" --dry-run
+
+Supabase credentials come from SUPABASE_URL / SUPABASE_KEY or, failing that,
+.streamlit/secrets.toml.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from dateutil import parser
+
+from calculations import YIELDS
+from db import insert_rows
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_BATCH_SIZE = 500
+
+# Spellings used in the sheets -> inventory material names
+material_aliases = {
+    '2PC': '2PC CHUCK',
+    '2PC CHUCK + BRISKET': '2PC CHUCK',
+    'BRISKET POINT': 'BRISKET',
+    'PLATE SHORT RIBS': 'SHORT RIB',
+    'SHORT RIBS': 'SHORT RIB'
+}
+
+# Spellings used in the sheets -> product short names in the yield table
+product_aliases = {
+    'BRISKET FLAT': 'BRISKET',
+    'STEW BEEF': 'STEW',
+    'ROAST': 'CHUCK ROAST',
+    'BNLS SHORT RIBS': 'SHORT RIB'
+}
+
+_product_by_short_name = {record.short_name: record.name for record in YIELDS.records}
+
+# CSV column -> table column for each record type
+column_maps = {
+    'purchases': {
+        'Material': 'material',
+        'Quantity': 'quantity',
+        'Cost': 'cost',
+        'Date': 'purchase_date',
+        'Transaction Type': 'transaction_type',
+        'Price per LB': 'price_per_lb',
+        'Invoice #': 'invoice_number'
+    },
+    'production': {
+        'PO Number': 'po_number',
+        'Product': 'product',
+        'Input Material': 'input_material',
+        'Input Quantity (lbs)': 'input_quantity',
+        'Output Quantity (lbs)': 'output_quantity'
+    }
+}
+
+tables = {
+    'purchases': 'inventory_purchases',
+    'production': 'production'
+}
+
+
+def _clean_names(values):
+    return values.fillna('').str.strip().str.replace(r'\s+', ' ', regex=True).str.upper()
+
+
+def normalize_materials(values):
+    """'Brisket ' -> 'BRISKET', '2PC' -> '2PC CHUCK', etc. (vectorized)."""
+    names = _clean_names(values)
+    return names.replace(material_aliases)
+
+
+def normalize_products(values):
+    """Sheet product names -> full product names; unknown names are kept, trimmed."""
+    short_names = _clean_names(values).replace(product_aliases)
+    return short_names.map(_product_by_short_name).fillna(values.fillna('').str.strip())
+
+
+def _to_number(values):
+    return pd.to_numeric(values.str.replace(',', '', regex=False), errors='coerce')
+
+
+def _to_iso_dates(values):
+    # The sheets mix 9/26/24 and 1/20/2025; parse each distinct value once
+    parsed = {value: parser.parse(value).date().isoformat() for value in values.dropna().unique()}
+    return values.map(parsed)
+
+
+def prepare_chunk(kind, chunk):
+    """Rename and normalize one CSV chunk into rows for the target table."""
+    frame = chunk.rename(columns=lambda c: c.strip()).rename(columns=column_maps[kind])
+    missing = set(column_maps[kind].values()) - set(frame.columns)
+    if missing:
+        raise ValueError(f"CSV is missing columns for {kind}: {', '.join(sorted(missing))}")
+    frame = frame[list(column_maps[kind].values())]
+
+    if kind == 'purchases':
+        frame['material'] = normalize_materials(frame['material'])
+        frame['quantity'] = _to_number(frame['quantity'])
+        frame['cost'] = _to_number(frame['cost']).round(2)
+        frame['price_per_lb'] = _to_number(frame['price_per_lb']).round(4)
+        frame['purchase_date'] = _to_iso_dates(frame['purchase_date'])
+        frame['transaction_type'] = frame['transaction_type'].fillna('purchase').str.strip().str.lower()
+        frame['invoice_number'] = frame['invoice_number'].fillna('').str.strip()
+    else:
+        frame['po_number'] = frame['po_number'].fillna('').str.strip()
+        frame['product'] = normalize_products(frame['product'])
+        frame['input_material'] = normalize_materials(frame['input_material'])
+        frame['input_quantity'] = _to_number(frame['input_quantity'])
+        frame['output_quantity'] = _to_number(frame['output_quantity'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frame['yield'] = np.where(
+                frame['input_quantity'] > 0, frame['output_quantity'] / frame['input_quantity'], np.nan
+            )
+    # NaN isn't valid JSON; send nulls instead
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+class ImportResult:
+    __slots__ = ('rows_read', 'rows_inserted', 'batches', 'errors')
+
+    def __init__(self):
+        self.rows_read = 0
+        self.rows_inserted = 0
+        self.batches = 0
+        # (first_row, last_row, message) per failed batch; rows are 1-based data rows
+        self.errors = []
+
+
+def import_csv(client, kind, source, chunk_size=DEFAULT_CHUNK_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+               dry_run=False, on_batch=None):
+    """Stream `source` (path or file object) in chunks and insert in multi-row batches.
+
+    A failing batch is recorded in the result and the import carries on with
+    the next one. `on_batch(result)` is called after every batch. With
+    `dry_run` nothing is sent, and rows_inserted counts the rows that would be.
+    """
+    result = ImportResult()
+    table = tables[kind]
+    for chunk in pd.read_csv(source, dtype=str, chunksize=chunk_size, skip_blank_lines=True):
+        rows = prepare_chunk(kind, chunk)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            first_row = result.rows_read + start + 1
+            try:
+                if not dry_run:
+                    insert_rows(client, table, batch)
+                result.rows_inserted += len(batch)
+            except Exception as e:
+                result.errors.append((first_row, first_row + len(batch) - 1, str(e)))
+            result.batches += 1
+            if on_batch:
+                on_batch(result)
+        result.rows_read += len(rows)
+    return result
+
+
+def _load_credentials():
+    url = os.environ.get('SUPABASE_URL')
+    key = os.environ.get('SUPABASE_KEY')
+    if url and key:
+        return url, key
+    secrets_path = os.path.join('.streamlit', 'secrets.toml')
+    if os.path.exists(secrets_path):
+        import tomllib
+        with open(secrets_path, 'rb') as f:
+            secrets = tomllib.load(f)
+        return secrets.get('SUPABASE_URL'), secrets.get('SUPABASE_KEY')
+    return None, None
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Bulk import purchase or production CSVs into Supabase.')
+    arg_parser.add_argument('kind', choices=sorted(tables))
+    arg_parser.add_argument('path')
+    arg_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    arg_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    arg_parser.add_argument('--dry-run', action='store_true', help='parse and normalize without inserting')
+    args = arg_parser.parse_args(argv)
+
+    client = None
+    if not args.dry_run:
+        url, key = _load_credentials()
+        if not url or not key:
+            arg_parser.error('SUPABASE_URL and SUPABASE_KEY must be set (or present in .streamlit/secrets.toml)')
+        from supabase import create_client
+        client = create_client(url, key)
+
+    done = 'validated' if args.dry_run else 'inserted'
+
+    def report(result):
+        print(f'batch {result.batches}: {result.rows_inserted} rows {done}', file=sys.stderr)
+
+    result = import_csv(client, args.kind, args.path, args.chunk_size, args.batch_size, args.dry_run, report)
+    for first_row, last_row, message in result.errors:
+        print(f'rows {first_row}-{last_row} failed: {message}', file=sys.stderr)
+    if args.dry_run:
+        print(f'{result.rows_inserted} of {result.rows_read} rows validated for {tables[args.kind]} '
+              f'(dry run, nothing inserted)')
+    else:
+        print(f'{result.rows_inserted} of {result.rows_read} rows imported into {tables[args.kind]}')
+    return 1 if result.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
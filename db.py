@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Tables the app can't run without; probed by check_connection()
+required_tables = ('inventory', 'orders', 'production')
+
+# Most rows PostgREST returns for one request (its default max-rows)
+MAX_ROWS = 1000
+
+# Views and the tables they are computed from. Writing to a table also
+# invalidates every cached read of a view that depends on it.
+view_dependencies = {
+    'inventory_with_usage': ('inventory', 'inventory_purchases', 'production'),
+    'inventory_summary': ('inventory', 'inventory_purchases', 'production'),
+    'current_inventory': ('inventory', 'inventory_purchases'),
+    'production_history': ('production', 'inventory_purchases'),
+    'monthly_purchases': ('inventory_purchases',),
+    'production_costs': ('production', 'inventory_purchases'),
+    'weekly_production_costs': ('production', 'inventory_purchases'),
+    'production_metrics': ('production',),
+    'order_board_orders': ('orders', 'order_line_items', 'order_material_requirements'),
+    'material_requirements_by_status': ('orders', 'order_material_requirements'),
+    'open_material_demand': ('orders', 'order_material_requirements'),
+    'open_order_requirements': ('orders', 'order_material_requirements'),
+}
+
+
+class ReadCache:
+    """Process-wide TTL + LRU cache for Supabase select results.
+
+    Entries are keyed by (table, query) and hold the response rows. Streamlit
+    reruns and concurrent sessions share one instance, so identical reads
+    within `ttl` seconds hit the database once.
+
+    Each table has a generation that `invalidate()` and `clear()` bump. A
+    fetch that overlaps an invalidation of its table returns its rows but
+    doesn't store them, so rows read before a write are never cached after it.
+    """
+
+    def __init__(self, ttl=30.0, maxsize=128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, ttl=None, maxsize=None):
+        with self._lock:
+            if ttl is not None:
+                self.ttl = float(ttl)
+            if maxsize is not None:
+                self.maxsize = int(maxsize)
+                self._evict()
+
+    def get_or_fetch(self, table, query_key, fetch):
+        key = (table, query_key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = (self._epoch, self._generations.get(table, 0))
+
+        rows = fetch()
+
+        with self._lock:
+            current = (self._epoch, self._generations.get(table, 0))
+            if current == generation and self.ttl > 0 and self.maxsize > 0:
+                self._entries[key] = (time.monotonic() + self.ttl, rows)
+                self._entries.move_to_end(key)
+                self._evict()
+        return rows
+
+    def invalidate(self, *tables):
+        """Drop cached reads of `tables` and of any view built on them."""
+        affected = set(tables)
+        for view, sources in view_dependencies.items():
+            if affected.intersection(sources):
+                affected.add(view)
+        with self._lock:
+            for table in affected:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            for key in [key for key in self._entries if key[0] in affected]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+read_cache = ReadCache()
+
+
+def cached_select(client, table, columns='*', order=None, desc=False, limit=None, offset=0, filters=()):
+    """Run `select(columns)` on `table` through the shared read cache.
+
+    `order` is a column name or a tuple of names; `desc` applies to the first
+    and the rest break ties in ascending order. `limit`/`offset` are pushed
+    down as a range. `filters` is a tuple of (method, column, value) applied
+    to the query in order, e.g. (('eq', 'status', 'pending'),). Returns the
+    list of rows.
+    """
+    filters = tuple(
+        (method, column, tuple(value) if isinstance(value, list) else value)
+        for method, column, value in filters
+    )
+    if isinstance(order, str):
+        order = (order,)
+    query_key = (columns, order, desc, limit, offset, filters)
+
+    def fetch():
+        query = client.table(table).select(columns)
+        for method, column, value in filters:
+            query = getattr(query, method)(column, list(value) if isinstance(value, tuple) else value)
+        for position, column in enumerate(order or ()):
+            query = query.order(column, desc=desc and position == 0)
+        if limit is not None:
+            query = query.range(offset, offset + limit - 1)
+        response = query.execute()
+        return response.data if hasattr(response, 'data') else []
+
+    return read_cache.get_or_fetch(table, query_key, fetch)
+
+
+def fetch_pages(client, table, pages, page_size, columns='*', order=None, desc=False, filters=()):
+    """Load the first `pages` pages of an ordered query, one cached range each.
+
+    Returns (rows, has_more). Loading one more page only fetches that page;
+    earlier pages come from the read cache.
+    """
+    rows = []
+    for page in range(pages):
+        chunk = cached_select(
+            client, table, columns, order=order, desc=desc,
+            limit=page_size, offset=page * page_size, filters=filters
+        )
+        rows.extend(chunk)
+        if len(chunk) < page_size:
+            return rows, False
+    return rows, True
+
+
+def fetch_all(client, table, columns='*', order=None, desc=False, filters=(), page_size=MAX_ROWS):
+    """Every row of an ordered query, read one cached range of `page_size` at a time.
+
+    PostgREST cuts an unranged select off at max-rows, so tables that can
+    outgrow it are read in pages until one comes back short. `order` must be
+    unique per row, or rows can repeat or go missing between pages.
+    """
+    rows = []
+    offset = 0
+    while True:
+        chunk = cached_select(
+            client, table, columns, order=order, desc=desc,
+            limit=page_size, offset=offset, filters=filters
+        )
+        rows.extend(chunk)
+        if len(chunk) < page_size:
+            return rows
+        offset += page_size
+
+
+def insert_rows(client, table, data):
+    """Insert one row (dict) or many (list of dicts) and invalidate cached reads."""
+    try:
+        return client.table(table).insert(data).execute()
+    finally:
+        read_cache.invalidate(table)
+
+
+def call_rpc(client, function, params, writes=()):
+    """Call a database function and invalidate cached reads of the tables it `writes`."""
+    try:
+        return client.rpc(function, params).execute()
+    finally:
+        read_cache.invalidate(*writes)
+
+
+def check_connection(client, tables=required_tables):
+    """Select one row from each of `tables` and return the total round trip in ms.
+
+    Raises whatever the client raises if a table is missing or the database
+    can't be reached.
+    """
+    start = time.perf_counter()
+    for table in tables:
+        client.table(table).select('id').limit(1).execute()
+    return (time.perf_counter() - start) * 1000
@@ -0,0 +1,63 @@
+"""Raw material demand of open orders netted against live inventory.
+
+open_material_demand (material_demand.sql) sums order_material_requirements
+for pending and in-production orders per material and delivery week; these
+functions net those sums against inventory_with_usage.current_quantity.
+"""
+import numpy as np
+import pandas as pd
+
+from db import cached_select
+
+DEMAND_COLUMNS = ['material', 'delivery_week', 'quantity_lbs', 'order_count']
+
+
+def fetch_open_demand(client):
+    """open_material_demand rows as a DataFrame, through the shared read cache."""
+    rows = cached_select(client, 'open_material_demand', order=('delivery_week', 'material'))
+    demand = pd.DataFrame(rows, columns=DEMAND_COLUMNS)
+    demand['delivery_week'] = pd.to_datetime(demand['delivery_week'])
+    demand['quantity_lbs'] = pd.to_numeric(demand['quantity_lbs']).astype(float)
+    return demand
+
+
+def on_hand(inventory):
+    """Current raw lbs per material from inventory_with_usage rows (a DataFrame)."""
+    if inventory is None or inventory.empty:
+        return pd.Series(dtype=float)
+    return pd.to_numeric(inventory.set_index('material')['current_quantity']).astype(float)
+
+
+def material_shortfall(demand, inventory):
+    """Per material: on hand, open order demand, what's left and the shortfall."""
+    stock = on_hand(inventory)
+    totals = demand.groupby('material').agg(open_demand=('quantity_lbs', 'sum'), order_count=('order_count', 'sum'))
+    summary = totals.join(stock.rename('on_hand'), how='outer')
+    summary = summary.fillna({'open_demand': 0.0, 'order_count': 0, 'on_hand': 0.0})
+    summary['order_count'] = summary['order_count'].astype(int)
+    summary['available'] = summary['on_hand'] - summary['open_demand']
+    summary['shortfall'] = (-summary['available']).clip(lower=0)
+    return summary.rename_axis('material').reset_index()
+
+
+def weekly_shortfall(demand, inventory):
+    """Per material and delivery week: demand, projected stock and new shortfall.
+
+    Stock is drawn down by each week's demand in delivery order (unscheduled
+    orders last). `shortfall` is the cumulative amount short by the end of the
+    week and `new_shortfall` the part of it that week adds.
+    """
+    weeks = demand.sort_values(['material', 'delivery_week'], na_position='last', kind='mergesort')
+    weeks = weeks.reset_index(drop=True)
+    stock = on_hand(inventory).reindex(weeks['material']).fillna(0).to_numpy()
+    cumulative = weeks.groupby('material')['quantity_lbs'].cumsum().to_numpy()
+    weeks['projected'] = stock - cumulative
+    weeks['shortfall'] = np.maximum(-weeks['projected'], 0)
+    weeks['new_shortfall'] = weeks['shortfall'] - weeks.groupby('material')['shortfall'].shift(fill_value=0.0)
+    return weeks
+
+
+def available_for(materials, demand, inventory):
+    """{material: raw lbs on hand after open orders (never below 0)} for `materials`."""
+    available = material_shortfall(demand, inventory).set_index('material')['available']
+    return {material: max(float(available.get(material, 0.0)), 0.0) for material in materials}
@@ -0,0 +1,36 @@
+"""Column formats for st.dataframe.
+
+Tables keep their numeric and date dtypes and Streamlit formats them in the
+browser, so there is no per-cell string formatting in Python and columns
+still sort by value.
+"""
+import streamlit as st
+
+
+def pounds(label):
+    return st.column_config.NumberColumn(label, format='localized')
+
+
+def dollars(label):
+    return st.column_config.NumberColumn(label, format='dollar')
+
+
+def price_per_lb(label):
+    # Four decimals, as stored in inventory_purchases.price_per_lb
+    return st.column_config.NumberColumn(label, format='$%.4f')
+
+
+def percent(label):
+    return st.column_config.NumberColumn(label, format='percent')
+
+
+def count(label):
+    return st.column_config.NumberColumn(label, format='%d')
+
+
+def day(label):
+    return st.column_config.DateColumn(label, format='YYYY-MM-DD')
+
+
+def timestamp(label):
+    return st.column_config.DatetimeColumn(label, format='YYYY-MM-DD HH:mm')
@@ -0,0 +1,247 @@
+-- Incrementally maintained replacement for the inventory_with_usage view.
+-- Run after material_key_indexes.sql and update_views.sql.
+--
+-- inventory_summary holds one row per material. Triggers on inventory,
+-- inventory_purchases and production keep it current as rows are written,
+-- so the dashboard reads a handful of rows instead of re-aggregating all of
+-- production and inventory_purchases on every page load.
+--
+-- Maintenance:
+--   select rebuild_inventory_summary();        -- recompute every row from history
+--   select * from verify_inventory_summary();  -- list rows that drifted (expect none)
+
+-- Create summary table if it doesn't exist
+create table if not exists inventory_summary (
+    material text primary key references inventory(material),
+    current_quantity numeric not null default 0,
+    last_updated timestamp with time zone,
+    quantity_used_in_production numeric not null default 0,
+    total_purchased numeric not null default 0,
+    last_purchase_price numeric(10,4),
+    last_purchase_date date
+);
+
+-- Full-history computation, used to rebuild and verify the summary
+drop view if exists inventory_with_usage_live;
+create view inventory_with_usage_live as
+select
+    i.material,
+    i.quantity as current_quantity,
+    i.last_updated,
+    coalesce(p.total_used_in_production, 0) as quantity_used_in_production,
+    coalesce(ip.total_purchased, 0) as total_purchased,
+    latest_purchase.price_per_lb as last_purchase_price,
+    latest_purchase.purchase_date as last_purchase_date
+from inventory i
+left join (
+    select
+        material_key,
+        sum(input_quantity) as total_used_in_production
+    from production
+    group by material_key
+) p on p.material_key = i.material
+left join (
+    select
+        material,
+        sum(quantity) as total_purchased
+    from inventory_purchases
+    group by material
+) ip on ip.material = i.material
+left join lateral (
+    select price_per_lb, purchase_date
+    from inventory_purchases
+    where material = i.material
+    order by purchase_date desc, created_at desc
+    limit 1
+) latest_purchase on true;
+
+-- Recompute a single material from history (used for updates and deletes)
+create or replace function refresh_inventory_summary(p_material text)
+returns void as $$
+begin
+    insert into inventory_summary as s (
+        material, current_quantity, last_updated, quantity_used_in_production,
+        total_purchased, last_purchase_price, last_purchase_date
+    )
+    select material, current_quantity, last_updated, quantity_used_in_production,
+           total_purchased, last_purchase_price, last_purchase_date
+    from inventory_with_usage_live
+    where material = p_material
+    on conflict (material) do update set
+        current_quantity = excluded.current_quantity,
+        last_updated = excluded.last_updated,
+        quantity_used_in_production = excluded.quantity_used_in_production,
+        total_purchased = excluded.total_purchased,
+        last_purchase_price = excluded.last_purchase_price,
+        last_purchase_date = excluded.last_purchase_date;
+end;
+$$ language plpgsql;
+
+-- Recompute every material from history
+create or replace function rebuild_inventory_summary()
+returns integer as $$
+declare
+    rebuilt integer;
+begin
+    lock table inventory_summary in exclusive mode;
+    delete from inventory_summary;
+    insert into inventory_summary (
+        material, current_quantity, last_updated, quantity_used_in_production,
+        total_purchased, last_purchase_price, last_purchase_date
+    )
+    select material, current_quantity, last_updated, quantity_used_in_production,
+           total_purchased, last_purchase_price, last_purchase_date
+    from inventory_with_usage_live;
+    get diagnostics rebuilt = row_count;
+    return rebuilt;
+end;
+$$ language plpgsql;
+
+-- Rows where the maintained summary disagrees with a full recomputation
+create or replace function verify_inventory_summary()
+returns table (
+    material text,
+    column_name text,
+    summary_value text,
+    expected_value text
+) as $$
+    select coalesce(s.material, l.material), c.column_name, c.summary_value, c.expected_value
+    from inventory_summary s
+    full join inventory_with_usage_live l on l.material = s.material
+    cross join lateral (values
+        ('current_quantity', s.current_quantity is distinct from l.current_quantity,
+            s.current_quantity::text, l.current_quantity::text),
+        ('quantity_used_in_production', s.quantity_used_in_production is distinct from l.quantity_used_in_production,
+            s.quantity_used_in_production::text, l.quantity_used_in_production::text),
+        ('total_purchased', s.total_purchased is distinct from l.total_purchased,
+            s.total_purchased::text, l.total_purchased::text),
+        ('last_purchase_price', s.last_purchase_price is distinct from l.last_purchase_price,
+            s.last_purchase_price::text, l.last_purchase_price::text),
+        ('last_purchase_date', s.last_purchase_date is distinct from l.last_purchase_date,
+            s.last_purchase_date::text, l.last_purchase_date::text)
+    ) as c(column_name, differs, summary_value, expected_value)
+    where c.differs;
+$$ language sql stable;
+
+-- Keep current quantity in step with the inventory table
+create or replace function summary_after_inventory_change()
+returns trigger as $$
+begin
+    insert into inventory_summary as s (material, current_quantity, last_updated)
+    values (NEW.material, NEW.quantity, NEW.last_updated)
+    on conflict (material) do update set
+        current_quantity = excluded.current_quantity,
+        last_updated = excluded.last_updated;
+    return NEW;
+end;
+$$ language plpgsql;
+
+-- Add each statement's new purchases to the running totals, once per material
+create or replace function summary_after_purchase_insert()
+returns trigger as $$
+begin
+    insert into inventory_summary as s (material, total_purchased, last_purchase_price, last_purchase_date)
+    select distinct on (material)
+        material,
+        sum(quantity) over (partition by material),
+        price_per_lb,
+        purchase_date
+    from new_purchases
+    order by material, purchase_date desc, created_at desc
+    on conflict (material) do update set
+        total_purchased = s.total_purchased + excluded.total_purchased,
+        last_purchase_price = case
+            when s.last_purchase_date is null or excluded.last_purchase_date >= s.last_purchase_date
+            then excluded.last_purchase_price else s.last_purchase_price end,
+        last_purchase_date = greatest(s.last_purchase_date, excluded.last_purchase_date);
+    return null;
+end;
+$$ language plpgsql;
+
+-- Add each statement's production runs to the usage totals
+create or replace function summary_after_production_insert()
+returns trigger as $$
+begin
+    update inventory_summary s
+    set quantity_used_in_production = s.quantity_used_in_production + used.quantity
+    from (
+        select material_key, sum(input_quantity) as quantity
+        from new_production
+        group by material_key
+    ) used
+    where s.material = used.material_key;
+    return null;
+end;
+$$ language plpgsql;
+
+-- Edits and deletes are rare; recompute just the affected materials
+create or replace function summary_after_history_change()
+returns trigger as $$
+begin
+    if TG_TABLE_NAME = 'production' then
+        if TG_OP in ('UPDATE', 'DELETE') then
+            perform refresh_inventory_summary(OLD.material_key);
+        end if;
+        if TG_OP = 'UPDATE' and NEW.material_key <> OLD.material_key then
+            perform refresh_inventory_summary(NEW.material_key);
+        end if;
+    else
+        if TG_OP in ('UPDATE', 'DELETE') then
+            perform refresh_inventory_summary(OLD.material);
+        end if;
+        if TG_OP = 'UPDATE' and NEW.material <> OLD.material then
+            perform refresh_inventory_summary(NEW.material);
+        end if;
+    end if;
+    return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists summary_after_inventory_change on inventory;
+drop trigger if exists summary_after_purchase_insert on inventory_purchases;
+drop trigger if exists summary_after_purchase_change on inventory_purchases;
+drop trigger if exists summary_after_production_insert on production;
+drop trigger if exists summary_after_production_change on production;
+
+create trigger summary_after_inventory_change
+    after insert or update of quantity, last_updated on inventory
+    for each row
+    execute function summary_after_inventory_change();
+
+create trigger summary_after_purchase_insert
+    after insert on inventory_purchases
+    referencing new table as new_purchases
+    for each statement
+    execute function summary_after_purchase_insert();
+
+create trigger summary_after_purchase_change
+    after update or delete on inventory_purchases
+    for each row
+    execute function summary_after_history_change();
+
+create trigger summary_after_production_insert
+    after insert on production
+    referencing new table as new_production
+    for each statement
+    execute function summary_after_production_insert();
+
+create trigger summary_after_production_change
+    after update or delete on production
+    for each row
+    execute function summary_after_history_change();
+
+-- Dashboard reads go through the same view name as before
+drop view if exists inventory_with_usage;
+create view inventory_with_usage as
+select
+    material,
+    current_quantity,
+    last_updated,
+    quantity_used_in_production,
+    total_purchased,
+    last_purchase_price,
+    last_purchase_date
+from inventory_summary;
+
+-- Populate from existing history
+select rebuild_inventory_summary();
@@ -0,0 +1,320 @@
+"""Invoice text extraction (PDF text layer, then Tesseract OCR) and parsing.
+
+app.py imports this module only once an invoice is uploaded. The imaging stack
+(pytesseract, PIL, pdf2image) is imported inside the OCR functions, so cached
+results and PDFs with a text layer never load it.
+
+Each vendor's layout is an InvoiceFormat added with register_format(); the
+vendor is detected from the text. benchmarks/invoice_corpus.py checks and
+times every format against a corpus of invoice texts.
+"""
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PyPDF2 import PdfReader
+
+# Default Homebrew Poppler location; falls back to PATH when it doesn't exist
+POPPLER_PATH = os.environ.get('POPPLER_PATH', '/opt/homebrew/Cellar/poppler/25.02.0/bin')
+OCR_DPI = 300
+
+# Pages whose embedded text has fewer non-whitespace characters than this are
+# treated as scanned images and sent to OCR
+MIN_TEXT_LAYER_CHARS = 25
+
+
+def _fragment_pattern(fragments):
+    """One regex matching any of `fragments`, with shared prefixes factored out.
+
+    A flat alternation tries every fragment at every position; as a prefix
+    trie each position only follows the branch for its next character, so
+    matching costs about the same however many fragments there are. Where
+    several fragments start at the same place the longest wins.
+    """
+    trie = {}
+    for fragment in fragments:
+        node = trie
+        for char in fragment:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+class InvoiceFormat:
+    """One vendor's invoice layout, with every pattern compiled once.
+
+    `detect` matches text only this vendor's invoices contain, case-sensitive
+    so the regex engine can skip ahead to its literal prefix; it is combined
+    with the other vendors' into one pattern, so it must not set global
+    inline flags (scoped ones like (?i:...) are fine) or name groups. `date`
+    and `invoice_number` capture those fields in group 1, and `line_items`
+    captures (description, quantity, price_per_lb, total) per line.
+    `product_mapping` maps description fragments to materials.
+    """
+
+    def __init__(self, name, detect, date, invoice_number, line_items, product_mapping):
+        self.name = name
+        self.detect = detect
+        self.patterns = {'date': date, 'invoice_number': invoice_number, 'line_items': line_items}
+        self.product_mapping = {fragment.lower(): material for fragment, material in product_mapping.items()}
+        self._date = re.compile(date)
+        self._invoice_number = re.compile(invoice_number)
+        self._line_items = re.compile(line_items)
+        self._materials = re.compile(_fragment_pattern(self.product_mapping) or '(?!)', re.IGNORECASE)
+
+    def settings(self):
+        return {'name': self.name, 'detect': self.detect, 'patterns': self.patterns,
+                'product_mapping': self.product_mapping}
+
+    def match_material(self, description):
+        """Material for the first mapped fragment in `description`, or None."""
+        match = self._materials.search(description)
+        return self.product_mapping[match.group(0).lower()] if match else None
+
+    def parse(self, text):
+        """Extract invoice date, number and purchase line items from invoice text."""
+        extracted_info = {
+            'vendor': self.name,
+            'date': None,
+            'invoice_number': None,
+            'line_items': []
+        }
+
+        date_match = self._date.search(text)
+        if date_match:
+            extracted_info['date'] = date_match.group(1)
+
+        invoice_match = self._invoice_number.search(text)
+        if invoice_match:
+            extracted_info['invoice_number'] = invoice_match.group(1)
+
+        for match in self._line_items.finditer(text):
+            product_desc, quantity, price_per_lb, total = match.groups()
+            standardized_product = self.match_material(product_desc)
+            if standardized_product:
+                extracted_info['line_items'].append({
+                    'product': standardized_product,
+                    'quantity': float(quantity.replace(',', '')),
+                    'price_per_lb': float(price_per_lb),
+                    'total': float(total.replace(',', ''))
+                })
+
+        return extracted_info
+
+
+# Registered vendor formats, and one pattern that detects any of them
+invoice_formats = []
+_detector = None
+
+
+def register_format(invoice_format):
+    """Add a vendor format to detection and to the OCR cache settings."""
+    global _detector
+    invoice_formats.append(invoice_format)
+    _detector = re.compile(
+        '|'.join(f'(?P<format_{i}>{f.detect})' for i, f in enumerate(invoice_formats)), re.MULTILINE
+    )
+    return invoice_format
+
+
+def detect_format(text):
+    """The format whose `detect` pattern matches earliest in `text`, or None."""
+    match = _detector.search(text) if _detector is not None else None
+    return invoice_formats[int(match.lastgroup.split('_')[1])] if match else None
+
+
+# Supplier invoices priced per pound: "<line> <qty> <description> <lbs> LB <price> <total>"
+LB_INVOICE = register_format(InvoiceFormat(
+    'lb_invoice',
+    detect=r'Invoice Date:\s*\d{2}/\d{2}/\d{4}',
+    date=r'(?i)Invoice Date:\s*(\d{2}/\d{2}/\d{4})',
+    invoice_number=r'(?i)Invoice\s*\n(\d+)',
+    line_items=r'(?im)^\d+\s+\d+\s+(.*?)\s+([0-9,]+\.\d+)\s+LB\s+([0-9.]+)\s+([0-9,]+\.\d+)$',
+    product_mapping={
+        'chuck 2pc bnls': '2PC CHUCK',
+        'chuck 2pc': '2PC CHUCK',
+        'outside skirt': 'OUTSIDE SKIRT',
+        'brisket': 'BRISKET',
+        'ribeye': 'RIBEYE'
+    }
+))
+
+# Parses pages that no format detects, e.g. continuation pages without a header
+DEFAULT_FORMAT = LB_INVOICE
+
+_pool = None
+
+
+def ocr_settings():
+    """Everything besides the PDF bytes that affects OCR/parse output."""
+    return {
+        'dpi': OCR_DPI,
+        'min_text_layer_chars': MIN_TEXT_LAYER_CHARS,
+        'formats': [invoice_format.settings() for invoice_format in invoice_formats]
+    }
+
+
+def poppler_path():
+    return POPPLER_PATH if os.path.isdir(POPPLER_PATH) else None
+
+
+def tesseract_cmd():
+    import pytesseract
+    return pytesseract.pytesseract.tesseract_cmd
+
+
+def tesseract_version():
+    output = subprocess.check_output([tesseract_cmd(), '--version']).decode()
+    return output.split()[1]
+
+
+def poppler_diagnostics():
+    """Homebrew Poppler install details for error reports."""
+    brew_prefix = subprocess.check_output(['/opt/homebrew/bin/brew', '--prefix']).decode().strip()
+    return f"""
+    Homebrew prefix: {brew_prefix}
+    Poppler installation:
+    {subprocess.check_output(['ls', '-l', f'{brew_prefix}/bin/pdftoppm']).decode()}
+    
+    PATH environment:
+    {os.environ.get('PATH', 'PATH not set')}
+    """
+
+
+def count_pages(pdf_path):
+    from pdf2image import pdfinfo_from_path
+    return pdfinfo_from_path(pdf_path, poppler_path=poppler_path())['Pages']
+
+
+def ocr_page(pdf_path, page_number, dpi=OCR_DPI):
+    """Render a single page (1-based) and OCR it; the image is dropped right after."""
+    import pytesseract
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(
+        pdf_path,
+        poppler_path=poppler_path(),
+        dpi=dpi,
+        fmt='jpeg',
+        first_page=page_number,
+        last_page=page_number
+    )
+    text = pytesseract.image_to_string(images[0]) if images else ''
+    return page_number, text
+
+
+def _get_pool():
+    # One pool per process, reused across uploads and Streamlit reruns
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _pool
+
+
+def iter_ocr_pages(pdf_path, dpi=OCR_DPI, pages=None):
+    """OCR `pages` (1-based; default every page) of `pdf_path` across a process pool.
+
+    Yields (page_number, text) as pages finish, which may be out of order.
+    Each worker renders only its own page, so memory stays at roughly one
+    page image per core regardless of the page count.
+    """
+    if pages is None:
+        pages = range(1, count_pages(pdf_path) + 1)
+    pages = list(pages)
+    if len(pages) == 1:
+        yield ocr_page(pdf_path, pages[0], dpi)
+        return
+    pool = _get_pool()
+    futures = [pool.submit(ocr_page, pdf_path, page, dpi) for page in pages]
+    for future in as_completed(futures):
+        yield future.result()
+
+
+def extract_text_layer(pdf_path):
+    """Embedded text of each page, in page order ('' where a page has none)."""
+    texts = []
+    for page in PdfReader(pdf_path).pages:
+        try:
+            texts.append(page.extract_text() or '')
+        except Exception:
+            texts.append('')
+    return texts
+
+
+def needs_ocr(page_text):
+    return len(''.join(page_text.split())) < MIN_TEXT_LAYER_CHARS
+
+
+def iter_invoice_pages(pdf_path, dpi=OCR_DPI, text_layer=None):
+    """Yield (page_number, text, method) for every page of `pdf_path`.
+
+    Pages with a usable embedded text layer are returned directly
+    (method 'text'); only the rest are rendered and OCRed (method 'ocr').
+    """
+    if text_layer is None:
+        text_layer = extract_text_layer(pdf_path)
+    ocr_pages = []
+    for page_number, page_text in enumerate(text_layer, start=1):
+        if needs_ocr(page_text):
+            ocr_pages.append(page_number)
+        else:
+            yield page_number, page_text, 'text'
+    if ocr_pages:
+        for page_number, page_text in iter_ocr_pages(pdf_path, dpi, ocr_pages):
+            yield page_number, page_text, 'ocr'
+
+
+def parse_invoice_text(text, invoice_format=None):
+    """Parse invoice text with `invoice_format`, or the format detected in it.
+
+    Text no registered format detects is parsed as DEFAULT_FORMAT.
+    """
+    invoice_format = invoice_format or detect_format(text) or DEFAULT_FORMAT
+    return invoice_format.parse(text)
+
+
+def parse_invoice_pages(pages, text_layer=()):
+    """Parse (page_number, text, method) tuples from iter_invoice_pages() as they arrive.
+
+    The vendor is detected once from the whole `text_layer`, so continuation
+    pages parse with it; scanned invoices detect it from the first page one
+    matches. Yields (page_number, text, method, extracted_info), where
+    extracted_info merges every page parsed so far.
+    """
+    invoice_format = detect_format('\n'.join(text_layer))
+    page_results = {}
+    for page_number, page_text, method in pages:
+        if invoice_format is None:
+            invoice_format = detect_format(page_text)
+        page_results[page_number] = parse_invoice_text(page_text, invoice_format or DEFAULT_FORMAT)
+        yield page_number, page_text, method, merge_page_results(page_results)
+
+
+def merge_page_results(page_results):
+    """Combine per-page parse results ({page_number: extracted_info}) in page order."""
+    merged = {
+        'vendor': None,
+        'date': None,
+        'invoice_number': None,
+        'line_items': []
+    }
+    for page_number in sorted(page_results):
+        info = page_results[page_number]
+        merged['vendor'] = merged['vendor'] or info.get('vendor')
+        merged['date'] = merged['date'] or info['date']
+        merged['invoice_number'] = merged['invoice_number'] or info['invoice_number']
+        merged['line_items'].extend(info['line_items'])
+    return merged
+
+
+def join_page_texts(page_texts):
+    return ''.join(f"\n--- Page {page} ---\n{page_texts[page]}" for page in sorted(page_texts))
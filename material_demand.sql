@@ -0,0 +1,33 @@
+-- Raw material demand of open orders, per material and delivery week, and
+-- per order for the Material Planning projection (mrp.py).
+-- Run after order_line_items.sql.
+--
+-- The Calculator nets the weekly sums against inventory_with_usage, so it
+-- reads one row per material and week instead of every open order.
+
+-- Open orders are few compared with all orders; index just those
+create index if not exists orders_open_delivery_idx
+    on orders (id, delivery_date) where status in ('pending', 'in_production');
+
+create or replace view open_material_demand as
+select
+    r.material,
+    date_trunc('week', o.delivery_date)::date as delivery_week,  -- Monday; null when unscheduled
+    sum(r.quantity_lbs) as quantity_lbs,
+    count(*) as order_count
+from order_material_requirements r
+join orders o on o.id = r.order_id
+where o.status in ('pending', 'in_production')
+group by r.material, date_trunc('week', o.delivery_date);
+
+-- One row per open order and material, for projecting stock by delivery date
+create or replace view open_order_requirements as
+select
+    o.id as order_id,
+    o.po_number,
+    r.material,
+    o.delivery_date,
+    r.quantity_lbs
+from order_material_requirements r
+join orders o on o.id = r.order_id
+where o.status in ('pending', 'in_production');
@@ -0,0 +1,27 @@
+-- Normalized material keys and supporting indexes for the cost-lookup views.
+-- Run after upload_production_data.sql and before update_views.sql.
+--
+-- production.input_material holds whatever was typed ('Brisket ', '2pc chuck'),
+-- so the views had to join on upper(input_material), which no index covers.
+-- material_key stores the normalized value once, and the composite index on
+-- inventory_purchases lets "latest purchase of this material" read a single
+-- index entry instead of sorting every purchase of the material per row.
+
+-- Stored, normalized material key on production
+alter table production
+    add column if not exists material_key text
+    generated always as (upper(trim(input_material))) stored;
+
+create index if not exists idx_production_material_key
+    on production(material_key, created_at);
+
+-- Latest-purchase lookups: filter by material, newest first
+create index if not exists idx_inventory_purchases_material_date
+    on inventory_purchases(material, purchase_date desc, created_at desc)
+    include (price_per_lb);
+
+-- Superseded by the composite index above
+drop index if exists idx_inventory_purchases_material;
+
+analyze production;
+analyze inventory_purchases;
@@ -0,0 +1,177 @@
+"""Time-phased raw material projection (MRP) by delivery date.
+
+Stock on hand is projected forward one bucket (day or week) at a time: each
+bucket adds purchases scheduled to arrive in it and subtracts the raw
+material that open orders need for delivery in it. The projection for every
+material is one cumulative sum over a (materials x buckets) matrix.
+
+Requirements come from open_order_requirements (material_demand.sql), one row
+per open order and material. Scheduled receipts are inventory_purchases rows
+of transaction_type 'purchase' dated after today; the inventory triggers count
+a purchase as on hand as soon as it is inserted, so those are taken back out
+of current stock and added in the bucket they arrive in instead.
+"""
+import numpy as np
+import pandas as pd
+
+from db import fetch_all
+from demand import on_hand
+
+# Bucket sizes offered on the planning page, in days
+BUCKET_DAYS = {'Daily': 1, 'Weekly': 7}
+
+REQUIREMENT_COLUMNS = ['order_id', 'po_number', 'material', 'delivery_date', 'quantity_lbs']
+RECEIPT_COLUMNS = ['material', 'quantity', 'purchase_date']
+
+
+def fetch_open_requirements(client):
+    """open_order_requirements rows, read in pages through the shared read cache."""
+    return fetch_all(client, 'open_order_requirements', order=('delivery_date', 'order_id', 'material'))
+
+
+def fetch_scheduled_receipts(client, today):
+    """inventory_purchases purchases (material, quantity, purchase_date) dated after `today`."""
+    return fetch_all(
+        client, 'inventory_purchases', columns=', '.join(RECEIPT_COLUMNS), order=('purchase_date', 'id'),
+        filters=(('eq', 'transaction_type', 'purchase'), ('gt', 'purchase_date', today.isoformat()))
+    )
+
+
+class MrpProjection:
+    """Projected raw lbs on hand per material and bucket.
+
+    Bucket 0 starts on `start` (the Monday of its week for weekly buckets)
+    and the projection runs `horizon_days` forward. Requirements that are past
+    due or have no delivery date land in bucket 0, since they are owed now;
+    requirements and receipts after the horizon are left out.
+
+    Each order's requirements are kept, so update_order() can replace one
+    order by shifting the projection of just the materials and buckets it
+    touches instead of recomputing every cumulative sum.
+    """
+
+    def __init__(self, on_hand, requirements, receipts, start, bucket_days=1, horizon_days=56):
+        # on_hand: raw lbs Series by material; requirements/receipts: frames of
+        # REQUIREMENT_COLUMNS / RECEIPT_COLUMNS
+        start = pd.Timestamp(start).normalize()
+        if bucket_days == 7:
+            start -= pd.Timedelta(days=start.dayofweek)
+        self.bucket_days = bucket_days
+        self.dates = pd.date_range(start, periods=-(-horizon_days // bucket_days), freq=f'{bucket_days}D')
+
+        materials = pd.Index(sorted(set(on_hand.index) | set(requirements['material']) | set(receipts['material'])))
+        self.materials = list(materials)
+        self._material_ids = {material: i for i, material in enumerate(self.materials)}
+        shape = (len(self.materials), len(self.dates))
+
+        self.receipts = np.zeros(shape)
+        receipt_rows = self._buckets(receipts['purchase_date'], past_due=False)
+        keep = receipt_rows >= 0
+        np.add.at(
+            self.receipts,
+            (materials.get_indexer(receipts['material'])[keep], receipt_rows[keep]),
+            pd.to_numeric(receipts['quantity']).to_numpy(float)[keep]
+        )
+
+        self.demand = np.zeros(shape)
+        self._orders = {}
+        buckets = self._buckets(requirements['delivery_date'])
+        material_ids = materials.get_indexer(requirements['material'])
+        quantities = pd.to_numeric(requirements['quantity_lbs']).to_numpy(float)
+        keep = buckets >= 0
+        np.add.at(self.demand, (material_ids[keep], buckets[keep]), quantities[keep])
+        for order_id, rows in pd.Series(np.arange(len(requirements)))[keep].groupby(requirements['order_id'][keep].to_numpy()):
+            rows = rows.to_numpy()
+            self._orders[order_id] = (material_ids[rows], buckets[rows], quantities[rows])
+
+        self.on_hand = on_hand.reindex(self.materials, fill_value=0.0).to_numpy(float)
+        self.projected = self.on_hand[:, None] + np.cumsum(self.receipts - self.demand, axis=1)
+        self._first_negative = self._first_negative_buckets(self.projected)
+
+    @classmethod
+    def from_rows(cls, inventory_rows, requirement_rows, receipt_rows, today, bucket_days=1, horizon_days=56):
+        """Projection from inventory_with_usage rows and the fetch_* rows above."""
+        requirements = pd.DataFrame(requirement_rows, columns=REQUIREMENT_COLUMNS)
+        receipts = pd.DataFrame(receipt_rows, columns=RECEIPT_COLUMNS)
+        stock = on_hand(pd.DataFrame(inventory_rows))
+        scheduled = pd.to_numeric(receipts['quantity']).astype(float).groupby(receipts['material']).sum()
+        stock = stock.sub(scheduled, fill_value=0.0)
+        return cls(stock, requirements, receipts, today, bucket_days, horizon_days)
+
+    def _buckets(self, dates, past_due=True):
+        """Bucket index of each date; -1 beyond the horizon (or before it, unless past_due)."""
+        days = (pd.to_datetime(pd.Series(dates), errors='coerce') - self.dates[0]).dt.days
+        buckets = (days // self.bucket_days).to_numpy(float)
+        if past_due:
+            buckets = np.where(np.isnan(buckets) | (buckets < 0), 0, buckets)
+        buckets = np.where(np.isnan(buckets) | (buckets < 0) | (buckets >= len(self.dates)), -1, buckets)
+        return buckets.astype(np.intp)
+
+    @staticmethod
+    def _first_negative_buckets(projected):
+        negative = projected < -1e-9
+        return np.where(negative.any(axis=1), negative.argmax(axis=1), -1)
+
+    def _material_id(self, material):
+        if material not in self._material_ids:
+            self._material_ids[material] = len(self.materials)
+            self.materials.append(material)
+            row = np.zeros((1, len(self.dates)))
+            self.receipts = np.vstack([self.receipts, row])
+            self.demand = np.vstack([self.demand, row])
+            self.projected = np.vstack([self.projected, row])
+            self.on_hand = np.append(self.on_hand, 0.0)
+            self._first_negative = np.append(self._first_negative, -1)
+        return self._material_ids[material]
+
+    def update_order(self, order_id, requirements):
+        """Replace one order's requirements; an empty list removes the order.
+
+        `requirements` is a list of {material, delivery_date, quantity_lbs}.
+        Returns the materials whose projection changed.
+        """
+        changes = []
+        material_ids, buckets, quantities = self._orders.pop(order_id, ((), (), ()))
+        changes += zip(material_ids, buckets, quantities)
+
+        if requirements:
+            material_ids = np.array([self._material_id(r['material']) for r in requirements], dtype=np.intp)
+            buckets = self._buckets([r['delivery_date'] for r in requirements])
+            quantities = np.array([float(r['quantity_lbs']) for r in requirements])
+            keep = buckets >= 0
+            self._orders[order_id] = (material_ids[keep], buckets[keep], quantities[keep])
+            changes += zip(material_ids[keep], buckets[keep], -quantities[keep])
+
+        # Giving back (or taking) q lbs in bucket b moves every later bucket by q
+        for material_id, bucket, quantity in changes:
+            self.demand[material_id, bucket] -= quantity
+            self.projected[material_id, bucket:] += quantity
+        touched = sorted({material_id for material_id, _, _ in changes})
+        if touched:
+            self._first_negative[touched] = self._first_negative_buckets(self.projected[touched])
+        return [self.materials[m] for m in touched]
+
+    def first_shortages(self):
+        """Per material: start stock, the first bucket projected below zero and the lowest point."""
+        has_shortage = self._first_negative >= 0
+        first = np.where(has_shortage, self._first_negative, 0)
+        rows = np.arange(len(self.materials))
+        return pd.DataFrame({
+            'material': self.materials,
+            'on_hand': self.on_hand,
+            'receipts': self.receipts.sum(axis=1),
+            'demand': self.demand.sum(axis=1),
+            'first_short': pd.Series(self.dates[first]).where(has_shortage),
+            'short_by': np.where(has_shortage, -self.projected[rows, first], 0.0),
+            'lowest': self.projected.min(axis=1) if len(self.dates) else self.on_hand
+        })
+
+    def frame(self):
+        """Long format: one row per material and bucket with receipts, demand and projected lbs."""
+        return pd.DataFrame({
+            'material': np.repeat(self.materials, len(self.dates)),
+            'date': np.tile(self.dates, len(self.materials)),
+            'receipts': self.receipts.ravel(),
+            'demand': self.demand.ravel(),
+            'projected': self.projected.ravel()
+        })
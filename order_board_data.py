@@ -0,0 +1,205 @@
+import html
+
+import numpy as np
+import pandas as pd
+
+STATUSES = ['pending', 'in_production', 'completed', 'cancelled']
+CLOSED_STATUSES = ['completed', 'cancelled']
+
+# Line items shown on a card before collapsing into "and N more items"
+CARD_ITEM_LIMIT = 2
+
+
+def _fmt_lbs(values):
+    return values.astype(float).map('{:,.1f}'.format)
+
+
+def _line_item_frame(orders):
+    """One row per (order, line item) with the item fields as columns."""
+    items = orders[['id', 'line_items']].explode('line_items', ignore_index=True)
+    items = items[items['line_items'].map(lambda item: isinstance(item, dict))]
+    if items.empty:
+        return pd.DataFrame(columns=['id', 'position', 'product', 'quantity_cases', 'quantity_lbs'])
+    fields = pd.json_normalize(items['line_items'].tolist())
+    fields.index = items.index
+    fields['id'] = items['id']
+    fields['position'] = fields.groupby('id').cumcount()
+    return fields
+
+
+def _items_html(orders, items):
+    if items.empty:
+        return pd.Series('', index=orders.index)
+    lbs = items['quantity_lbs'] if 'quantity_lbs' in items else pd.Series(np.nan, index=items.index)
+    if 'quantity' in items:
+        lbs = lbs.fillna(items['quantity'])
+    cases = items['quantity_cases'] if 'quantity_cases' in items else pd.Series(0, index=items.index)
+    lines = (
+        '- ' + items['product'].fillna('').str.split().str[-1].fillna('').map(html.escape)
+        + ': ' + cases.fillna(0).astype(float).map('{:g}'.format) + ' cases ('
+        + _fmt_lbs(lbs.fillna(0)) + ' lbs)<br>'
+    )
+    shown = lines[items['position'] < CARD_ITEM_LIMIT].groupby(items['id']).sum()
+    counts = items.groupby('id').size()
+    more = (counts - CARD_ITEM_LIMIT).clip(lower=0)
+    more_html = pd.Series('', index=more.index)
+    more_html[more > 0] = '- and ' + more[more > 0].astype(str) + ' more items<br>'
+    summary = 'Items:<br>' + shown.reindex(counts.index, fill_value='') + more_html
+    return orders['id'].map(summary).fillna('')
+
+
+def _materials_html(orders):
+    """Raw material and grind sections from each order's raw_materials and total_grind_lbs."""
+    materials_html = pd.Series('', index=orders.index)
+    if 'raw_materials' in orders:
+        pairs = orders['raw_materials'].map(lambda m: list(m.items()) if isinstance(m, dict) else []).explode().dropna()
+        quantity = pairs.str[1]
+        pairs = pairs[quantity.notna()]
+        if not pairs.empty:
+            lines = '- ' + pairs.str[0].map(html.escape) + ': ' + _fmt_lbs(pairs.str[1]) + ' lbs<br>'
+            materials_html = (
+                "<hr style='margin: 5px 0;'><b>Raw Materials Needed:</b><br>" + lines.groupby(level=0).sum()
+            ).reindex(orders.index, fill_value='')
+    grind_html = pd.Series('', index=orders.index)
+    if 'total_grind_lbs' in orders:
+        grind = pd.to_numeric(orders['total_grind_lbs']).fillna(0).astype(float)
+        has_grind = grind > 0
+        if has_grind.any():
+            grind_html[has_grind] = (
+                "<hr style='margin: 5px 0;'><b>Total Grind Produced:</b> " + _fmt_lbs(grind[has_grind]) + ' lbs<br>'
+            )
+    return materials_html + grind_html
+
+
+def prepare_orders(orders, today):
+    """Parse dates, flag past-due orders and build every card's HTML in one pass."""
+    orders = orders.reset_index(drop=True).copy()
+    if 'line_items' not in orders:
+        orders['line_items'] = None
+    orders['delivery'] = pd.to_datetime(orders['delivery_date'], errors='coerce').dt.date
+    if 'po_date' not in orders:
+        orders['po_date'] = None
+    orders['po_day'] = pd.to_datetime(orders['po_date'], errors='coerce').dt.date
+    has_delivery = orders['delivery'].notna()
+    orders['past_due'] = (
+        has_delivery
+        & (orders['delivery'].where(has_delivery, today) < today)
+        & ~orders['status'].isin(CLOSED_STATUSES)
+    )
+
+    items = _line_item_frame(orders)
+    due_html = pd.Series('', index=orders.index)
+    due_html[has_delivery] = 'Due: ' + orders.loc[has_delivery, 'delivery'].astype(str) + '<br>'
+    due_html[orders['past_due']] = due_html[orders['past_due']] + "<span style='color: red;'>PAST DUE</span><br>"
+    card_class = np.where(orders['past_due'], 'kanban-card past-due', 'kanban-card')
+
+    orders['card_html'] = (
+        "<div class='" + card_class + "' id='order_" + orders['id'].astype(str) + "'>"
+        + "<div class='kanban-card-header'>PO #" + orders['po_number'].astype(str).map(html.escape) + '</div>'
+        + "<div class='kanban-card-content'>"
+        + due_html
+        + 'Cost: $' + orders['total_cost'].astype(float).map('{:,.2f}'.format) + '<br>'
+        + _items_html(orders, items)
+        + _materials_html(orders)
+        + '</div></div>'
+    )
+    return orders
+
+
+def _to_day(value):
+    day = pd.to_datetime(value, errors='coerce')
+    return pd.NaT if pd.isna(day) else day.date()
+
+
+def _number(value):
+    return np.nan if value is None else float(value)
+
+
+def prepare_order(order, today):
+    """prepare_orders() for one order dict, without the DataFrame overhead.
+
+    Returns the order with the same added fields and card HTML, for applying
+    a single change to an already prepared board.
+    """
+    order = dict(order)
+    order.setdefault('line_items', None)
+    order.setdefault('po_date', None)
+    order['delivery'] = _to_day(order.get('delivery_date'))
+    order['po_day'] = _to_day(order['po_date'])
+    has_delivery = pd.notna(order['delivery'])
+    order['past_due'] = bool(has_delivery and order['delivery'] < today and order['status'] not in CLOSED_STATUSES)
+
+    due_html = ''
+    if has_delivery:
+        due_html = f"Due: {order['delivery']}<br>"
+    if order['past_due']:
+        due_html += "<span style='color: red;'>PAST DUE</span><br>"
+
+    items = [item for item in order['line_items'] or [] if isinstance(item, dict)]
+    items_html = ''
+    if items:
+        lines = []
+        for item in items[:CARD_ITEM_LIMIT]:
+            words = str(item.get('product') or '').split()
+            lbs = _number(item.get('quantity_lbs'))
+            if np.isnan(lbs):
+                lbs = _number(item.get('quantity'))
+            cases = _number(item.get('quantity_cases'))
+            lines.append(
+                f"- {html.escape(words[-1] if words else '')}: {0.0 if np.isnan(cases) else cases:g} cases "
+                f"({0.0 if np.isnan(lbs) else lbs:,.1f} lbs)<br>"
+            )
+        items_html = 'Items:<br>' + ''.join(lines)
+        if len(items) > CARD_ITEM_LIMIT:
+            items_html += f'- and {len(items) - CARD_ITEM_LIMIT} more items<br>'
+
+    materials_html = ''
+    materials = [
+        (material, quantity) for material, quantity in (order.get('raw_materials') or {}).items()
+        if quantity is not None
+    ]
+    if materials:
+        materials_html = "<hr style='margin: 5px 0;'><b>Raw Materials Needed:</b><br>" + ''.join(
+            f'- {html.escape(material)}: {float(quantity):,.1f} lbs<br>' for material, quantity in materials
+        )
+    grind = _number(order.get('total_grind_lbs'))
+    if grind > 0:
+        materials_html += f"<hr style='margin: 5px 0;'><b>Total Grind Produced:</b> {grind:,.1f} lbs<br>"
+
+    card_class = 'kanban-card past-due' if order['past_due'] else 'kanban-card'
+    order['card_html'] = (
+        f"<div class='{card_class}' id='order_{order['id']}'>"
+        f"<div class='kanban-card-header'>PO #{html.escape(str(order['po_number']))}</div>"
+        "<div class='kanban-card-content'>"
+        f"{due_html}Cost: ${_number(order['total_cost']):,.2f}<br>{items_html}{materials_html}"
+        '</div></div>'
+    )
+    return order
+
+
+def filter_orders(orders, status_filter, search, date_filter, today):
+    """Apply the board's status, PO search and date filters to prepared orders."""
+    mask = orders['status'].isin(status_filter)
+    if search:
+        mask &= orders['po_number'].astype(str).str.contains(search, case=False, regex=False, na=False)
+
+    delivery = orders['delivery']
+    has_delivery = delivery.notna()
+    delivery = delivery.where(has_delivery, today)
+    if date_filter == 'Today':
+        mask &= has_delivery & (delivery == today)
+    elif date_filter == 'This Week':
+        week_end = today + pd.Timedelta(days=7)
+        mask &= has_delivery & (delivery >= today) & (delivery <= week_end)
+    elif date_filter == 'This Month':
+        month_end = (pd.Timestamp(today) + pd.offsets.MonthEnd(0)).date()
+        mask &= has_delivery & (delivery >= today) & (delivery <= month_end)
+    elif date_filter == 'Past Due':
+        mask &= orders['past_due']
+    return orders[mask]
+
+
+def group_by_status(orders, status_filter):
+    """{status: orders in that column} for every selected status, in filter order."""
+    groups = dict(tuple(orders.groupby('status', sort=False)))
+    return {status: groups.get(status, orders.iloc[0:0]) for status in status_filter}
@@ -0,0 +1,15 @@
+-- Publish changes to orders over Supabase Realtime for the Order Board.
+--
+-- The board keeps every order in memory (order_store.py) and applies each
+-- insert/update/delete it receives, so moving an order rebuilds one card
+-- instead of re-reading and rebuilding all of them. Deletes only need the
+-- primary key in old_record, which the default replica identity sends.
+do $$
+begin
+    if not exists (
+        select 1 from pg_publication_tables
+        where pubname = 'supabase_realtime' and schemaname = 'public' and tablename = 'orders'
+    ) then
+        alter publication supabase_realtime add table orders;
+    end if;
+end $$;
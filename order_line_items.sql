@@ -0,0 +1,165 @@
+-- Normalized order line items and raw material requirements.
+-- Run after upload_production_data.sql; safe to re-run.
+--
+-- Orders used to keep their items as a JSON array in orders.line_items, with
+-- the raw materials and grind for the whole order stashed in the first item
+-- ('_raw_materials', '_total_grind') and repeated as text in notes. Items and
+-- requirements now live in their own tables, written together by
+-- save_order(), so totals across orders are plain indexed SQL sums, e.g.
+--
+--   select quantity_lbs from material_requirements_by_status
+--   where status = 'pending' and material = '2PC CHUCK';
+--
+-- The Order Board reads orders through order_board_orders, which puts the
+-- items and requirements back on each order row. orders.line_items is kept
+-- for existing rows and no longer written; drop it once the backfill below
+-- has been checked:
+--   alter table orders drop column line_items;
+
+alter table orders add column if not exists total_grind_lbs numeric;
+alter table orders alter column line_items drop not null;
+
+create table if not exists order_line_items (
+    id uuid default uuid_generate_v4() primary key,
+    order_id uuid not null references orders(id) on delete cascade,
+    position integer not null,
+    product text not null,
+    quantity_cases numeric not null default 0,
+    quantity_lbs numeric not null default 0,
+    unique (order_id, position)
+);
+
+create table if not exists order_material_requirements (
+    order_id uuid not null references orders(id) on delete cascade,
+    material text not null,
+    quantity_lbs numeric not null,
+    primary key (order_id, material)
+);
+
+-- Per-material sums read only the index; per-status sums join through orders_status_idx
+create index if not exists order_material_requirements_material_idx
+    on order_material_requirements (material) include (quantity_lbs);
+create index if not exists order_line_items_product_idx
+    on order_line_items (product) include (quantity_cases, quantity_lbs);
+create index if not exists orders_status_idx on orders (status);
+
+-- Backfill items from the JSON array, skipping anything that isn't an object
+insert into order_line_items (order_id, position, product, quantity_cases, quantity_lbs)
+select
+    o.id,
+    item.position - 1,
+    item.value->>'product',
+    coalesce((item.value->>'quantity_cases')::numeric, 0),
+    coalesce((item.value->>'quantity_lbs')::numeric, (item.value->>'quantity')::numeric, 0)
+from orders o
+cross join lateral jsonb_array_elements(
+    case when jsonb_typeof(o.line_items::jsonb) = 'array' then o.line_items::jsonb else '[]'::jsonb end
+) with ordinality as item(value, position)
+where jsonb_typeof(item.value) = 'object'
+  and item.value->>'product' is not null
+on conflict (order_id, position) do nothing;
+
+-- Backfill requirements and grind from the metadata on the first item.
+-- Older orders keyed '_raw_materials' by product short name rather than raw
+-- material, so map short names onto the material they are cut from (as in
+-- calculations.products) and sum products that share one.
+with product_materials (short_name, material) as (
+    values ('RIBEYE', 'RIBEYE'),
+           ('BRISKET', 'BRISKET'),
+           ('CHUCK ROAST', '2PC CHUCK'),
+           ('GROUND BEEF', '2PC CHUCK'),
+           ('OUTSIDE SKIRT', 'OUTSIDE SKIRT'),
+           ('SHORT RIB', '2PC CHUCK'),
+           ('STEW', '2PC CHUCK')
+)
+insert into order_material_requirements (order_id, material, quantity_lbs)
+select o.id, coalesce(pm.material, m.key), sum(m.value::numeric)
+from orders o
+cross join lateral jsonb_each_text(
+    case when jsonb_typeof(o.line_items::jsonb->0->'_raw_materials') = 'object'
+         then o.line_items::jsonb->0->'_raw_materials' else '{}'::jsonb end
+) as m(key, value)
+left join product_materials pm on pm.short_name = upper(trim(m.key))
+where m.value is not null
+group by o.id, coalesce(pm.material, m.key)
+on conflict (order_id, material) do nothing;
+
+update orders
+set total_grind_lbs = (line_items::jsonb->0->>'_total_grind')::numeric
+where total_grind_lbs is null
+  and jsonb_typeof(line_items::jsonb->0->'_total_grind') = 'number';
+
+-- Insert an order with its items and requirements in one transaction.
+-- p_order: {po_number, po_date, delivery_date, total_cost, notes, total_grind_lbs[, status]}
+-- p_line_items: [{product, quantity_cases, quantity_lbs}, ...]
+-- p_raw_materials: {material: lbs, ...}
+create or replace function save_order(p_order jsonb, p_line_items jsonb, p_raw_materials jsonb)
+returns uuid as $$
+declare
+    v_order_id uuid;
+begin
+    insert into orders (po_number, po_date, delivery_date, status, total_cost, notes, total_grind_lbs)
+    values (
+        p_order->>'po_number',
+        (p_order->>'po_date')::date,
+        (p_order->>'delivery_date')::date,
+        coalesce(p_order->>'status', 'pending'),
+        (p_order->>'total_cost')::numeric,
+        p_order->>'notes',
+        (p_order->>'total_grind_lbs')::numeric
+    )
+    returning id into v_order_id;
+
+    insert into order_line_items (order_id, position, product, quantity_cases, quantity_lbs)
+    select v_order_id, item.position - 1, item.value->>'product',
+           (item.value->>'quantity_cases')::numeric, (item.value->>'quantity_lbs')::numeric
+    from jsonb_array_elements(p_line_items) with ordinality as item(value, position);
+
+    insert into order_material_requirements (order_id, material, quantity_lbs)
+    select v_order_id, m.key, m.value::numeric
+    from jsonb_each_text(p_raw_materials) as m(key, value)
+    where m.value::numeric > 0;
+
+    return v_order_id;
+end;
+$$ language plpgsql;
+
+-- Orders with their items (in entry order) and requirements, as the board shows them
+create or replace view order_board_orders as
+select
+    o.id,
+    o.po_number,
+    o.po_date,
+    o.delivery_date,
+    o.status,
+    o.total_cost,
+    o.notes,
+    o.total_grind_lbs,
+    coalesce(items.line_items, '[]'::json) as line_items,
+    coalesce(requirements.raw_materials, '{}'::json) as raw_materials
+from orders o
+left join lateral (
+    select json_agg(json_build_object(
+               'product', li.product,
+               'quantity_cases', li.quantity_cases,
+               'quantity_lbs', li.quantity_lbs
+           ) order by li.position) as line_items
+    from order_line_items li
+    where li.order_id = o.id
+) items on true
+left join lateral (
+    select json_object_agg(r.material, r.quantity_lbs order by r.material) as raw_materials
+    from order_material_requirements r
+    where r.order_id = o.id
+) requirements on true;
+
+-- Raw material needed by orders in each status
+create or replace view material_requirements_by_status as
+select
+    o.status,
+    r.material,
+    sum(r.quantity_lbs) as quantity_lbs,
+    count(*) as order_count
+from order_material_requirements r
+join orders o on o.id = r.order_id
+group by o.status, r.material;
@@ -0,0 +1,236 @@
+"""In-memory Order Board state kept current by a stream of order changes.
+
+The board loads every order once, builds the cards, then applies each
+insert/update/delete as it arrives, rebuilding only the card of the order
+that changed. Changes come from Supabase Realtime (SupabaseOrderFeed) or,
+offline and in benchmarks, from LocalOrderFeed.
+
+A change is a dict shaped like a Realtime postgres_changes payload:
+{'type': 'INSERT' | 'UPDATE' | 'DELETE', 'record': {...}, 'old_record': {...}}.
+Records are orders rows; the board's rows come from the order_board_orders
+view, which adds each order's line items and raw material requirements.
+"""
+import asyncio
+import threading
+
+import pandas as pd
+
+from order_board_data import prepare_order, prepare_orders
+
+# order_board_orders columns that changes to the orders table don't carry
+DETAIL_COLUMNS = ('line_items', 'raw_materials')
+
+
+class OrderStore:
+    """Prepared orders (order_board_data.prepare_orders rows) indexed by id.
+
+    Changes that arrive before the first load() are queued and replayed on
+    top of the snapshot, so a feed can be subscribed before the snapshot is
+    read without missing anything in between. Updates keep the order's line
+    items and requirements; inserts read them with `fetch_order(order_id)`,
+    which returns the order's order_board_orders rows.
+    """
+
+    def __init__(self, fetch_order=None):
+        self._fetch_order = fetch_order
+        self._lock = threading.Lock()
+        self._orders = None
+        self._today = None
+        self._source = None
+        self._pending = []
+        self.version = 0
+
+    @property
+    def loaded(self):
+        return self._orders is not None
+
+    def load(self, rows, today):
+        """Replace the store with `rows` (as selected from orders, in delivery order)."""
+        orders = prepare_orders(pd.DataFrame(rows), today) if rows else None
+        with self._lock:
+            self._orders = orders.set_index('id', drop=False) if orders is not None else pd.DataFrame()
+            self._today = today
+            self._source = rows
+            pending, self._pending = self._pending, []
+            self.version += 1
+        for change in pending:
+            self.apply(change)
+
+    def reset(self):
+        """Forget the loaded orders; changes queue again until the next load()."""
+        with self._lock:
+            self._orders = None
+            self._source = None
+            self._pending = []
+
+    def refresh(self, rows, today):
+        """load() unless `rows` is the same list the store was last loaded from."""
+        if rows is not self._source:
+            self.load(rows, today)
+
+    def apply(self, change):
+        """Apply one insert/update/delete and return the id of the order it touched.
+
+        Only fetch_order() runs outside the lock. A reset() while it runs
+        queues the change instead, like any change that arrives before load().
+        """
+        record = change.get('record') or {}
+        order_id = record.get('id', (change.get('old_record') or {}).get('id'))
+        with self._lock:
+            if self._orders is None:
+                self._pending.append(change)
+                return order_id
+            if change['type'] == 'DELETE':
+                if order_id in self._orders.index:
+                    self._orders = self._orders.drop(index=order_id)
+                    self.version += 1
+                return order_id
+            if order_id in self._orders.index or self._fetch_order is None:
+                self._write(order_id, record)
+                return order_id
+
+        rows = self._fetch_order(order_id)
+        with self._lock:
+            if self._orders is None:
+                self._pending.append(change)
+                return order_id
+            self._write(order_id, rows[0] if rows else record)
+        return order_id
+
+    def _write(self, order_id, record):
+        """Insert or overwrite one order's row; the caller holds the lock."""
+        orders = self._orders
+        known = order_id in orders.index
+        if known:
+            record = dict(record, **{c: orders.at[order_id, c] for c in DETAIL_COLUMNS if c in orders})
+        prepared = prepare_order(record, self._today)
+        if known:
+            # Overwrite the one row in place; only a new delivery date changes its position
+            moved = orders.at[order_id, 'delivery_date'] != record.get('delivery_date')
+            for column, value in prepared.items():
+                orders.at[order_id, column] = value
+            if moved:
+                self._orders = self._sorted(orders)
+        else:
+            row = pd.DataFrame([prepared]).set_index('id', drop=False)
+            self._orders = self._sorted(pd.concat([orders, row]) if not orders.empty else row)
+        self.version += 1
+
+    @staticmethod
+    def _sorted(orders):
+        return orders.sort_values('delivery_date', na_position='last', kind='mergesort')
+
+    def snapshot(self, today):
+        """Prepared orders as a DataFrame, in delivery order.
+
+        Cards are rebuilt once when the date rolls over, since past-due flags
+        depend on `today`.
+        """
+        with self._lock:
+            if self._orders is not None and self._today != today and not self._orders.empty:
+                rows = self._orders.drop(columns=['delivery', 'po_day', 'past_due', 'card_html']).to_dict('records')
+                self._orders = prepare_orders(pd.DataFrame(rows), today).set_index('id', drop=False)
+                self._today = today
+            return self._orders.reset_index(drop=True) if self._orders is not None else pd.DataFrame()
+
+
+class LocalOrderFeed:
+    """In-process change feed: publish() delivers to every subscriber synchronously."""
+
+    connected = True
+
+    def __init__(self):
+        self._callbacks = []
+
+    def subscribe(self, callback):
+        self._callbacks.append(callback)
+
+    def on_subscribed(self, callback):
+        # Always connected, so there is never a resubscribe to report
+        pass
+
+    def publish(self, change):
+        for callback in self._callbacks:
+            callback(change)
+
+    def close(self):
+        self._callbacks.clear()
+
+
+class SupabaseOrderFeed:
+    """Changes to public.orders from Supabase Realtime, on a background thread.
+
+    supabase-py's Realtime client is async-only, so it runs on its own event
+    loop in a daemon thread. `connected` is False until the channel is
+    subscribed and again if it drops, so callers can fall back to polling;
+    on_subscribed() callbacks run each time the channel (re)subscribes.
+
+    Callbacks may block (OrderStore.apply reads new orders from Supabase), so
+    they run one at a time, in arrival order, in a worker thread while the
+    loop keeps receiving.
+    """
+
+    def __init__(self, url, key, table='orders'):
+        self.url = url.rstrip('/') + '/realtime/v1'
+        self.key = key
+        self.table = table
+        self.connected = False
+        self.error = None
+        self._callbacks = []
+        self._subscribed_callbacks = []
+        self._loop = asyncio.new_event_loop()
+        self._client = None
+        self._events = None
+        self._delivery = None
+
+    def subscribe(self, callback):
+        self._callbacks.append(callback)
+
+    def on_subscribed(self, callback):
+        self._subscribed_callbacks.append(callback)
+
+    def start(self):
+        threading.Thread(target=self._loop.run_forever, name='orders-realtime', daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._connect(), self._loop)
+        return self
+
+    async def _deliver(self):
+        """Run queued (callbacks, args) events in order, each off the loop thread."""
+        while True:
+            callbacks, args = await self._events.get()
+            for callback in callbacks:
+                try:
+                    await asyncio.to_thread(callback, *args)
+                except Exception as e:
+                    self.error = e
+
+    async def _connect(self):
+        self._events = asyncio.Queue()
+        self._delivery = asyncio.create_task(self._deliver())
+
+        def on_change(payload):
+            self._events.put_nowait((self._callbacks, (payload['data'],)))
+
+        def on_status(status, error):
+            self.connected = status == 'SUBSCRIBED'
+            self.error = error
+            if self.connected:
+                self._events.put_nowait((self._subscribed_callbacks, ()))
+
+        try:
+            from realtime import AsyncRealtimeClient
+
+            self._client = AsyncRealtimeClient(self.url, self.key)
+            await self._client.connect()
+            channel = self._client.channel(f'board-{self.table}')
+            await channel.on_postgres_changes('*', schema='public', table=self.table, callback=on_change).subscribe(on_status)
+        except Exception as e:
+            self.connected = False
+            self.error = e
+
+    def close(self):
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop)
+        if self._delivery is not None:
+            self._loop.call_soon_threadsafe(self._delivery.cancel)
+        self._loop.call_soon_threadsafe(self._loop.stop)
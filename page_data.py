@@ -0,0 +1,188 @@
+"""Data steps behind each page, without any Streamlit calls.
+
+app.py renders what these return, and benchmarks/run.py times the same
+functions, so the benchmarks measure the code the pages actually run.
+"""
+from collections import namedtuple
+
+import pandas as pd
+
+from calculations import calculate_order_requirements
+from chart_data import inventory_usage_data, yield_trend_data
+from costing import cost_by_material, fetch_weekly_costs
+from db import cached_select, fetch_pages
+from demand import DEMAND_COLUMNS, available_for, fetch_open_demand, material_shortfall, weekly_shortfall
+from mrp import fetch_open_requirements, fetch_scheduled_receipts
+from order_board_data import filter_orders, group_by_status
+from planner import plan_production
+from production_metrics import fetch_production_metrics, metrics_for, totals
+
+# Co-products produced beyond what was ordered by less than this many lbs aren't listed
+SURPLUS_MIN_LBS = 0.05
+
+OrderSummary = namedtuple('OrderSummary', [
+    'results', 'plan', 'raw_materials', 'raw_material_costs', 'total_cost', 'total_grind', 'surplus'
+])
+
+
+def order_summary(product_names, quantity_cases):
+    """Order Planning: per-line requirements and the joint production plan.
+
+    Raw materials, their cost and the order total come from the plan, which
+    counts co-products toward other line items; `results` keeps the
+    standalone requirement of each line.
+    """
+    plan = plan_production(product_names, quantity_cases)
+    return OrderSummary(
+        results=calculate_order_requirements(product_names, quantity_cases),
+        plan=plan,
+        raw_materials=plan.purchase_by_material(),
+        raw_material_costs=plan.purchase_cost_by_material(),
+        total_cost=plan.total_cost,
+        total_grind=plan.produced_lbs('GROUND BEEF'),
+        surplus=plan.products[plan.products['surplus_lbs'] > SURPLUS_MIN_LBS]
+    )
+
+
+def inventory_position(client):
+    """Calculator: live inventory, open order demand and the shortfalls they leave.
+
+    Returns (inventory, open_demand, shortfall, weekly, error). When open order
+    demand can't be read, `error` is the exception and demand counts as none.
+    """
+    inventory = pd.DataFrame(cached_select(client, 'inventory_with_usage'))
+    error = None
+    try:
+        open_demand = fetch_open_demand(client)
+    except Exception as e:
+        open_demand = pd.DataFrame(columns=DEMAND_COLUMNS)
+        error = e
+    shortfall = material_shortfall(open_demand, inventory)
+    by_week = weekly_shortfall(open_demand, inventory) if not open_demand.empty else None
+    return inventory, open_demand, shortfall, by_week, error
+
+
+def order_purchases(ordered, open_demand, inventory):
+    """Calculator: raw material `ordered` ({product: cases}) needs beyond what open orders leave.
+
+    All products are planned jointly so co-products count toward each other.
+    Only materials that need a new order are returned.
+    """
+    raw_materials_needed = {}
+    if ordered:
+        plan = plan_production(list(ordered), list(ordered.values()))
+        raw_materials_needed = plan.purchase_by_material()
+    available = available_for(raw_materials_needed, open_demand, inventory)
+    results = pd.DataFrame({
+        'Raw Material': list(raw_materials_needed),
+        'Total Required (lbs)': list(raw_materials_needed.values()),
+        'Available (lbs)': [available[material] for material in raw_materials_needed]
+    })
+    results['New Order Needed (lbs)'] = (results['Total Required (lbs)'] - results['Available (lbs)']).clip(lower=0)
+    return results[results['New Order Needed (lbs)'] > 0]
+
+
+def inventory_overview(client):
+    """Dashboard inventory tab: inventory rows ready to show and the usage chart data.
+
+    Dates are parsed and current_value added. Returns (inventory, chart_data);
+    both are None when there is no inventory.
+    """
+    rows = cached_select(client, 'inventory_with_usage')
+    if not rows:
+        return None, None
+    inventory = pd.DataFrame(rows)
+    inventory = inventory.assign(
+        current_value=inventory['current_quantity'] * inventory['last_purchase_price'],
+        last_updated=pd.to_datetime(inventory['last_updated']),
+        last_purchase_date=pd.to_datetime(inventory['last_purchase_date'])
+    )
+    return inventory, inventory_usage_data(inventory)
+
+
+def recent_purchases(client, pages, page_size):
+    """Dashboard: the newest `pages` pages of purchases, as (DataFrame, has_more)."""
+    rows, more = fetch_pages(
+        client, 'inventory_purchases',
+        pages=pages,
+        page_size=page_size,
+        columns='id, purchase_date, material, quantity, price_per_lb, cost, invoice_number',
+        order=('purchase_date', 'id'),
+        desc=True,
+        filters=(('eq', 'transaction_type', 'purchase'),)
+    )
+    purchases = pd.DataFrame(rows)
+    if not purchases.empty:
+        purchases['purchase_date'] = pd.to_datetime(purchases['purchase_date'])
+    return purchases, more
+
+
+def production_overview(client):
+    """Dashboard production tab: totals, the yield trend and yield by product and material.
+
+    Returns (overall, trend, by_dimension), or None when nothing has been produced.
+    """
+    metrics = fetch_production_metrics(client)
+    if metrics is None or totals(metrics)['run_count'] <= 0:
+        return None
+    by_dimension = {dimension: metrics_for(metrics, dimension) for dimension in ('product', 'material')}
+    return totals(metrics), yield_trend_data(metrics_for(metrics, 'po_product')), by_dimension
+
+
+def material_costs(client, method):
+    """Dashboard: production costs by `method`, as (costs, cost_summary, weekly_costs).
+
+    `costs` holds the weekly_production_costs() rows; weekly_costs is the part
+    of them the chart draws. cost_summary and weekly_costs are None when
+    there are no costs.
+    """
+    costs = fetch_weekly_costs(client, method)
+    if costs.empty:
+        return costs, None, None
+    weekly_costs = costs.loc[costs['total_cost'].notna(), ['week', 'material', 'total_cost']]
+    return costs, cost_by_material(costs), weekly_costs
+
+
+def recent_production(client, pages, page_size):
+    """Dashboard: the most recent `pages` pages of production runs, as (DataFrame, has_more)."""
+    rows, more = fetch_pages(
+        client, 'production',
+        pages=pages,
+        page_size=page_size,
+        columns='id, po_number, product, input_material, input_quantity, output_quantity, yield',
+        order=('created_at', 'id'),
+        desc=True
+    )
+    return pd.DataFrame(rows), more
+
+
+def fetch_board_orders(client):
+    """order_board_orders rows in delivery order, through the shared read cache."""
+    return cached_select(client, 'order_board_orders', order='delivery_date')
+
+
+def board_columns(orders, status_filter, search, date_filter, today):
+    """Order Board: filtered orders split into one DataFrame per shown status."""
+    return group_by_status(filter_orders(orders, status_filter, search, date_filter, today), status_filter)
+
+
+def fetch_planning_rows(client, today):
+    """Material Planning: (inventory_with_usage, open requirement, scheduled receipt) rows."""
+    return (
+        cached_select(client, 'inventory_with_usage'),
+        fetch_open_requirements(client),
+        fetch_scheduled_receipts(client, today)
+    )
+
+
+def scaled_requirements(requirements, order_id, delivery_date, percent):
+    """One order's requirements moved to `delivery_date` and scaled to `percent`.
+
+    `requirements` is a frame of mrp.REQUIREMENT_COLUMNS; the result is the
+    list MrpProjection.update_order() takes.
+    """
+    order_requirements = requirements[requirements['order_id'] == order_id]
+    return [
+        {'material': material, 'delivery_date': delivery_date, 'quantity_lbs': float(quantity) * percent / 100}
+        for material, quantity in zip(order_requirements['material'], order_requirements['quantity_lbs'])
+    ]
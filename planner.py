@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from scipy.optimize import linprog
+
+from calculations import YIELDS
+
+# related_yields keys that don't match a product short name
+coproduct_aliases = {
+    'Grind': 'GROUND BEEF'
+}
+
+
+def _build_processes(table):
+    """One cutting process per product in the yield table, in product id order.
+
+    Each process consumes 1 lb of a raw material and produces every product it
+    yields (the main cut plus its related_yields co-products) at once, and
+    costs the production_cost per raw lb of the product it is run for.
+    Products that list each other as co-products (chuck roast / short rib)
+    describe the same breakdown, but each keeps its own process so it is
+    priced at its own cost.
+    """
+    short_name_ids = {name: i for i, name in enumerate(table.short_names)}
+    rows = []
+    for record in table.records:
+        row = np.zeros(len(table.records))
+        row[record.id] = record.yield_
+        for coproduct, coproduct_yield in record.related_yields.items():
+            short_name = coproduct_aliases.get(coproduct, coproduct.upper())
+            row[short_name_ids[short_name]] = coproduct_yield
+        rows.append(row)
+    process_yields = np.array(rows)
+    process_yields.flags.writeable = False
+    return process_yields, table.product_material_ids, table.production_cost
+
+
+# (process x product) yield matrix, the raw material each process consumes and
+# its $ per raw lb; process i is run for product i
+PROCESS_YIELDS, PROCESS_MATERIALS, PROCESS_COSTS = _build_processes(YIELDS)
+
+
+class ProductionPlan:
+    """Result of `plan_production`."""
+
+    __slots__ = ('materials', 'products', 'process_runs', 'total_raw_material', 'independent_raw_material',
+                 'total_cost')
+
+    def __init__(self, materials, products, process_runs):
+        self.materials = materials
+        self.products = products
+        self.process_runs = process_runs
+        self.total_raw_material = float(materials['purchase_lbs'].sum())
+        self.independent_raw_material = float(materials['independent_lbs'].sum())
+        self.total_cost = float(materials['purchase_cost'].sum())
+
+    @property
+    def raw_material_saved(self):
+        return self.independent_raw_material - self.total_raw_material
+
+    def purchase_by_material(self):
+        """{material: lbs to buy} for materials the plan actually uses."""
+        purchases = self.materials.loc[self.materials['purchase_lbs'] > 0, 'purchase_lbs']
+        return purchases.to_dict()
+
+    def purchase_cost_by_material(self):
+        """{material: $ for the lbs to buy} for materials the plan actually uses."""
+        costs = self.materials.loc[self.materials['purchase_lbs'] > 0, 'purchase_cost']
+        return costs.to_dict()
+
+    def produced_lbs(self, short_name):
+        return float(self.products.loc[short_name, 'produced_lbs'])
+
+
+def product_demand_lbs(product_names, quantity_cases):
+    """Aggregate any number of line items into finished lbs per product id."""
+    product_ids = YIELDS.lookup_ids(product_names)
+    lbs = np.asarray(quantity_cases, dtype=float) * YIELDS.avg_case_weight[product_ids]
+    return np.bincount(product_ids, weights=lbs, minlength=len(YIELDS.records))
+
+
+def plan_production(product_names, quantity_cases, material_prices=None):
+    """Minimum raw-material purchase covering every ordered case at once.
+
+    Solves a small linear program over the cutting processes in
+    `PROCESS_YIELDS`: choose lbs of each process so every product's demand is
+    met, counting co-products toward other line items, while minimising total
+    raw material (or cost, when `material_prices` maps material -> $/lb).
+    Only the processes of ordered products run, so nothing is cut for a
+    product nobody ordered. Among plans that use the same raw material, the
+    cheapest is chosen, so the cost never depends on how the solver breaks a
+    tie. Purchases are priced at `material_prices` where given and otherwise
+    at the production cost per raw lb of the product each process runs for.
+    Line items are aggregated per product first, so the LP size only depends
+    on the number of products, not on the number of SKUs or POs.
+    """
+    demand = product_demand_lbs(product_names, quantity_cases)
+    return plan_for_demand(demand, material_prices)
+
+
+def _solve(objective, A_ub, b_ub, bounds):
+    result = linprog(objective, A_ub=A_ub, b_ub=b_ub, bounds=bounds, method='highs')
+    if result.status != 0:
+        raise ValueError(f'Production plan could not be solved: {result.message}')
+    return result
+
+
+def plan_for_demand(demand, material_prices=None):
+    """`plan_production` for a precomputed demand vector (lbs per product id)."""
+    demand = np.asarray(demand, dtype=float)
+    prices = np.ones(len(YIELDS.material_names))
+    priced = np.zeros(len(YIELDS.material_names), dtype=bool)
+    if material_prices:
+        for material, price in material_prices.items():
+            if material in YIELDS.material_ids and price:
+                prices[YIELDS.material_ids[material]] = price
+                priced[YIELDS.material_ids[material]] = True
+    objective = prices[PROCESS_MATERIALS]
+    process_prices = np.where(priced[PROCESS_MATERIALS], objective, PROCESS_COSTS)
+
+    runs = np.zeros(len(PROCESS_MATERIALS))
+    if demand.any():
+        # Only constrain, and only cut for, products that were actually ordered
+        needed = demand > 0
+        A_ub = -PROCESS_YIELDS.T[needed]
+        b_ub = -demand[needed]
+        bounds = [(0, None) if ordered else (0, 0) for ordered in needed]
+        result = _solve(objective, A_ub, b_ub, bounds)
+        # Then the cheapest of the plans that buy that little raw material
+        least = result.fun * (1 + 1e-9) + 1e-9
+        result = _solve(
+            process_prices, np.vstack([A_ub, objective]), np.append(b_ub, least), bounds
+        )
+        runs = result.x
+
+    produced = runs @ PROCESS_YIELDS
+    purchase = np.bincount(PROCESS_MATERIALS, weights=runs, minlength=len(YIELDS.material_names))
+    purchase_cost = np.bincount(PROCESS_MATERIALS, weights=runs * process_prices, minlength=len(YIELDS.material_names))
+    independent = np.bincount(
+        YIELDS.product_material_ids, weights=demand / YIELDS.yields, minlength=len(YIELDS.material_names)
+    )
+
+    materials = pd.DataFrame({
+        'purchase_lbs': purchase,
+        'purchase_cost': purchase_cost,
+        'independent_lbs': independent
+    }, index=pd.Index(YIELDS.material_names, name='material'))
+    products = pd.DataFrame({
+        'demand_lbs': demand,
+        'produced_lbs': produced,
+        'surplus_lbs': np.maximum(produced - demand, 0)
+    }, index=pd.Index(YIELDS.short_names, name='product'))
+    process_runs = pd.DataFrame({
+        'product': YIELDS.short_names,
+        'material': np.asarray(YIELDS.material_names, dtype=object)[PROCESS_MATERIALS],
+        'input_lbs': runs,
+        'cost': runs * process_prices
+    })
+    return ProductionPlan(materials, products, process_runs)
@@ -0,0 +1,144 @@
+-- Point-in-time material costing for production runs.
+-- Run after material_key_indexes.sql.
+--
+-- production_history prices every run at the latest purchase price, whatever
+-- the production date. production_costs() instead walks purchases and
+-- production for each material in date order, in a single sorted pass, and
+-- prices each run from the stock on hand that day:
+--
+--   select * from production_costs('fifo');         -- oldest layers consumed first
+--   select * from production_costs('average');      -- moving weighted average
+--   select * from weekly_production_costs('fifo');  -- summed per material and week
+--
+-- Only transaction_type = 'purchase' rows add stock. Purchases on a date are
+-- on hand for production that day. Production run against stock that has no
+-- recorded purchase (opening inventory) is priced at the latest purchase price
+-- so far, and left null before a material's first purchase.
+-- costing.py computes the same numbers from DataFrames.
+
+create or replace function production_costs(p_method text default 'fifo')
+returns table (
+    production_id uuid,
+    material text,
+    produced_on date,
+    input_quantity numeric,
+    cost_per_lb numeric,
+    total_cost numeric
+) as $$
+#variable_conflict use_column
+declare
+    ev record;
+    current_material text;
+    layer_qty numeric[];
+    layer_price numeric[];
+    head integer;
+    on_hand numeric;
+    avg_cost numeric;
+    last_price numeric;
+    remaining numeric;
+    take numeric;
+    cost numeric;
+begin
+    if p_method not in ('fifo', 'average') then
+        raise exception 'unknown costing method "%", expected fifo or average', p_method;
+    end if;
+
+    for ev in
+        select e.*
+        from (
+            select ip.material as mat, ip.purchase_date as day, 0 as kind,
+                   ip.created_at as at, ip.id, ip.quantity as qty, ip.price_per_lb as price
+            from inventory_purchases ip
+            where ip.transaction_type = 'purchase'
+            union all
+            select p.material_key, (p.created_at at time zone 'UTC')::date, 1,
+                   p.created_at, p.id, p.input_quantity, null
+            from production p
+        ) e
+        order by e.mat, e.day, e.kind, e.at, e.id
+    loop
+        if current_material is distinct from ev.mat then
+            current_material := ev.mat;
+            layer_qty := '{}';
+            layer_price := '{}';
+            head := 1;
+            on_hand := 0;
+            avg_cost := null;
+            last_price := null;
+        end if;
+
+        if ev.kind = 0 then
+            last_price := ev.price;
+            if p_method = 'fifo' then
+                layer_qty := layer_qty || ev.qty;
+                layer_price := layer_price || ev.price;
+            else
+                avg_cost := case
+                    when on_hand + ev.qty > 0
+                    then (on_hand * coalesce(avg_cost, 0) + ev.qty * ev.price) / (on_hand + ev.qty)
+                    else ev.price end;
+                on_hand := on_hand + ev.qty;
+            end if;
+            continue;
+        end if;
+
+        if p_method = 'fifo' then
+            remaining := ev.qty;
+            cost := 0;
+            while remaining > 0 and head <= coalesce(array_length(layer_qty, 1), 0) loop
+                take := least(remaining, layer_qty[head]);
+                cost := cost + take * layer_price[head];
+                layer_qty[head] := layer_qty[head] - take;
+                remaining := remaining - take;
+                if layer_qty[head] <= 0 then
+                    head := head + 1;
+                end if;
+            end loop;
+            total_cost := case
+                when remaining > 0 then cost + remaining * last_price
+                else cost end;
+        else
+            total_cost := ev.qty * avg_cost;
+            on_hand := greatest(on_hand - ev.qty, 0);
+        end if;
+
+        production_id := ev.id;
+        material := ev.mat;
+        produced_on := ev.day;
+        input_quantity := ev.qty;
+        cost_per_lb := total_cost / nullif(ev.qty, 0);
+        return next;
+    end loop;
+end;
+$$ language plpgsql stable;
+
+-- production_costs() summed per material and week (weeks start Monday), in
+-- material and week order, p_limit rows from p_offset. The dashboard pages
+-- through these instead of reading one row per run.
+create or replace function weekly_production_costs(
+    p_method text default 'fifo',
+    p_limit integer default 1000,
+    p_offset integer default 0
+)
+returns table (
+    material text,
+    week date,
+    run_count bigint,
+    uncosted_runs bigint,
+    input_quantity numeric,
+    costed_quantity numeric,
+    total_cost numeric
+) as $$
+    select
+        c.material,
+        c.produced_on - (extract(isodow from c.produced_on)::integer - 1) as week,
+        count(*),
+        count(*) filter (where c.total_cost is null),
+        sum(c.input_quantity),
+        coalesce(sum(c.input_quantity) filter (where c.total_cost is not null), 0),
+        sum(c.total_cost)
+    from production_costs(p_method) c
+    group by 1, 2
+    order by 1, 2
+    limit p_limit offset p_offset;
+$$ language sql stable;
@@ -0,0 +1,105 @@
+"""Production Metrics read from the trigger-maintained production_metrics table.
+
+production_metrics.sql keeps running sums per product, per material, per PO,
+per (PO, product) and overall. summarize_production() computes the same rows
+from raw production records.
+"""
+import numpy as np
+import pandas as pd
+
+from db import cached_select, fetch_all
+
+# Grouping columns used by each dimension; the rest hold ''
+dimension_columns = {
+    'total': [],
+    'product': ['product'],
+    'material': ['material'],
+    'po': ['po_number'],
+    'po_product': ['po_number', 'product']
+}
+
+SUM_COLUMNS = ['run_count', 'input_quantity', 'output_quantity', 'yield_sum', 'yield_count']
+
+
+def po_sort_key(po_numbers):
+    """First run of digits in each PO number ('3-6346' -> 3); NaN when there is none."""
+    return pd.to_numeric(po_numbers.astype('string').str.extract(r'(\d+)', expand=False), errors='coerce')
+
+
+def _with_averages(metrics):
+    metrics = metrics.copy()
+    for column in SUM_COLUMNS:
+        metrics[column] = pd.to_numeric(metrics[column]).astype(float)
+    metrics['avg_yield'] = metrics['yield_sum'] / metrics['yield_count'].replace(0, np.nan)
+    return metrics
+
+
+def summarize_production(production):
+    """production_metrics rows computed from production records in pandas."""
+    rows = pd.DataFrame({
+        'po_number': production['po_number'].fillna('').astype(str),
+        'product': production['product'].fillna('').astype(str),
+        'material': production['input_material'].fillna('').astype(str).str.strip().str.upper(),
+        'input_quantity': pd.to_numeric(production['input_quantity']).fillna(0),
+        'output_quantity': pd.to_numeric(production['output_quantity']).fillna(0),
+        'yield_sum': pd.to_numeric(production['yield']).fillna(0),
+        'yield_count': production['yield'].notna().astype(int),
+        'run_count': 1
+    })
+    rows['po_sort_key'] = po_sort_key(rows['po_number'])
+    frames = []
+    for dimension, columns in dimension_columns.items():
+        if columns:
+            group = rows.groupby(columns, as_index=False).agg(
+                po_sort_key=('po_sort_key', 'min'), **{column: (column, 'sum') for column in SUM_COLUMNS}
+            )
+        else:
+            group = rows[SUM_COLUMNS].sum().to_frame().T
+        group['dimension'] = dimension
+        if 'po_number' not in columns:
+            group['po_sort_key'] = np.nan
+        frames.append(group)
+    metrics = pd.concat(frames, ignore_index=True)
+    for column in ['po_number', 'product', 'material']:
+        metrics[column] = metrics[column].fillna('')
+    return _with_averages(metrics)
+
+
+def fetch_production_metrics(client):
+    """The rows the dashboard shows, through the shared read cache, with avg_yield added.
+
+    The overall row, the product and material rows and the (PO, product) rows
+    are read with separate filtered queries; the (PO, product) rows grow with
+    every PO, so they are read in pages. The 'po' dimension isn't read.
+    """
+    rows = cached_select(client, 'production_metrics', filters=(('eq', 'dimension', 'total'),))
+    if not rows:
+        return None
+    rows = rows + fetch_all(
+        client, 'production_metrics',
+        order=('dimension', 'product', 'material'),
+        filters=(('in_', 'dimension', ['product', 'material']),)
+    ) + fetch_all(
+        client, 'production_metrics',
+        order=('po_sort_key', 'po_number', 'product'),
+        filters=(('eq', 'dimension', 'po_product'),)
+    )
+    return _with_averages(pd.DataFrame(rows))
+
+
+def metrics_for(metrics, dimension):
+    """Rows of one dimension; PO dimensions come in PO order with unnumbered POs last."""
+    rows = metrics[metrics['dimension'] == dimension]
+    if dimension in ('po', 'po_product'):
+        rows = rows.sort_values(['po_sort_key', 'po_number', 'product'], na_position='last', kind='mergesort')
+    else:
+        rows = rows.sort_values(dimension_columns[dimension] or ['dimension'], kind='mergesort')
+    return rows.reset_index(drop=True)
+
+
+def totals(metrics):
+    """The overall row as a Series (zeros when there is no production yet)."""
+    rows = metrics[metrics['dimension'] == 'total']
+    if rows.empty:
+        return pd.Series(0.0, index=SUM_COLUMNS + ['avg_yield'])
+    return rows.iloc[0]
@@ -0,0 +1,167 @@
+-- Running production aggregates for the dashboard's Production Metrics tab.
+-- Run after material_key_indexes.sql.
+--
+-- production_metrics holds one row per product, per material, per PO, per
+-- (PO, product) and one overall total. Triggers add inserted rows and
+-- subtract deleted ones, so the dashboard reads a few summary rows instead of
+-- loading and re-sorting every production record.
+--
+-- Maintenance:
+--   select rebuild_production_metrics();  -- recompute every row from production
+
+-- Numeric PO sort key: the first run of digits in po_number ('3-6346' -> 3),
+-- null when there are none so those POs sort last
+alter table production
+    add column if not exists po_sort_key numeric
+    generated always as (substring(po_number from '[0-9]+')::numeric) stored;
+
+create index if not exists idx_production_po_sort_key
+    on production(po_sort_key, po_number);
+
+-- Unused grouping columns hold '' so every row has a complete primary key
+create table if not exists production_metrics (
+    dimension text not null check (dimension in ('total', 'product', 'material', 'po', 'po_product')),
+    po_number text not null default '',
+    product text not null default '',
+    material text not null default '',
+    po_sort_key numeric,
+    run_count bigint not null default 0,
+    input_quantity numeric not null default 0,
+    output_quantity numeric not null default 0,
+    yield_sum numeric not null default 0,
+    yield_count bigint not null default 0,
+    primary key (dimension, po_number, product, material)
+);
+
+-- The dashboard pages through the po_product rows in PO order
+create index if not exists idx_production_metrics_po_order
+    on production_metrics(dimension, po_sort_key, po_number, product);
+
+-- Add (p_sign = 1) or subtract (p_sign = -1) a set of production rows
+create or replace function add_production_metrics(p_rows production[], p_sign integer)
+returns void as $$
+    insert into production_metrics as m (
+        dimension, po_number, product, material, po_sort_key,
+        run_count, input_quantity, output_quantity, yield_sum, yield_count
+    )
+    select
+        case
+            when grouping(r.po_number, r.product, r.material_key) = 7 then 'total'
+            when grouping(r.po_number) = 0 and grouping(r.product) = 0 then 'po_product'
+            when grouping(r.po_number) = 0 then 'po'
+            when grouping(r.product) = 0 then 'product'
+            else 'material'
+        end,
+        case when grouping(r.po_number) = 0 then r.po_number else '' end,
+        case when grouping(r.product) = 0 then r.product else '' end,
+        case when grouping(r.material_key) = 0 then r.material_key else '' end,
+        case when grouping(r.po_number) = 0 then min(r.po_sort_key) end,
+        p_sign * count(*),
+        p_sign * coalesce(sum(r.input_quantity), 0),
+        p_sign * coalesce(sum(r.output_quantity), 0),
+        p_sign * coalesce(sum(r.yield), 0),
+        p_sign * count(r.yield)
+    from (
+        select
+            coalesce(po_number, '') as po_number,
+            coalesce(product, '') as product,
+            coalesce(material_key, '') as material_key,
+            po_sort_key, input_quantity, output_quantity, yield
+        from unnest(p_rows)
+    ) r
+    group by grouping sets (
+        (),
+        (r.product),
+        (r.material_key),
+        (r.po_number),
+        (r.po_number, r.product)
+    )
+    on conflict (dimension, po_number, product, material) do update set
+        po_sort_key = coalesce(excluded.po_sort_key, m.po_sort_key),
+        run_count = m.run_count + excluded.run_count,
+        input_quantity = m.input_quantity + excluded.input_quantity,
+        output_quantity = m.output_quantity + excluded.output_quantity,
+        yield_sum = m.yield_sum + excluded.yield_sum,
+        yield_count = m.yield_count + excluded.yield_count;
+
+    -- Groups whose last production row was removed. Only subtraction can
+    -- empty a group, and only the groups of p_rows are checked, by primary key.
+    delete from production_metrics m
+    where p_sign = -1
+      and m.run_count <= 0
+      and (m.dimension, m.po_number, m.product, m.material) in (
+          select k.dimension, k.po_number, k.product, k.material
+          from unnest(p_rows) r
+          cross join lateral (values
+              ('product', '', coalesce(r.product, ''), ''),
+              ('material', '', '', coalesce(r.material_key, '')),
+              ('po', coalesce(r.po_number, ''), '', ''),
+              ('po_product', coalesce(r.po_number, ''), coalesce(r.product, ''), '')
+          ) k(dimension, po_number, product, material)
+      );
+$$ language sql;
+
+-- Recompute every row from production
+create or replace function rebuild_production_metrics()
+returns integer as $$
+declare
+    rebuilt integer;
+begin
+    lock table production_metrics in exclusive mode;
+    delete from production_metrics;
+    perform add_production_metrics(array(select p from production p), 1);
+    select count(*) into rebuilt from production_metrics;
+    return rebuilt;
+end;
+$$ language plpgsql;
+
+-- One function per event: a trigger with transition tables handles one event
+create or replace function production_metrics_after_insert()
+returns trigger as $$
+begin
+    perform add_production_metrics(array(select r::production from new_production r), 1);
+    return null;
+end;
+$$ language plpgsql;
+
+create or replace function production_metrics_after_update()
+returns trigger as $$
+begin
+    perform add_production_metrics(array(select r::production from old_production r), -1);
+    perform add_production_metrics(array(select r::production from new_production r), 1);
+    return null;
+end;
+$$ language plpgsql;
+
+create or replace function production_metrics_after_delete()
+returns trigger as $$
+begin
+    perform add_production_metrics(array(select r::production from old_production r), -1);
+    return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists production_metrics_after_insert on production;
+drop trigger if exists production_metrics_after_update on production;
+drop trigger if exists production_metrics_after_delete on production;
+
+create trigger production_metrics_after_insert
+    after insert on production
+    referencing new table as new_production
+    for each statement
+    execute function production_metrics_after_insert();
+
+create trigger production_metrics_after_update
+    after update on production
+    referencing old table as old_production new table as new_production
+    for each statement
+    execute function production_metrics_after_update();
+
+create trigger production_metrics_after_delete
+    after delete on production
+    referencing old table as old_production
+    for each statement
+    execute function production_metrics_after_delete();
+
+-- Populate from existing history
+select rebuild_production_metrics();
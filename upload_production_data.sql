@@ -1,5 +1,6 @@
 -- Drop existing triggers first
 drop trigger if exists update_inventory_purchases_updated_at on inventory_purchases;
+drop trigger if exists ensure_inventory_material on inventory_purchases;
 drop trigger if exists update_inventory_after_purchase on inventory_purchases;
 drop trigger if exists update_inventory_after_production on production;
 
@@ -48,65 +49,98 @@ create trigger update_inventory_purchases_updated_at
     for each row
     execute function update_updated_at_column();
 
--- Create trigger to update inventory quantities
-create or replace function update_inventory_quantity()
+-- Make sure a purchased material has an inventory row before the foreign key
+-- on inventory_purchases.material is checked. "on conflict do nothing" lets
+-- concurrent receipts of a new material both succeed.
+create or replace function ensure_inventory_material()
 returns trigger as $$
 begin
-    -- For new purchases
-    if TG_OP = 'INSERT' then
-        -- Try to update existing inventory
-        update inventory
-        set quantity = quantity + NEW.quantity,
-            last_updated = now()
-        where material = NEW.material;
-        
-        -- If no row was updated, insert new material
-        if not found then
-            insert into inventory (material, quantity)
-            values (NEW.material, NEW.quantity);
-        end if;
-    end if;
-    
+    insert into inventory (material, quantity)
+    values (NEW.material, 0)
+    on conflict (material) do nothing;
     return NEW;
 end;
 $$ language plpgsql;
 
+create trigger ensure_inventory_material
+    before insert on inventory_purchases
+    for each row
+    execute function ensure_inventory_material();
+
+-- Add purchased quantities to inventory, once per material per statement.
+-- A 5,000-row import touches each material row once instead of 5,000 times,
+-- and rows are locked in material order so concurrent imports can't deadlock.
+create or replace function update_inventory_quantity()
+returns trigger as $$
+begin
+    insert into inventory as i (material, quantity, last_updated)
+    select material, sum(quantity), now()
+    from new_purchases
+    group by material
+    order by material
+    on conflict (material) do update set
+        quantity = i.quantity + excluded.quantity,
+        last_updated = excluded.last_updated;
+    return null;
+end;
+$$ language plpgsql;
+
 create trigger update_inventory_after_purchase
     after insert on inventory_purchases
-    for each row
+    referencing new table as new_purchases
+    for each statement
     execute function update_inventory_quantity();
 
--- Create trigger to update inventory quantities from production
+-- Subtract production inputs from inventory, once per material per statement
 create or replace function update_inventory_from_production()
 returns trigger as $$
+declare
+    short_material text;
 begin
-    -- Subtract the input quantity from inventory
-    update inventory
-    set 
-        quantity = quantity - NEW.input_quantity,
-        last_updated = now()
-    where material = NEW.input_material;
-    
-    -- Raise an error if inventory would go negative
-    if not found or (
-        select quantity < 0 
-        from inventory 
-        where material = NEW.input_material
-    ) then
-        raise exception 'Insufficient inventory for material: %', NEW.input_material;
+    -- Materials match on the normalized key production.material_key holds
+    -- (material_key_indexes.sql), so 'Brisket ' draws from BRISKET.
+    -- Lock in material order so concurrent statements queue instead of deadlocking.
+    -- "no key update" still lets foreign key checks from other inserts through.
+    perform 1
+    from inventory
+    where material in (select upper(trim(input_material)) from new_production)
+    order by material
+    for no key update;
+
+    with used as (
+        select upper(trim(input_material)) as material, sum(input_quantity) as quantity
+        from new_production
+        group by upper(trim(input_material))
+    ), updated as (
+        update inventory i
+        set
+            quantity = i.quantity - used.quantity,
+            last_updated = now()
+        from used
+        where i.material = used.material
+        returning i.material, i.quantity
+    )
+    select used.material into short_material
+    from used
+    left join updated on updated.material = used.material
+    where updated.material is null or updated.quantity < 0
+    order by used.material
+    limit 1;
+
+    -- Raise an error if a material has no inventory row or would go negative
+    if found then
+        raise exception 'Insufficient inventory for material: %', short_material;
     end if;
-    
-    return NEW;
+
+    return null;
 end;
 $$ language plpgsql;
 
--- Drop existing trigger if it exists
-drop trigger if exists update_inventory_after_production on production;
-
 -- Create trigger for production table
 create trigger update_inventory_after_production
     after insert on production
-    for each row
+    referencing new table as new_production
+    for each statement
     execute function update_inventory_from_production();
 
 -- Initialize inventory with unique materials
@@ -194,44 +228,8 @@ left join lateral (
     limit 1
 ) latest_purchase on true;
 
--- Drop and recreate the view with proper production usage calculation
-drop view if exists inventory_with_usage;
-
--- Create view that shows current inventory with production usage
-create view inventory_with_usage as
-select 
-    i.material,
-    i.quantity as current_quantity,
-    i.last_updated,
-    coalesce(p.total_used_in_production, 0) as quantity_used_in_production,
-    coalesce(ip.total_purchased, 0) as total_purchased,
-    latest_purchase.price_per_lb as last_purchase_price,
-    latest_purchase.purchase_date as last_purchase_date
-from inventory i
-left join (
-    -- Calculate total used in production for each material
-    select 
-        input_material,
-        sum(input_quantity) as total_used_in_production
-    from production
-    group by input_material
-) p on p.input_material = i.material
-left join (
-    -- Calculate total purchased for each material
-    select 
-        material,
-        sum(quantity) as total_purchased
-    from inventory_purchases
-    group by material
-) ip on ip.material = i.material
-left join lateral (
-    -- Get latest purchase price and date
-    select price_per_lb, purchase_date
-    from inventory_purchases
-    where material = i.material
-    order by purchase_date desc
-    limit 1
-) latest_purchase on true;
+-- inventory_with_usage is a view over the trigger-maintained
+-- inventory_summary table; see inventory_summary.sql
 
 -- Create a view for production history
 create or replace view production_history as